@@ -0,0 +1,111 @@
+"""Baseline schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+
+Databases that were bootstrapped by the old startup hook already have these
+tables; mark them as migrated with `alembic stamp 0001_baseline` before
+running `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "knowledge_trees",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("topic", sa.String()),
+        *_timestamps(),
+    )
+    op.create_index("ix_knowledge_trees_id", "knowledge_trees", ["id"])
+    op.create_index("ix_knowledge_trees_topic", "knowledge_trees", ["topic"])
+
+    op.create_table(
+        "sections",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tree_id", sa.Integer(), sa.ForeignKey("knowledge_trees.id")),
+        sa.Column("title", sa.String()),
+        sa.Column("description", sa.Text()),
+        *_timestamps(),
+    )
+    op.create_index("ix_sections_id", "sections", ["id"])
+    op.create_index("ix_sections_title", "sections", ["title"])
+
+    op.create_table(
+        "subsections",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("section_id", sa.Integer(), sa.ForeignKey("sections.id")),
+        sa.Column("title", sa.String()),
+        sa.Column("description", sa.Text()),
+        *_timestamps(),
+    )
+    op.create_index("ix_subsections_id", "subsections", ["id"])
+    op.create_index("ix_subsections_title", "subsections", ["title"])
+
+    op.create_table(
+        "lessons",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("subsection_id", sa.Integer(), sa.ForeignKey("subsections.id"), unique=True),
+        sa.Column("content", sa.Text()),
+        sa.Column("multimedia_urls", postgresql.ARRAY(sa.String()).with_variant(sa.JSON(), "sqlite"), nullable=True),
+        *_timestamps(),
+    )
+    op.create_index("ix_lessons_id", "lessons", ["id"])
+
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("section_id", sa.Integer(), sa.ForeignKey("sections.id")),
+        sa.Column("text", sa.Text()),
+        sa.Column("difficulty", sa.String()),
+        sa.Column("correct_answer", sa.Text()),
+        *_timestamps(),
+    )
+    op.create_index("ix_questions_id", "questions", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("name", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        *_timestamps(),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "user_progress",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), unique=True),
+        sa.Column("completed_subsections", postgresql.ARRAY(sa.Integer()).with_variant(sa.JSON(), "sqlite")),
+        sa.Column("scores", sa.JSON()),
+        *_timestamps(),
+    )
+    op.create_index("ix_user_progress_id", "user_progress", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("user_progress")
+    op.drop_table("users")
+    op.drop_table("questions")
+    op.drop_table("lessons")
+    op.drop_table("subsections")
+    op.drop_table("sections")
+    op.drop_table("knowledge_trees")
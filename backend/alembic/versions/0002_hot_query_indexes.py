@@ -0,0 +1,31 @@
+"""Index the foreign keys used by the hot read queries
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19 00:00:00.000000
+
+The composite (section_id, difficulty) index also serves lookups on
+section_id alone, so questions get no separate single-column index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_hot_query_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_sections_tree_id", "sections", ["tree_id"])
+    op.create_index("ix_subsections_section_id", "subsections", ["section_id"])
+    op.create_index(
+        "ix_questions_section_id_difficulty", "questions", ["section_id", "difficulty"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_questions_section_id_difficulty", table_name="questions")
+    op.drop_index("ix_subsections_section_id", table_name="subsections")
+    op.drop_index("ix_sections_tree_id", table_name="sections")
@@ -0,0 +1,105 @@
+"""Replace user_progress with one subsection_progress row per (user, subsection)
+
+Revision ID: 0003_subsection_progress
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0003_subsection_progress"
+down_revision = "0002_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+subsection_progress = sa.table(
+    "subsection_progress",
+    sa.column("user_id", sa.Integer),
+    sa.column("subsection_id", sa.Integer),
+    sa.column("completed", sa.Boolean),
+    sa.column("score", sa.Float),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "subsection_progress",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("subsection_id", sa.Integer(), sa.ForeignKey("subsections.id"), primary_key=True),
+        sa.Column("completed", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("score", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Unfold the completed_subsections array and the scores blob into rows,
+    # dropping entries for subsections that no longer exist.
+    connection = op.get_bind()
+    existing = {row.id for row in connection.execute(sa.text("SELECT id FROM subsections"))}
+    rows = []
+    for progress in connection.execute(
+        sa.text("SELECT user_id, completed_subsections, scores FROM user_progress")
+    ):
+        completed = set(progress.completed_subsections or [])
+        scores = {int(key): value for key, value in (progress.scores or {}).items()}
+        for subsection_id in (completed | scores.keys()) & existing:
+            rows.append(
+                {
+                    "user_id": progress.user_id,
+                    "subsection_id": subsection_id,
+                    "completed": subsection_id in completed,
+                    "score": scores.get(subsection_id),
+                }
+            )
+    if rows:
+        op.bulk_insert(subsection_progress, rows)
+
+    op.drop_index("ix_user_progress_id", table_name="user_progress")
+    op.drop_table("user_progress")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "user_progress",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), unique=True),
+        sa.Column("completed_subsections", postgresql.ARRAY(sa.Integer()).with_variant(sa.JSON(), "sqlite")),
+        sa.Column("scores", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_progress_id", "user_progress", ["id"])
+
+    connection = op.get_bind()
+    progress = {}
+    for row in connection.execute(
+        sa.text("SELECT user_id, subsection_id, completed, score FROM subsection_progress")
+    ):
+        completed, scores = progress.setdefault(row.user_id, ([], {}))
+        if row.completed:
+            completed.append(row.subsection_id)
+        if row.score is not None:
+            scores[str(row.subsection_id)] = row.score
+    user_progress = sa.table(
+        "user_progress",
+        sa.column("user_id", sa.Integer),
+        sa.column("completed_subsections", postgresql.ARRAY(sa.Integer()).with_variant(sa.JSON(), "sqlite")),
+        sa.column("scores", sa.JSON),
+    )
+    users = [row.id for row in connection.execute(sa.text("SELECT id FROM users"))]
+    op.bulk_insert(
+        user_progress,
+        [
+            {
+                "user_id": user_id,
+                "completed_subsections": progress.get(user_id, ([], {}))[0],
+                "scores": progress.get(user_id, ([], {}))[1],
+            }
+            for user_id in users
+        ],
+    )
+
+    op.drop_table("subsection_progress")
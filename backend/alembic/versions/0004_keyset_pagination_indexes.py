@@ -0,0 +1,43 @@
+"""Index the keyset pagination orders of trees and questions
+
+Revision ID: 0004_keyset_pagination_indexes
+Revises: 0003_subsection_progress
+Create Date: 2026-10-19 00:00:00.000000
+
+Each index ends in the primary key so a page is one range scan from the
+cursor. The new indexes replace the ones on their leading columns.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_keyset_pagination_indexes"
+down_revision = "0003_subsection_progress"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_knowledge_trees_topic_id", "knowledge_trees", ["topic", "id"])
+    op.create_index(
+        "ix_knowledge_trees_created_at_id", "knowledge_trees", ["created_at", "id"]
+    )
+    op.drop_index("ix_knowledge_trees_topic", table_name="knowledge_trees")
+
+    op.create_index(
+        "ix_questions_section_id_difficulty_id",
+        "questions",
+        ["section_id", "difficulty", "id"],
+    )
+    op.drop_index("ix_questions_section_id_difficulty", table_name="questions")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_questions_section_id_difficulty", "questions", ["section_id", "difficulty"]
+    )
+    op.drop_index("ix_questions_section_id_difficulty_id", table_name="questions")
+
+    op.create_index("ix_knowledge_trees_topic", "knowledge_trees", ["topic"])
+    op.drop_index("ix_knowledge_trees_created_at_id", table_name="knowledge_trees")
+    op.drop_index("ix_knowledge_trees_topic_id", table_name="knowledge_trees")
@@ -0,0 +1,41 @@
+"""Record question attempts so the bank can skip recently answered questions
+
+Revision ID: 0005_question_attempts
+Revises: 0004_keyset_pagination_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_question_attempts"
+down_revision = "0004_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "question_attempts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column(
+            "question_id",
+            sa.Integer(),
+            sa.ForeignKey("questions.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("is_correct", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_question_attempts_user_id_created_at",
+        "question_attempts",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_question_attempts_user_id_created_at", table_name="question_attempts")
+    op.drop_table("question_attempts")
@@ -0,0 +1,41 @@
+"""Store MinHash signatures and LSH bands for near-duplicate question detection
+
+Revision ID: 0006_question_minhash
+Revises: 0005_question_attempts
+Create Date: 2026-10-19 00:00:00.000000
+
+Existing questions get their signatures from scripts/dedupe_question_bank.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_question_minhash"
+down_revision = "0005_question_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("questions", sa.Column("minhash", sa.LargeBinary(), nullable=True))
+    op.create_table(
+        "question_lsh_bands",
+        sa.Column(
+            "section_id",
+            sa.Integer(),
+            sa.ForeignKey("sections.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("band_hash", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "question_id",
+            sa.Integer(),
+            sa.ForeignKey("questions.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("question_lsh_bands")
+    op.drop_column("questions", "minhash")
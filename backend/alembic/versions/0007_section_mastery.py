@@ -0,0 +1,33 @@
+"""Track a per-user, per-section mastery rating for adaptive difficulty
+
+Revision ID: 0007_section_mastery
+Revises: 0006_question_minhash
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_section_mastery"
+down_revision = "0006_question_minhash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "section_mastery",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column(
+            "section_id",
+            sa.Integer(),
+            sa.ForeignKey("sections.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("rating", sa.Float(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("section_mastery")
@@ -0,0 +1,40 @@
+"""Schedule spaced-repetition reviews per user and question
+
+Revision ID: 0008_review_schedule
+Revises: 0007_section_mastery
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_review_schedule"
+down_revision = "0007_section_mastery"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "review_schedule",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column(
+            "question_id",
+            sa.Integer(),
+            sa.ForeignKey("questions.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("easiness", sa.Float(), nullable=False),
+        sa.Column("interval_days", sa.Float(), nullable=False),
+        sa.Column("repetitions", sa.Integer(), nullable=False),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_review_schedule_user_id_due_at", "review_schedule", ["user_id", "due_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_schedule_user_id_due_at", table_name="review_schedule")
+    op.drop_table("review_schedule")
@@ -0,0 +1,78 @@
+"""Index trees, sections, subsections and lessons for full-text search
+
+Revision ID: 0009_search_documents
+Revises: 0008_review_schedule
+Create Date: 2026-10-19 00:00:00.000000
+
+On PostgreSQL each document carries a weighted tsvector under a GIN index;
+other databases store the text only.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0009_search_documents"
+down_revision = "0008_review_schedule"
+branch_labels = None
+depends_on = None
+
+
+# (kind, ref_id, tree_id, title, body) of every existing searchable row.
+SOURCES = {
+    "tree": "SELECT 'tree', id, id, coalesce(topic, ''), '' FROM knowledge_trees",
+    "section": (
+        "SELECT 'section', id, tree_id, coalesce(title, ''), coalesce(description, '') "
+        "FROM sections"
+    ),
+    "subsection": (
+        "SELECT 'subsection', subsections.id, sections.tree_id, coalesce(subsections.title, ''), "
+        "coalesce(subsections.description, '') "
+        "FROM subsections JOIN sections ON sections.id = subsections.section_id"
+    ),
+    "lesson": (
+        "SELECT 'lesson', lessons.id, sections.tree_id, coalesce(subsections.title, ''), "
+        "coalesce(lessons.content, '') "
+        "FROM lessons JOIN subsections ON subsections.id = lessons.subsection_id "
+        "JOIN sections ON sections.id = subsections.section_id"
+    ),
+}
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    op.create_table(
+        "search_documents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("ref_id", sa.Integer(), nullable=False),
+        sa.Column("tree_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column(
+            "document", postgresql.TSVECTOR().with_variant(sa.Text(), "sqlite"), nullable=True
+        ),
+        sa.UniqueConstraint("kind", "ref_id", name="uq_search_documents_kind_ref_id"),
+    )
+    op.create_index(
+        "ix_search_documents_document",
+        "search_documents",
+        ["document"],
+        postgresql_using="gin",
+    )
+
+    for source in SOURCES.values():
+        op.execute(
+            f"INSERT INTO search_documents (kind, ref_id, tree_id, title, body) {source}"
+        )
+    if postgres:
+        op.execute(
+            "UPDATE search_documents SET document = "
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', body), 'B')"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_search_documents_document", table_name="search_documents")
+    op.drop_table("search_documents")
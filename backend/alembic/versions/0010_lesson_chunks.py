@@ -0,0 +1,88 @@
+"""Store lessons split at headings for incremental loading
+
+Revision ID: 0010_lesson_chunks
+Revises: 0009_search_documents
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_lesson_chunks"
+down_revision = "0009_search_documents"
+branch_labels = None
+depends_on = None
+
+
+lesson_chunks = sa.table(
+    "lesson_chunks",
+    sa.column("lesson_id", sa.Integer),
+    sa.column("position", sa.Integer),
+    sa.column("heading", sa.String),
+    sa.column("level", sa.Integer),
+    sa.column("content", sa.Text),
+)
+
+
+# Frozen copy of app.services.lesson_chunks.split_lesson as of this revision,
+# so later changes to the splitter don't change what this migration does.
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+_FENCE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+MAX_SPLIT_LEVEL = 3
+
+
+def _split_lesson(content):
+    """Split markdown at ATX headings into (heading, level, content) tuples."""
+    sections = []
+    heading, level, lines = None, 0, []
+    in_fence = False
+    for line in (content or "").splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line.rstrip("\r\n"))
+        if match and len(match.group(1)) <= MAX_SPLIT_LEVEL:
+            if lines:
+                sections.append((heading, level, "".join(lines)))
+            heading, level, lines = match.group(2), len(match.group(1)), []
+        lines.append(line)
+    if lines:
+        sections.append((heading, level, "".join(lines)))
+    return sections
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lesson_chunks",
+        sa.Column(
+            "lesson_id",
+            sa.Integer(),
+            sa.ForeignKey("lessons.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("position", sa.Integer(), primary_key=True),
+        sa.Column("heading", sa.String(), nullable=True),
+        sa.Column("level", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+    )
+
+    connection = op.get_bind()
+    rows = []
+    for lesson in connection.execute(sa.text("SELECT id, content FROM lessons")):
+        rows.extend(
+            {
+                "lesson_id": lesson.id,
+                "position": position,
+                "heading": heading,
+                "level": level,
+                "content": content,
+            }
+            for position, (heading, level, content) in enumerate(_split_lesson(lesson.content))
+        )
+    if rows:
+        op.bulk_insert(lesson_chunks, rows)
+
+
+def downgrade() -> None:
+    op.drop_table("lesson_chunks")
@@ -0,0 +1,148 @@
+"""Store lesson, chunk, section and question texts compressed
+
+Revision ID: 0011_compressed_text
+Revises: 0010_lesson_chunks
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+revision = "0011_compressed_text"
+down_revision = "0010_lesson_chunks"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# (table, primary key columns, column, nullable)
+COLUMNS = [
+    ("lessons", ("id",), "content", True),
+    ("lesson_chunks", ("lesson_id", "position"), "content", False),
+    ("sections", ("id",), "description", True),
+    ("questions", ("id",), "text", True),
+]
+
+# Compressed lesson text gains nothing from TOAST compression on top.
+EXTERNAL_STORAGE = [("lessons", "content"), ("lesson_chunks", "content")]
+
+# Frozen copy of the app.db.types encoding as of this revision: a tag byte,
+# then raw UTF-8 (0x00), zlib (0x01) or zstd (0x02). The upgrade writes zlib
+# only, so it does not depend on zstandard being installed.
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+MIN_SIZE = 512
+ZLIB_LEVEL = 6
+
+
+def _compress(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) >= MIN_SIZE:
+        compressed = zlib.compress(data, ZLIB_LEVEL)
+        if len(compressed) + 1 < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def _decompress(value: bytes) -> str:
+    tag, data = value[:1], bytes(value[1:])
+    if tag == RAW:
+        return data.decode("utf-8")
+    if tag == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    if tag == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Stored text is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown text encoding tag {tag!r}")
+
+
+def _rewrite(table_name, key, column, convert) -> None:
+    """Pass every non-null value of `column` through `convert`, in key order batches."""
+    connection = op.get_bind()
+    table = sa.table(
+        table_name,
+        *(sa.column(name, sa.Integer) for name in key),
+        sa.column(column, sa.LargeBinary),
+    )
+    key_columns = [table.c[name] for name in key]
+    update = (
+        table.update()
+        .where(*(table.c[name] == sa.bindparam(f"key_{name}") for name in key))
+        .values({column: sa.bindparam("value")})
+    )
+    last = None
+    while True:
+        query = (
+            sa.select(*key_columns, table.c[column])
+            .where(table.c[column].is_not(None))
+            .order_by(*key_columns)
+            .limit(BATCH_SIZE)
+        )
+        if last is not None:
+            query = query.where(sa.tuple_(*key_columns) > sa.tuple_(*last))
+        rows = connection.execute(query).all()
+        if not rows:
+            return
+        connection.execute(
+            update,
+            [
+                {**{f"key_{name}": row[i] for i, name in enumerate(key)}, "value": convert(row[-1])}
+                for row in rows
+            ],
+        )
+        last = rows[-1][: len(key)]
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for table, key, column, nullable in COLUMNS:
+        if postgres:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.LargeBinary(),
+                existing_type=sa.Text(),
+                existing_nullable=nullable,
+                postgresql_using=f"convert_to({column}, 'UTF8')",
+            )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(
+                    column, type_=sa.LargeBinary(), existing_type=sa.Text(), existing_nullable=nullable
+                )
+        _rewrite(table, key, column, lambda value: _compress(bytes(value).decode("utf-8")))
+    if postgres:
+        for table, column in EXTERNAL_STORAGE:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    if postgres:
+        for table, column in EXTERNAL_STORAGE:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE EXTENDED")
+    for table, key, column, nullable in COLUMNS:
+        _rewrite(table, key, column, lambda value: _decompress(value).encode("utf-8"))
+        if postgres:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.Text(),
+                existing_type=sa.LargeBinary(),
+                existing_nullable=nullable,
+                postgresql_using=f"convert_from({column}, 'UTF8')",
+            )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(
+                    column, type_=sa.Text(), existing_type=sa.LargeBinary(), existing_nullable=nullable
+                )
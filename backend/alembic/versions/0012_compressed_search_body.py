@@ -0,0 +1,116 @@
+"""Store search document bodies compressed
+
+Revision ID: 0012_compressed_search_body
+Revises: 0011_compressed_text
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+revision = "0012_compressed_search_body"
+down_revision = "0011_compressed_text"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the app.db.types encoding as of this revision; see
+# 0011_compressed_text. The upgrade writes zlib only.
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+MIN_SIZE = 512
+ZLIB_LEVEL = 6
+
+
+def _compress(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) >= MIN_SIZE:
+        compressed = zlib.compress(data, ZLIB_LEVEL)
+        if len(compressed) + 1 < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def _decompress(value: bytes) -> str:
+    tag, data = value[:1], bytes(value[1:])
+    if tag == RAW:
+        return data.decode("utf-8")
+    if tag == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    if tag == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Stored text is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown text encoding tag {tag!r}")
+
+
+def _rewrite(convert) -> None:
+    """Pass every body through `convert`, in id order batches."""
+    connection = op.get_bind()
+    table = sa.table("search_documents", sa.column("id", sa.Integer), sa.column("body", sa.LargeBinary))
+    update = (
+        table.update()
+        .where(table.c.id == sa.bindparam("key_id"))
+        .values(body=sa.bindparam("value"))
+    )
+    last = None
+    while True:
+        query = sa.select(table.c.id, table.c.body).order_by(table.c.id).limit(BATCH_SIZE)
+        if last is not None:
+            query = query.where(table.c.id > last)
+        rows = connection.execute(query).all()
+        if not rows:
+            return
+        connection.execute(update, [{"key_id": row.id, "value": convert(row.body)} for row in rows])
+        last = rows[-1].id
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    if postgres:
+        op.alter_column(
+            "search_documents",
+            "body",
+            type_=sa.LargeBinary(),
+            existing_type=sa.Text(),
+            existing_nullable=False,
+            postgresql_using="convert_to(body, 'UTF8')",
+        )
+    else:
+        with op.batch_alter_table("search_documents") as batch_op:
+            batch_op.alter_column(
+                "body", type_=sa.LargeBinary(), existing_type=sa.Text(), existing_nullable=False
+            )
+    _rewrite(lambda value: _compress(bytes(value).decode("utf-8")))
+    if postgres:
+        op.execute("ALTER TABLE search_documents ALTER COLUMN body SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    if postgres:
+        op.execute("ALTER TABLE search_documents ALTER COLUMN body SET STORAGE EXTENDED")
+    _rewrite(lambda value: _decompress(value).encode("utf-8"))
+    if postgres:
+        op.alter_column(
+            "search_documents",
+            "body",
+            type_=sa.Text(),
+            existing_type=sa.LargeBinary(),
+            existing_nullable=False,
+            postgresql_using="convert_from(body, 'UTF8')",
+        )
+    else:
+        with op.batch_alter_table("search_documents") as batch_op:
+            batch_op.alter_column(
+                "body", type_=sa.Text(), existing_type=sa.LargeBinary(), existing_nullable=False
+            )
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import knowledge_tree, lessons, questions, users
+from app.api.endpoints import knowledge_tree, lessons, questions, search, users
 
 api_router = APIRouter()
 api_router.include_router(knowledge_tree.router, prefix="/knowledge-tree", tags=["knowledge-tree"])
 api_router.include_router(lessons.router, prefix="/lessons", tags=["lessons"])
 api_router.include_router(questions.router, prefix="/questions", tags=["questions"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
\ No newline at end of file
+api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
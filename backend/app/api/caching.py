@@ -0,0 +1,54 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+
+def make_etag(request: Request, *version: Any) -> str:
+    """Build a weak ETag from a resource's version and the request's query.
+
+    `version` is whatever identifies the stored state (IDs, `updated_at`
+    timestamps, counts); the query string is included because it can change
+    the representation. The tag is weak because CompressionMiddleware may
+    send the same representation gzip-, brotli- or un-encoded, and a strong
+    validator would have to differ per content-coding.
+    """
+    digest = hashlib.sha256(
+        "|".join([request.url.query, *map(str, version)]).encode()
+    ).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag`."""
+    matched = _matches(request.headers.get("if-none-match"), etag)
+    record_cache("etag", matched)
+    return matched
+
+
+def _matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: only the opaque tags are compared.
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS}"
+        ),
+    }
+
+
+def not_modified(etag: str) -> Response:
+    """A bodiless 304 response carrying the validators."""
+    return Response(status_code=304, headers=cache_headers(etag))
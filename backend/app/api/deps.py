@@ -0,0 +1,69 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Type, TypeVar
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.session import get_read_db
+from app.services.admission import AdmissionRejected, admission_controller
+from app.services.ai import AIService
+
+ServiceT = TypeVar("ServiceT")
+
+
+def read_service(service_class: Type[ServiceT]) -> Callable[..., ServiceT]:
+    """Dependency that builds `service_class` on a read-only (replica) session."""
+
+    def dependency(
+        db: Session = Depends(get_read_db),
+        ai_service: AIService = Depends(),
+    ) -> ServiceT:
+        return service_class(db=db, ai_service=ai_service)
+
+    return dependency
+
+
+def client_key(request: Request) -> str:
+    """Identify the client for admission control.
+
+    A valid bearer token identifies its user. Anyone else is known by address:
+    the last entry of TRUSTED_PROXY_HEADER, which the proxy in front of the
+    app sets, or else the peer address. Headers a client can set freely are
+    not trusted.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = decode_access_token(token)
+        if subject is not None:
+            return f"user:{subject}"
+    if settings.TRUSTED_PROXY_HEADER:
+        address = request.headers.get(settings.TRUSTED_PROXY_HEADER, "").rsplit(",", 1)[-1].strip()
+        if address:
+            return f"ip:{address}"
+    return f"ip:{request.client.host}" if request.client else "ip:"
+
+
+@asynccontextmanager
+async def admission_slot(client: str) -> AsyncIterator[None]:
+    """Hold an admission slot for `client` around a block that calls the AI provider.
+
+    Rejected requests fail fast with 429 (this client has too many in
+    flight) or 503 (the queue is full), carrying a Retry-After header.
+    """
+    try:
+        async with admission_controller.slot(client):
+            yield
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def generation_slot(request: Request) -> AsyncIterator[None]:
+    """Dependency holding an admission slot for a request that calls the AI provider."""
+    async with admission_slot(client_key(request)):
+        yield
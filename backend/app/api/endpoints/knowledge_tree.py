@@ -1,35 +1,129 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Optional
 
-from app.schemas.knowledge_tree import KnowledgeTreeCreate, KnowledgeTreeResponse
+from app.api.caching import cache_headers, is_not_modified, make_etag, not_modified
+from app.api.deps import generation_slot, read_service
+from app.api.fieldsets import exclude_links, sparse_fieldset
+from app.api.pagination import next_page_headers, page_size
+from app.api.responses import FastJSONResponse
+from app.schemas.knowledge_tree import (
+    KnowledgeTreeCreate,
+    KnowledgeTreeResponse,
+    KnowledgeTreeSummary,
+)
+from app.schemas.pagination import Page
+from app.services.bundle import CourseBundleService
 from app.services.knowledge_tree import KnowledgeTreeService
+from app.services.search import SearchService
 
 router = APIRouter()
 
 
-@router.post("/", response_model=KnowledgeTreeResponse)
+@router.post("/", response_model=KnowledgeTreeResponse, dependencies=[Depends(generation_slot)])
 async def create_knowledge_tree(
     data: KnowledgeTreeCreate,
     service: KnowledgeTreeService = Depends(),
 ) -> Any:
     """
-    Generate a knowledge tree for a given topic.
+    Generate a knowledge tree for a given topic. With `search_first`, existing
+    trees matching the topic are returned in a 409 response instead.
     """
+    if data.search_first:
+        # Best hit per tree, keeping the ranking.
+        matches = {}
+        for hit in await SearchService(db=service.db).search(data.topic, limit=20):
+            matches.setdefault(hit.tree_id, hit)
+        if matches:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Existing material matches this topic",
+                    "matches": [match.model_dump() for match in list(matches.values())[:5]],
+                },
+            )
     try:
         return await service.generate_knowledge_tree(data.topic)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/", response_model=Page[KnowledgeTreeSummary])
+async def list_knowledge_trees(
+    request: Request,
+    sort: str = Query(
+        "created_at",
+        pattern="^(created_at|topic)$",
+        description="created_at (newest first) or topic (alphabetical)",
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Depends(page_size),
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: KnowledgeTreeService = Depends(read_service(KnowledgeTreeService)),
+) -> Any:
+    """
+    List knowledge trees, one page at a time.
+    """
+    try:
+        page = await service.list_knowledge_trees(
+            sort, cursor=cursor, limit=limit, include_links=links
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(
+        page,
+        exclude=None if links else {"items": {"__all__": {"links"}}},
+        headers=next_page_headers(request, page.next_cursor),
+    )
+
+
 @router.get("/{tree_id}", response_model=KnowledgeTreeResponse)
 async def get_knowledge_tree(
     tree_id: int,
-    service: KnowledgeTreeService = Depends(),
+    request: Request,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. id,sections.title"
+    ),
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: KnowledgeTreeService = Depends(read_service(KnowledgeTreeService)),
 ) -> Any:
     """
     Get a knowledge tree by ID.
     """
-    tree = await service.get_knowledge_tree(tree_id)
+    include = sparse_fieldset(KnowledgeTreeResponse, fields)
+    version = await service.get_knowledge_tree_version(tree_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Knowledge tree not found")
+    etag = make_etag(request, *version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    tree = await service.get_knowledge_tree(tree_id, include_links=links)
     if not tree:
         raise HTTPException(status_code=404, detail="Knowledge tree not found")
-    return tree
\ No newline at end of file
+    return FastJSONResponse(
+        tree,
+        include=include,
+        exclude=None if links else exclude_links(KnowledgeTreeResponse),
+        headers=cache_headers(etag),
+    )
+
+
+@router.get(
+    "/{tree_id}/bundle",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def get_course_bundle(
+    tree_id: int,
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: CourseBundleService = Depends(read_service(CourseBundleService)),
+) -> Any:
+    """
+    Get a whole course as NDJSON: the tree outline, then each section's
+    questions and lessons in reading order, then a summary line.
+    """
+    lines = await service.get_bundle(tree_id, include_links=links)
+    if lines is None:
+        raise HTTPException(status_code=404, detail="Knowledge tree not found")
+    return StreamingResponse(lines, media_type="application/x-ndjson")
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Any, List
 
-from app.schemas.lesson import LessonCreate, LessonResponse
+from app.api.caching import cache_headers, is_not_modified, make_etag, not_modified
+from app.api.deps import admission_slot, client_key, generation_slot, read_service
+from app.api.responses import FastJSONResponse
+from app.models.knowledge_tree import Subsection
+from app.schemas.lesson import (
+    LessonChunksResponse,
+    LessonCreate,
+    LessonResponse,
+    SimilarLessonResponse,
+)
 from app.services.lesson import LessonService
 
 router = APIRouter()
 
 
-@router.post("/", response_model=LessonResponse)
+@router.post("/", response_model=LessonResponse, dependencies=[Depends(generation_slot)])
 async def create_lesson(
     data: LessonCreate,
     service: LessonService = Depends(),
@@ -16,47 +25,106 @@ async def create_lesson(
     Generate lesson content for a subsection.
     """
     try:
-        return await service.generate_lesson(data.subsection_id, data.subsection_title)
+        lesson = await service.generate_lesson(
+            data.subsection_id, data.subsection_title, reuse=data.reuse
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse(lesson)
 
 
 @router.get("/{lesson_id}", response_model=LessonResponse)
 async def get_lesson(
     lesson_id: int,
-    service: LessonService = Depends(),
+    request: Request,
+    service: LessonService = Depends(read_service(LessonService)),
 ) -> Any:
     """
     Get a lesson by ID.
     """
+    version = await service.get_lesson_version(lesson_id=lesson_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    etag = make_etag(request, *version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
     lesson = await service.get_lesson(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return lesson
+    return FastJSONResponse(lesson, headers=cache_headers(etag))
+
+
+@router.get("/{lesson_id}/chunks", response_model=LessonChunksResponse)
+async def get_lesson_chunks(
+    lesson_id: int,
+    request: Request,
+    start: int = Query(0, alias="from", ge=0, description="Position of the first chunk"),
+    limit: int = Query(3, ge=1, le=50, description="Number of chunks"),
+    service: LessonService = Depends(read_service(LessonService)),
+) -> Any:
+    """
+    Get a window of a lesson's heading-delimited chunks, with its table of
+    contents, so the start can be shown before the rest is loaded.
+    """
+    version = await service.get_lesson_version(lesson_id=lesson_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    etag = make_etag(request, *version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    chunks = await service.get_lesson_chunks(lesson_id, start, limit)
+    return FastJSONResponse(chunks, headers=cache_headers(etag))
+
+
+@router.get("/subsection/{subsection_id}/similar", response_model=List[SimilarLessonResponse])
+async def get_similar_lessons(
+    subsection_id: int,
+    limit: int = Query(5, ge=1, le=50),
+    service: LessonService = Depends(read_service(LessonService)),
+) -> Any:
+    """
+    Get existing lessons of similar subsections that could be reused.
+    """
+    lessons = await service.get_similar_lessons(subsection_id, limit)
+    if lessons is None:
+        raise HTTPException(status_code=404, detail="Subsection not found")
+    return FastJSONResponse(lessons)
 
 
 @router.get("/subsection/{subsection_id}", response_model=LessonResponse)
 async def get_lesson_by_subsection(
     subsection_id: int,
-    service: LessonService = Depends(),
+    request: Request,
+    service: LessonService = Depends(read_service(LessonService)),
+    write_service: LessonService = Depends(),
 ) -> Any:
     """
     Get a lesson by subsection ID. Auto-generates if it doesn't exist.
     """
-    lesson = await service.get_lesson_by_subsection(subsection_id)
-    if not lesson:
-        # Auto-generate lesson if it doesn't exist
+    version = await service.get_lesson_version(subsection_id=subsection_id)
+    if version:
+        etag = make_etag(request, *version)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        lesson = await service.get_lesson_by_subsection(subsection_id)
+        if lesson:
+            return FastJSONResponse(lesson, headers=cache_headers(etag))
+    
+    # Auto-generate lesson if it doesn't exist. Generation calls the AI
+    # provider, so it is admitted like the POST endpoints, and the replica
+    # session's connection goes back to the pool first.
+    service.db.close()
+    async with admission_slot(client_key(request)):
         try:
-            from app.models.knowledge_tree import Subsection
-            from app.db.session import get_db
-            
-            db = next(get_db())
-            subsection = db.query(Subsection).filter(Subsection.id == subsection_id).first()
+            subsection = write_service.db.query(Subsection).filter(Subsection.id == subsection_id).first()
             if not subsection:
                 raise HTTPException(status_code=404, detail="Subsection not found")
-            
-            lesson = await service.generate_lesson(subsection_id, subsection.title)
-            return lesson
+
+            lesson = await write_service.generate_lesson(subsection_id, subsection.title)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate lesson: {str(e)}")
-    return lesson
\ No newline at end of file
+    return FastJSONResponse(lesson)
\ No newline at end of file
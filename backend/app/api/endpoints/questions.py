@@ -1,28 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Any, List, Optional
 
+from app.api.deps import generation_slot, read_service
+from app.api.fieldsets import exclude_links, sparse_fieldset
+from app.api.pagination import next_page_headers
+from app.api.responses import FastJSONResponse
+from app.core.config import settings
 from app.schemas.question import (
     QuestionCreate,
     QuestionResponse,
     AnswerSubmit,
     AnswerFeedback,
+    NextQuestionResponse,
 )
 from app.services.question import QuestionService
 
 router = APIRouter()
 
 
-@router.post("/", response_model=List[QuestionResponse])
+@router.post("/", response_model=List[QuestionResponse], dependencies=[Depends(generation_slot)])
 async def create_questions(
     data: QuestionCreate,
     service: QuestionService = Depends(),
 ) -> Any:
     """
-    Generate practice questions for a section.
+    Get practice questions for a section, from the stored bank where possible.
     """
     try:
         return await service.generate_questions(
-            data.section_id, data.section_title, data.difficulty
+            data.section_id, data.section_title, data.difficulty, user_id=data.user_id
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -31,17 +37,64 @@ async def create_questions(
 @router.get("/section/{section_id}", response_model=List[QuestionResponse])
 async def get_questions_by_section(
     section_id: int,
+    request: Request,
     difficulty: str = None,
-    service: QuestionService = Depends(),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's Link header"),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        description="Number of items per page; without it and a cursor, all questions",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. id,text"
+    ),
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: QuestionService = Depends(read_service(QuestionService)),
+) -> Any:
+    """
+    Get the questions for a section, optionally filtered by difficulty.
+    Paged when `limit` or `cursor` is given; the next page, if any, is linked
+    from the Link header.
+    """
+    include = sparse_fieldset(QuestionResponse, fields)
+    if limit is None and cursor:
+        limit = settings.PAGE_SIZE_DEFAULT
+    try:
+        page = await service.get_questions_by_section(
+            section_id, difficulty, cursor=cursor, limit=limit, include_links=links
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(
+        page.items,
+        include=include,
+        exclude=None if links else exclude_links(QuestionResponse),
+        headers=next_page_headers(request, page.next_cursor),
+    )
+
+
+@router.get("/next", response_model=NextQuestionResponse)
+async def get_next_question(
+    user_id: int,
+    section_id: int,
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: QuestionService = Depends(read_service(QuestionService)),
 ) -> Any:
     """
-    Get questions for a section, optionally filtered by difficulty.
+    Get the next practice question for a user, at a difficulty adapted to
+    their mastery of the section.
     """
-    questions = await service.get_questions_by_section(section_id, difficulty)
-    return questions
+    next_question = await service.get_next_question(user_id, section_id, include_links=links)
+    if not next_question:
+        raise HTTPException(status_code=404, detail="No unanswered questions left in this section")
+    return FastJSONResponse(
+        next_question,
+        exclude=None if links else {"question": {"links"}},
+    )
 
 
-@router.post("/evaluate", response_model=AnswerFeedback)
+@router.post("/evaluate", response_model=AnswerFeedback, dependencies=[Depends(generation_slot)])
 async def evaluate_answer(
     data: AnswerSubmit,
     service: QuestionService = Depends(),
@@ -50,6 +103,6 @@ async def evaluate_answer(
     Evaluate a student's answer to a question.
     """
     try:
-        return await service.evaluate_answer(data.question_id, data.answer)
+        return await service.evaluate_answer(data.question_id, data.answer, user_id=data.user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+
+from app.api.pagination import page_size
+from app.api.responses import FastJSONResponse
+from app.db.session import get_read_db
+from app.schemas.search import SearchHit
+from app.services.search import SearchService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1, description="Search terms"),
+    kind: Optional[List[str]] = Query(
+        None, description="Only these kinds: tree, section, subsection, lesson"
+    ),
+    limit: int = Depends(page_size),
+    db: Session = Depends(get_read_db),
+) -> Any:
+    """
+    Search topics, sections, subsections and lesson content, best match first.
+    """
+    hits = await SearchService(db=db).search(q, kinds=kind, limit=limit)
+    return FastJSONResponse(hits)
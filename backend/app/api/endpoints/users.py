@@ -1,7 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, List, Union
 
-from app.schemas.user import UserCreate, UserResponse, UserProgressUpdate, UserProgressResponse
+from app.api.deps import read_service
+from app.api.pagination import page_size
+from app.api.responses import FastJSONResponse
+from app.schemas.question import DueReviewResponse
+from app.schemas.user import (
+    UserCreate,
+    UserProgressAck,
+    UserProgressResponse,
+    UserProgressUpdate,
+    UserResponse,
+)
+from app.services.question import QuestionService
 from app.services.user import UserService
 
 router = APIRouter()
@@ -35,14 +46,16 @@ async def get_user(
     return user
 
 
-@router.post("/{user_id}/progress", response_model=UserProgressResponse)
+@router.post("/{user_id}/progress", response_model=Union[UserProgressResponse, UserProgressAck])
 async def update_user_progress(
     user_id: int,
     data: UserProgressUpdate,
     service: UserService = Depends(),
 ) -> Any:
     """
-    Update a user's progress.
+    Update a user's progress. With PROGRESS_WRITE_BEHIND the update is
+    acknowledged and written shortly after; otherwise the user's progress
+    is returned.
     """
     try:
         return await service.update_progress(user_id, data)
@@ -61,4 +74,21 @@ async def get_user_progress(
     progress = await service.get_progress(user_id)
     if not progress:
         raise HTTPException(status_code=404, detail="User progress not found")
-    return progress
\ No newline at end of file
+    return progress
+
+
+@router.get("/{user_id}/reviews/due", response_model=List[DueReviewResponse])
+async def get_due_reviews(
+    user_id: int,
+    limit: int = Depends(page_size),
+    links: bool = Query(True, description="Include HATEOAS links"),
+    service: QuestionService = Depends(read_service(QuestionService)),
+) -> Any:
+    """
+    Get the questions a user should review now, most overdue first.
+    """
+    reviews = await service.get_due_reviews(user_id, limit, include_links=links)
+    return FastJSONResponse(
+        reviews,
+        exclude=None if links else {"question": {"links"}},
+    )
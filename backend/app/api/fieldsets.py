@@ -0,0 +1,69 @@
+from typing import Any, Dict, Optional, Tuple, Type, Union, get_args, get_origin
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """Return the model inside a field annotation and whether it is a list of them."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else annotation
+    if get_origin(annotation) in (list, tuple):
+        item = get_args(annotation)[0]
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item, True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def _add_path(model: Type[BaseModel], include: Dict[str, Any], parts: list, path: str) -> None:
+    name, rest = parts[0], parts[1:]
+    field = model.model_fields.get(name)
+    if field is None:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+    if not rest:
+        include[name] = True
+        return
+
+    nested, is_list = _nested_model(field.annotation)
+    if nested is None:
+        raise HTTPException(status_code=400, detail=f"Field has no subfields: {path}")
+    if include.get(name) is True:
+        return
+    if name not in include:
+        include[name] = {"__all__": {}} if is_list else {}
+    _add_path(nested, include[name]["__all__"] if is_list else include[name], rest, path)
+
+
+def sparse_fieldset(model: Type[BaseModel], fields: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Turn a `?fields=` value into a pydantic `include` for `model`.
+
+    Fields are comma-separated; nested fields use dotted paths, e.g.
+    `id,topic,sections.title,sections.subsections.id`. Naming a nested
+    model without a subfield includes it whole.
+    """
+    if not fields:
+        return None
+    include: Dict[str, Any] = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if path:
+            _add_path(model, include, path.split("."), path)
+    return include
+
+
+def exclude_links(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Build a pydantic `exclude` that drops every `links` field of `model`, at any depth."""
+    exclude: Dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        if name == "links":
+            exclude[name] = True
+            continue
+        nested, is_list = _nested_model(field.annotation)
+        if nested is not None:
+            nested_exclude = exclude_links(nested)
+            if nested_exclude:
+                exclude[name] = {"__all__": nested_exclude} if is_list else nested_exclude
+    return exclude
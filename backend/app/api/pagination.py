@@ -0,0 +1,24 @@
+from typing import Dict, Optional
+
+from fastapi import Query, Request
+
+from app.core.config import settings
+
+
+def page_size(
+    limit: int = Query(
+        settings.PAGE_SIZE_DEFAULT,
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        description="Number of items per page",
+    ),
+) -> int:
+    return limit
+
+
+def next_page_headers(request: Request, next_cursor: Optional[str]) -> Dict[str, str]:
+    """RFC 8288 `Link` header to the next page, plus the bare cursor."""
+    if not next_cursor:
+        return {}
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    return {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
@@ -0,0 +1,54 @@
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "speedups" extra
+    orjson = None
+
+
+def _to_json(
+    model: BaseModel,
+    include: Optional[Dict[str, Any]] = None,
+    exclude: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    # Same as model_dump_json(), without the round trip through str.
+    return model.__pydantic_serializer__.to_json(model, include=include, exclude=exclude)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for already-validated data.
+
+    Returning it from a handler skips FastAPI's `response_model` pass, so a
+    service's response model is serialized once, straight to bytes by
+    pydantic-core, instead of being validated again and re-encoded through
+    `jsonable_encoder` and stdlib `json`. Other content goes through orjson
+    when it is installed.
+
+    `include` and `exclude` are pydantic field filters; for a list of models
+    they apply to each item.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        include: Optional[Dict[str, Any]] = None,
+        exclude: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ):
+        self.include = include
+        self.exclude = exclude
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return _to_json(content, self.include, self.exclude)
+        if isinstance(content, list) and all(isinstance(item, BaseModel) for item in content):
+            items = (_to_json(item, self.include, self.exclude) for item in content)
+            return b"[" + b",".join(items) + b"]"
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
@@ -0,0 +1,138 @@
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional speedup, see the "speedups" extra
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _accepted_encodings(accept_encoding: str) -> List[str]:
+    encodings = []
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        encodings.append(name.strip().lower())
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, depending on Accept-Encoding.
+
+    Bodies sent in one piece are compressed only when they reach
+    `minimum_size` bytes, preferring brotli when it is installed. Streamed
+    bodies are gzipped chunk by chunk and flushed after each chunk, so
+    clients still receive them incrementally.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        use_brotli = brotli is not None and "br" in accepted
+        use_gzip = "gzip" in accepted
+        if not (use_brotli or use_gzip):
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send, use_brotli, use_gzip)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, options: CompressionMiddleware, send: Send, use_brotli: bool, use_gzip: bool):
+        self.options = options
+        self.downstream = send
+        self.use_brotli = use_brotli
+        self.use_gzip = use_gzip
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional["zlib._Compress"] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or not content_type.startswith(
+                COMPRESSIBLE_TYPES
+            )
+            self.start_message = message
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None and not more_body:
+            # The whole body in one message.
+            start, self.start_message = self.start_message, None
+            if len(body) < self.options.minimum_size:
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+            encoding, body = self._compress(body)
+            self._set_encoding(start, encoding, len(body))
+            await self.downstream(start)
+            await self.downstream({"type": "http.response.body", "body": body})
+            return
+
+        if self.start_message is not None:
+            # A streamed body: only gzip can be flushed chunk by chunk here.
+            start, self.start_message = self.start_message, None
+            if not self.use_gzip:
+                self.passthrough = True
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+            self.stream = zlib.compressobj(self.options.gzip_level, zlib.DEFLATED, 31)
+            self._set_encoding(start, "gzip", None)
+            await self.downstream(start)
+
+        chunk = self.stream.compress(body)
+        chunk += self.stream.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compress(self, body: bytes) -> Tuple[str, bytes]:
+        if self.use_brotli:
+            return "br", brotli.compress(body, quality=self.options.brotli_quality)
+        return "gzip", _gzip(body, self.options.gzip_level)
+
+    @staticmethod
+    def _set_encoding(message: Message, encoding: str, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=message["headers"])
+        headers["Content-Encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
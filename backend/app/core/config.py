@@ -13,22 +13,28 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "omnilearn")
-    SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
+    # Any SQLAlchemy URL; a sqlite:/// file works for local test runs.
+    SQLALCHEMY_DATABASE_URI: Optional[str] = None
 
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
         if isinstance(v, str):
             return v
-        return PostgresDsn.build(
+        return str(PostgresDsn.build(
             scheme="postgresql",
             username=values.data.get("POSTGRES_USER"),
             password=values.data.get("POSTGRES_PASSWORD"),
             host=values.data.get("POSTGRES_SERVER"),
             path=f"{values.data.get('POSTGRES_DB') or ''}",
-        )
+        ))
+
+    # Read replica for GET endpoints; reads use the primary when unset.
+    SQLALCHEMY_READ_REPLICA_URI: Optional[str] = os.getenv("SQLALCHEMY_READ_REPLICA_URI")
+    # Reads from a client that committed a write within this window go to the primary.
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5.0"))
 
     # AI Provider Settings
-    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "openrouter")  # openai, openrouter, gemini
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "openrouter")  # openai, openrouter, gemini, fake
     AI_MODEL: str = os.getenv("AI_MODEL", "qwen/qwen-2.5-72b-instruct")
     
     # API Keys for different providers
@@ -40,8 +46,86 @@ class Settings(BaseSettings):
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
     
+    # Offline "fake" provider for load tests: deterministic answers after
+    # FAKE_AI_LATENCY_MS, streamed at FAKE_AI_TOKENS_PER_SECOND (0 = at once)
+    FAKE_AI_SEED: int = int(os.getenv("FAKE_AI_SEED", "0"))
+    FAKE_AI_LATENCY_MS: float = float(os.getenv("FAKE_AI_LATENCY_MS", "0"))
+    FAKE_AI_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_AI_TOKENS_PER_SECOND", "0"))
+    FAKE_AI_CHUNK_TOKENS: int = int(os.getenv("FAKE_AI_CHUNK_TOKENS", "16"))
+    FAKE_AI_ERROR_RATE: float = float(os.getenv("FAKE_AI_ERROR_RATE", "0"))
+    
     ENABLE_MULTIMEDIA: bool = os.getenv("ENABLE_MULTIMEDIA", "false").lower() == "true"
     
+    # Progress write-behind buffering
+    PROGRESS_WRITE_BEHIND: bool = os.getenv("PROGRESS_WRITE_BEHIND", "true").lower() == "true"
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "2.0"))
+    PROGRESS_FLUSH_MAX_PENDING: int = int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", "500"))
+    
+    # HTTP caching of tree and lesson reads
+    HTTP_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "60"))
+    HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS: int = int(
+        os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS", "600")
+    )
+    
+    # Response compression (brotli is used when installed and accepted)
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    # Lesson, chunk, section and question texts of at least this many bytes are
+    # stored compressed (zstd when installed, zlib otherwise)
+    TEXT_COMPRESSION_MIN_SIZE: int = int(os.getenv("TEXT_COMPRESSION_MIN_SIZE", "512"))
+    
+    # Serve practice questions from the stored bank, generating only when it runs low
+    QUESTION_BANK_FIRST: bool = os.getenv("QUESTION_BANK_FIRST", "true").lower() == "true"
+    QUESTION_BANK_TARGET_DEPTH: int = int(os.getenv("QUESTION_BANK_TARGET_DEPTH", "30"))
+    QUESTION_REPEAT_AFTER_DAYS: int = int(os.getenv("QUESTION_REPEAT_AFTER_DAYS", "7"))
+    # Estimated text similarity (0-1) above which a new question is dropped as a duplicate
+    QUESTION_DUPLICATE_THRESHOLD: float = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.7"))
+    
+    # Share of correct answers GET /questions/next aims for when choosing a difficulty
+    MASTERY_TARGET_SUCCESS: float = float(os.getenv("MASTERY_TARGET_SUCCESS", "0.7"))
+    
+    # Reuse the lesson of a near-identical subsection instead of generating a new one
+    LESSON_REUSE: bool = os.getenv("LESSON_REUSE", "true").lower() == "true"
+    LESSON_REUSE_THRESHOLD: float = float(os.getenv("LESSON_REUSE_THRESHOLD", "0.9"))
+    SIMILARITY_INDEX_DIM: int = int(os.getenv("SIMILARITY_INDEX_DIM", "1024"))
+    
+    # Admission control of the endpoints that call the AI provider: requests
+    # running at once and waiting per worker, and in flight per client
+    GENERATION_MAX_CONCURRENT: int = int(os.getenv("GENERATION_MAX_CONCURRENT", "4"))
+    GENERATION_QUEUE_SIZE: int = int(os.getenv("GENERATION_QUEUE_SIZE", "32"))
+    GENERATION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("GENERATION_QUEUE_TIMEOUT_SECONDS", "30"))
+    GENERATION_MAX_PER_CLIENT: int = int(os.getenv("GENERATION_MAX_PER_CLIENT", "2"))
+    # Share the per-client limit and a cap on all admitted requests across workers
+    ADMISSION_REDIS_URL: Optional[str] = os.getenv("ADMISSION_REDIS_URL")
+    GENERATION_MAX_TOTAL: int = int(os.getenv("GENERATION_MAX_TOTAL", "64"))
+    # Header in which the proxy in front of the app passes the client address
+    # (e.g. X-Forwarded-For); the peer address is used when unset.
+    TRUSTED_PROXY_HEADER: Optional[str] = os.getenv("TRUSTED_PROXY_HEADER")
+    
+    # Serve GET /metrics in the Prometheus text format, only to scrapers sending
+    # "Authorization: Bearer METRICS_TOKEN" when that is set
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+    
+    # Profile requests sending X-Profile-Token: PROFILING_TOKEN, and this share
+    # of all requests; profiles go to PROFILING_DIR as collapsed stacks or pstats
+    PROFILING_TOKEN: Optional[str] = os.getenv("PROFILING_TOKEN")
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_OUTPUT: str = os.getenv("PROFILING_OUTPUT", "collapsed")  # collapsed, pstats
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "profiles")
+    
+    # Span tracing of requests, services, AI calls and SQL: "jsonl" appends
+    # spans to TRACING_JSONL_PATH, "otlp" posts them to a collector; off when empty
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "")
+    TRACING_JSONL_PATH: str = os.getenv("TRACING_JSONL_PATH", "traces.jsonl")
+    TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    # Application logs as "text" or "json" lines, tagged with request and span IDs
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    
+    # Page sizes of the listing endpoints
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", "20"))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", "100"))
+    
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
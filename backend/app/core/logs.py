@@ -0,0 +1,76 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.request_id import get_request_id
+from app.core.tracing import current_span
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_CONTEXT_ATTRIBUTES = {"request_id", "trace_id", "span_id"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s %(span_id)s] %(message)s"
+
+# Client libraries that log every request at INFO; kept at WARNING unless
+# their level was set elsewhere.
+QUIET_LOGGERS = ("httpx", "httpcore", "openai", "urllib3", "google")
+
+_handler: Optional[logging.Handler] = None
+
+
+class ContextFilter(logging.Filter):
+    """Add the request ID and current span to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = current_span()
+        record.request_id = get_request_id() or "-"
+        record.trace_id = span.trace_id if span else "-"
+        record.span_id = span.span_id if span else "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the context and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in _CONTEXT_ATTRIBUTES:
+            value = getattr(record, key, "-")
+            if value != "-":
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in _CONTEXT_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(log_format: str, level: str) -> None:
+    """Send the app's logs to stderr as text or JSON lines, tagged with request and span.
+
+    Calling it again replaces the handler it added rather than adding another.
+    """
+    global _handler
+    handler = logging.StreamHandler()
+    handler.addFilter(ContextFilter())
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    _handler = handler
+    for name in QUIET_LOGGERS:
+        logger = logging.getLogger(name)
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.WARNING)
@@ -0,0 +1,336 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: a count per bucket (not cumulative), the sum and the count.
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(
+                        f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+                    )
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """A gauge whose samples are read from `collect` at render time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+_metrics: list = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = _register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to complete HTTP requests.",
+        ("method", "route", "status"),
+    )
+)
+db_queries_per_request = _register(
+    Histogram(
+        "db_queries_per_request",
+        "SQL statements executed per HTTP request.",
+        ("route",),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+db_time_per_request = _register(
+    Histogram(
+        "db_query_seconds_per_request",
+        "Time spent executing SQL statements per HTTP request.",
+        ("route",),
+        buckets=DB_LATENCY_BUCKETS + (2.5, 5),
+    )
+)
+db_query_duration = _register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Time to execute one SQL statement.",
+        ("statement",),
+        buckets=DB_LATENCY_BUCKETS,
+    )
+)
+ai_request_duration = _register(
+    Histogram(
+        "ai_request_duration_seconds",
+        "Time to complete AIService calls.",
+        ("method",),
+    )
+)
+ai_tokens = _register(
+    Counter(
+        "ai_tokens_total",
+        "Tokens used by AIService calls, as reported by the provider.",
+        ("method", "kind"),
+    )
+)
+ai_errors = _register(Counter("ai_errors_total", "AIService calls that failed.", ("method",)))
+cache_requests = _register(
+    Counter(
+        "cache_requests_total",
+        "Lookups that could avoid work: question bank picks, lesson reuse and ETag revalidations.",
+        ("cache", "result"),
+    )
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+# Database statements
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context._metrics_started
+    db_query_duration.observe(seconds, statement.lstrip().split(None, 1)[0].upper())
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+
+def watch_pools(engines: Dict[str, Engine]) -> None:
+    """Report the connection pools of `engines`, keyed by a name such as "primary"."""
+
+    def collect(attribute: str) -> Callable[[], Dict[LabelValues, float]]:
+        def samples() -> Dict[LabelValues, float]:
+            values = {}
+            for name, engine in engines.items():
+                method = getattr(engine.pool, attribute, None)
+                if method is not None:
+                    values[(name,)] = method()
+            return values
+
+        return samples
+
+    for attribute, documentation in (
+        ("size", "Configured size of the connection pool."),
+        ("checkedout", "Connections currently checked out of the pool."),
+        ("checkedin", "Idle connections in the pool."),
+        ("overflow", "Connections opened beyond the pool size."),
+    ):
+        _register(Gauge(f"db_pool_{attribute}", documentation, ("engine",), collect(attribute)))
+
+
+# AI provider calls
+
+
+@dataclass
+class TokenUsage:
+    prompt: int = 0
+    completion: int = 0
+
+
+_ai_usage: ContextVar[Optional[TokenUsage]] = ContextVar("ai_usage", default=None)
+
+
+def record_tokens(prompt: Optional[int], completion: Optional[int]) -> None:
+    """Add the token usage a provider reported to the AIService call in progress."""
+    usage = _ai_usage.get()
+    if usage is not None:
+        usage.prompt += prompt or 0
+        usage.completion += completion or 0
+
+
+@contextmanager
+def ai_call(method: str) -> Iterator[None]:
+    """Time an AIService call and count its tokens and failures under `method`."""
+    usage = TokenUsage()
+    reset = _ai_usage.set(usage)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ai_errors.inc(method)
+        raise
+    finally:
+        _ai_usage.reset(reset)
+        ai_request_duration.observe(time.perf_counter() - started, method)
+        if usage.prompt:
+            ai_tokens.inc(method, "prompt", amount=usage.prompt)
+        if usage.completion:
+            ai_tokens.inc(method, "completion", amount=usage.completion)
+
+
+# HTTP requests
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, such as /api/v1/lessons/{lesson_id}.
+
+    Routes of included routers may carry only their own part of the path, so
+    the literal prefix is taken from the request path. Unmatched paths share
+    one label so that scanners cannot grow the number of series.
+    """
+    route = scope.get("route")
+    pattern = getattr(route, "path_regex", None)
+    if pattern is None:
+        return "unmatched"
+    path = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and pattern.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+
+class MetricsMiddleware:
+    """Record the latency and database work of each HTTP request, by route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        reset = _request_queries.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_queries.reset(reset)
+            path = route_template(scope)
+            http_request_duration.observe(
+                time.perf_counter() - started, scope["method"], path, str(status)
+            )
+            db_queries_per_request.observe(stats.count, path)
+            db_time_per_request.observe(stats.seconds, path)
@@ -0,0 +1,137 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import route_template
+from app.core.request_id import get_request_id
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "x-profile-token"
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+class StackSampler:
+    """Wall-clock sampler of one thread's Python stack, in collapsed-stack form.
+
+    Each sample is the thread's current stack joined root-first with ";", so
+    the output feeds straight into flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry the profiling token or fall in the sample.
+
+    `output` is "collapsed" (wall-clock stack samples of the event loop
+    thread) or "pstats" (cProfile). Profiles are written to `directory`,
+    named after the time, method, route and request ID. Only one request
+    is profiled at a time per process, and since the event loop is shared,
+    a profile also contains whatever else the worker ran meanwhile.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        output: str = "collapsed",
+    ):
+        if output not in ("collapsed", "pstats"):
+            raise ValueError(f"Unsupported profile output: {output}")
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.output = output
+        self._busy = False
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.token:
+            supplied = Headers(scope=scope).get(TOKEN_HEADER)
+            if supplied and hmac.compare_digest(supplied, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        started = time.time()
+        if self.output == "pstats":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident())
+            profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if self.output == "pstats":
+                profiler.disable()
+            else:
+                profiler.stop()
+            self._busy = False
+            path = self._path(scope, started)
+            try:
+                await asyncio.to_thread(self._write, profiler, path)
+                logger.info("Wrote profile of %s %s to %s", scope["method"], scope["path"], path)
+            except OSError:
+                logger.exception("Failed to write profile to %s", path)
+
+    def _path(self, scope: Scope, started: float) -> str:
+        route = re.sub(r"[^A-Za-z0-9_-]+", "_", route_template(scope)).strip("_") or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started))
+        extension = "pstats" if self.output == "pstats" else "collapsed"
+        name = f"{stamp}-{scope['method']}-{route}-{get_request_id() or 'none'}.{extension}"
+        return os.path.join(self.directory, name)
+
+    def _write(self, profiler, path: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(path)
+        else:
+            with open(path, "w") as f:
+                f.write(profiler.collapsed())
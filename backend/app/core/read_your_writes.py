@@ -0,0 +1,64 @@
+import math
+import time
+from contextvars import ContextVar
+from typing import List, Mapping, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Holds the time of the client's last write; sent back with every request.
+COOKIE = "omnilearn_last_write"
+
+_writes: ContextVar[Optional[List[float]]] = ContextVar("writes", default=None)
+
+
+def record_write() -> None:
+    """Note that the request being handled committed a write."""
+    writes = _writes.get()
+    if writes is not None:
+        writes.append(time.time())
+
+
+def wrote_recently(cookies: Mapping[str, str], window: float) -> bool:
+    """Whether the client's cookie says it wrote within the last `window` seconds."""
+    try:
+        at = float(cookies.get(COOKIE, ""))
+    except ValueError:
+        return False
+    return time.time() - at < window
+
+
+class ReadYourWritesMiddleware:
+    """Tell a client that committed a write when it did, in a cookie.
+
+    The client sends the cookie back, so whichever worker serves its next
+    reads can send them to the primary until the replica has had `window`
+    seconds to catch up. Only the client that wrote is affected, however
+    many share its address.
+    """
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes: List[float] = []
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{COOKIE}={writes[-1]:.3f}; Max-Age={math.ceil(self.window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        reset = _writes.set(writes)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _writes.reset(reset)
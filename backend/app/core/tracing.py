@@ -0,0 +1,372 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import route_template
+from app.core.request_id import get_request_id
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_BATCH = 512
+STATEMENT_CHARS = 500
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """A timed operation within a trace; spans of one request share a trace ID."""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "request_id",
+        "attributes",
+        "error",
+        "start_ns",
+        "end_ns",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.request_id = get_request_id()
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "request_id": self.request_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class BatchExporter(ABC):
+    """Collects finished spans and writes them in batches from a background thread."""
+
+    def __init__(self):
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            full = len(self._spans) >= MAX_BATCH
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        try:
+            self._write(spans)
+        except Exception:
+            logger.warning("Dropped %d spans that could not be exported", len(spans), exc_info=True)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+
+    @abstractmethod
+    def _write(self, spans: List[Span]) -> None:
+        """Send one batch of finished spans."""
+        pass
+
+
+class JsonLinesExporter(BatchExporter):
+    """Appends one JSON object per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        super().__init__()
+
+    def _write(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OtlpExporter(BatchExporter):
+    """Posts spans to an OpenTelemetry collector with OTLP/HTTP in its JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=5.0)
+        super().__init__()
+
+    def _write(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.core.tracing"},
+                            "spans": [self._span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        self._client.post(self.endpoint, json=body).raise_for_status()
+
+    @staticmethod
+    def _span(span: Span) -> Dict[str, Any]:
+        attributes = dict(span.attributes)
+        if span.request_id:
+            attributes["request.id"] = span.request_id
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(attributes),
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+
+_exporter: Optional[BatchExporter] = None
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure(exporter: Optional[BatchExporter]) -> None:
+    """Export spans to `exporter`; with None, tracing is off and spans cost nothing."""
+    global _exporter
+    _exporter = exporter
+
+
+def shutdown() -> None:
+    """Write out the spans still buffered."""
+    if _exporter is not None:
+        _exporter.shutdown()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a child of the current span without making it current, for leaf operations."""
+    if _exporter is None:
+        return None
+    parent = _current.get()
+    if parent is None:
+        return None
+    return Span(name, parent, attributes)
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    if span is None or span.end_ns is not None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    if _exporter is not None:
+        _exporter.export(span)
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Trace the enclosed block as a child of the current span.
+
+    Outside a traced request nothing is recorded unless `root` is set.
+    """
+    parent = _current.get()
+    if _exporter is None or (parent is None and not root):
+        yield None
+        return
+    current = Span(name, parent, attributes)
+    reset = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    finally:
+        _current.reset(reset)
+        end_span(current)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorate a function or coroutine function to run in a span named after it."""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Database statements and commits
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _exporter is not None:
+        context._trace_span = start_span(
+            "db.query",
+            **{
+                "db.operation": statement.lstrip().split(None, 1)[0].upper(),
+                "db.statement": statement[:STATEMENT_CHARS],
+            },
+        )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    end_span(getattr(context, "_trace_span", None))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    if context is not None:
+        end_span(getattr(context, "_trace_span", None), exception_context.original_exception)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    session.info["trace_commit"] = start_span("db.commit")
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    end_span(session.info.pop("trace_commit", None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    commit = session.info.pop("trace_commit", None)
+    if commit is not None:
+        end_span(commit, RuntimeError("Commit rolled back"))
+
+
+# HTTP requests
+
+
+class TracingMiddleware:
+    """Open a root span per HTTP request, continuing a W3C `traceparent` if sent."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with span(scope["method"], root=True, **{"http.method": scope["method"]}) as root:
+            traceparent = _TRACEPARENT.match(_header(scope, b"traceparent") or "")
+            if traceparent:
+                root.trace_id, root.parent_id = traceparent.groups()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = route_template(scope)
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+                root.set_attribute("http.status_code", status)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def exporter_from_settings(settings) -> Optional[BatchExporter]:
+    if settings.TRACING_EXPORTER == "jsonl":
+        return JsonLinesExporter(settings.TRACING_JSONL_PATH)
+    if settings.TRACING_EXPORTER == "otlp":
+        return OtlpExporter(settings.TRACING_OTLP_ENDPOINT, settings.PROJECT_NAME)
+    if settings.TRACING_EXPORTER:
+        raise ValueError(f"Unsupported tracing exporter: {settings.TRACING_EXPORTER}")
+    return None
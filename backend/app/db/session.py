@@ -1,16 +1,50 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.read_your_writes import record_write, wrote_recently
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        # Sessions are used from FastAPI's threadpool.
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(url)
+
+
+engine = _create_engine(settings.SQLALCHEMY_DATABASE_URI)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.SQLALCHEMY_READ_REPLICA_URI:
+    read_engine = _create_engine(settings.SQLALCHEMY_READ_REPLICA_URI)
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+# Every commit on the primary marks the request that made it, so the client
+# gets the read-your-writes cookie (see app/core/read_your_writes.py).
+event.listen(SessionLocal, "after_commit", lambda session: record_write())
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only handlers, bound to the replica unless the
+    client has just written and the replica may not have caught up yet."""
+    if read_engine is engine or wrote_recently(request.cookies, settings.READ_YOUR_WRITES_SECONDS):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
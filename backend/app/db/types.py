@@ -0,0 +1,70 @@
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The first byte of a stored value says how the rest is encoded, so values
+# written with different codecs or thresholds can be read side by side.
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compress_text(value: str, min_size: int) -> bytes:
+    """Encode `value` as UTF-8, compressed when it is at least `min_size` bytes and shrinks."""
+    data = value.encode("utf-8")
+    if len(data) < min_size:
+        return RAW + data
+    if zstandard is not None:
+        tag, compressed = ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        tag, compressed = ZLIB, zlib.compress(data, ZLIB_LEVEL)
+    if len(compressed) + 1 >= len(data):
+        return RAW + data
+    return tag + compressed
+
+
+def decompress_text(value: bytes) -> str:
+    """Decode a value written by `compress_text`."""
+    tag, data = value[:1], value[1:]
+    if tag == RAW:
+        return bytes(data).decode("utf-8")
+    if tag == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    if tag == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Stored text is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown text encoding tag {tag!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as bytes, compressed once it reaches TEXT_COMPRESSION_MIN_SIZE bytes.
+
+    Values are decompressed when a row that selects the column is fetched, so
+    queries that leave the column out never pay for it. The column cannot be
+    searched or compared in SQL.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, settings.TEXT_COMPRESSION_MIN_SIZE)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert(db: Session, model):
+    """Return an INSERT for `model` that supports `on_conflict_do_update`.
+
+    PostgreSQL and SQLite both implement `INSERT ... ON CONFLICT`, but
+    SQLAlchemy exposes it through dialect-specific constructs.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
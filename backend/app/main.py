@@ -1,10 +1,25 @@
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from app.api.api import api_router
+from app.core.compression import CompressionMiddleware
+from app.core import metrics, tracing
 from app.core.config import settings
-from app.db.init_db import init_db
+from app.core.logs import configure_logging
+from app.core.profiling import ProfilingMiddleware
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.core.request_id import RequestIdMiddleware
+from app.db.session import engine, read_engine
+from app.services.admission import admission_controller
+from app.services.progress_buffer import progress_buffer
+from app.services.question_bank import question_bank_refills
+
+configure_logging(settings.LOG_FORMAT, settings.LOG_LEVEL)
+tracing.configure(tracing.exporter_from_settings(settings))
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,13 +36,43 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+if read_engine is not engine:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.READ_YOUR_WRITES_SECONDS)
+if settings.PROFILING_TOKEN or settings.PROFILING_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILING_DIR,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        output=settings.PROFILING_OUTPUT,
+    )
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    pools = {"primary": engine}
+    if read_engine is not engine:
+        pools["replica"] = read_engine
+    metrics.watch_pools(pools)
+if settings.TRACING_EXPORTER:
+    app.add_middleware(tracing.TracingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flush buffered progress so a graceful shutdown loses no updates.
+    await progress_buffer.stop()
+    await question_bank_refills.stop()
+    await admission_controller.close()
+    tracing.shutdown()
 
 
 @app.get("/")
@@ -35,5 +80,19 @@ async def root():
     return {"message": "Welcome to OmniLearn API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Metrics of this worker process in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}"):
+            return PlainTextResponse(
+                "Unauthorized\n", status_code=401, headers={"WWW-Authenticate": "Bearer"}
+            )
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,14 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
+from app.db.types import CompressedText
 from app.models.base import Base, TimestampMixin
 
 
 class KnowledgeTree(Base, TimestampMixin):
     __tablename__ = "knowledge_trees"
+    __table_args__ = (
+        # Keyset pagination of the tree list, in either sort order.
+        Index("ix_knowledge_trees_topic_id", "topic", "id"),
+        Index("ix_knowledge_trees_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    topic = Column(String, index=True)
+    topic = Column(String)
 
     sections = relationship("Section", back_populates="tree", cascade="all, delete-orphan")
 
@@ -17,9 +23,9 @@ class Section(Base, TimestampMixin):
     __tablename__ = "sections"
 
     id = Column(Integer, primary_key=True, index=True)
-    tree_id = Column(Integer, ForeignKey("knowledge_trees.id"))
+    tree_id = Column(Integer, ForeignKey("knowledge_trees.id"), index=True)
     title = Column(String, index=True)
-    description = Column(Text)
+    description = Column(CompressedText)
 
     tree = relationship("KnowledgeTree", back_populates="sections")
     subsections = relationship("Subsection", back_populates="section", cascade="all, delete-orphan")
@@ -30,7 +36,7 @@ class Subsection(Base, TimestampMixin):
     __tablename__ = "subsections"
 
     id = Column(Integer, primary_key=True, index=True)
-    section_id = Column(Integer, ForeignKey("sections.id"))
+    section_id = Column(Integer, ForeignKey("sections.id"), index=True)
     title = Column(String, index=True)
     description = Column(Text)
 
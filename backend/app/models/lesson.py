@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, ForeignKey, ARRAY, JSON
 from sqlalchemy.orm import relationship
 
+from app.db.types import CompressedText
 from app.models.base import Base, TimestampMixin
 
 
@@ -9,7 +10,22 @@ class Lesson(Base, TimestampMixin):
 
     id = Column(Integer, primary_key=True, index=True)
     subsection_id = Column(Integer, ForeignKey("subsections.id"), unique=True)
-    content = Column(Text)
-    multimedia_urls = Column(ARRAY(String), nullable=True)
+    content = Column(CompressedText)
+    multimedia_urls = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)
 
-    subsection = relationship("Subsection", back_populates="lesson")
\ No newline at end of file
+    subsection = relationship("Subsection", back_populates="lesson")
+    chunks = relationship(
+        "LessonChunk", cascade="all, delete-orphan", order_by="LessonChunk.position"
+    )
+
+
+class LessonChunk(Base):
+    """One heading-delimited part of a lesson's content, for incremental loading."""
+
+    __tablename__ = "lesson_chunks"
+
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    heading = Column(String, nullable=True)
+    level = Column(Integer, nullable=False)
+    content = Column(CompressedText, nullable=False)
\ No newline at end of file
@@ -1,16 +1,78 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
+from app.db.types import CompressedText
 from app.models.base import Base, TimestampMixin
 
 
 class Question(Base, TimestampMixin):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_section_id_difficulty_id", "section_id", "difficulty", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     section_id = Column(Integer, ForeignKey("sections.id"))
-    text = Column(Text)
+    text = Column(CompressedText)
     difficulty = Column(String)  # "easy", "medium", "hard"
     correct_answer = Column(Text)
+    minhash = Column(LargeBinary, nullable=True)  # MinHash signature of `text`
 
-    section = relationship("Section", back_populates="questions")
\ No newline at end of file
+    section = relationship("Section", back_populates="questions")
+
+
+class QuestionLSHBand(Base):
+    """One LSH band key of a question's signature, for near-duplicate lookups.
+
+    The primary key leads with (section_id, band_hash), so finding the
+    candidates of a new question is one index probe per band.
+    """
+
+    __tablename__ = "question_lsh_bands"
+
+    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"), primary_key=True)
+    band_hash = Column(BigInteger, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+
+
+class QuestionAttempt(Base, TimestampMixin):
+    __tablename__ = "question_attempts"
+    __table_args__ = (
+        # Finds a user's recently answered questions when serving from the bank.
+        Index("ix_question_attempts_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+
+
+class ReviewSchedule(Base):
+    """SM-2 spaced-repetition state of one question for one user."""
+
+    __tablename__ = "review_schedule"
+    __table_args__ = (
+        # The due queue: a user's reviews in due order are one range scan.
+        Index("ix_review_schedule_user_id_due_at", "user_id", "due_at"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    easiness = Column(Float, nullable=False)
+    interval_days = Column(Float, nullable=False)
+    repetitions = Column(Integer, nullable=False)
+    reviewed_at = Column(DateTime(timezone=True), nullable=False)
+    due_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.db.types import CompressedText
+from app.models.base import Base
+
+
+class SearchDocument(Base):
+    """Searchable text of one tree, section, subsection or lesson.
+
+    `document` is the weighted text search vector (title over body) on
+    PostgreSQL; other databases leave it empty and search in process. `body`
+    is kept only to cut snippets from, so it is stored compressed.
+    """
+
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("kind", "ref_id", name="uq_search_documents_kind_ref_id"),
+        Index("ix_search_documents_document", "document", postgresql_using="gin"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # "tree", "section", "subsection", "lesson"
+    ref_id = Column(Integer, nullable=False)
+    tree_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    body = Column(CompressedText, nullable=False, default="")
+    document = Column(TSVECTOR().with_variant(Text, "sqlite"), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, ARRAY, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, false
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base, TimestampMixin
@@ -12,15 +12,27 @@ class User(Base, TimestampMixin):
     name = Column(String)
     hashed_password = Column(String)
 
-    progress = relationship("UserProgress", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    progress = relationship("SubsectionProgress", back_populates="user", cascade="all, delete-orphan")
+    mastery = relationship("SectionMastery", cascade="all, delete-orphan")
 
 
-class UserProgress(Base, TimestampMixin):
-    __tablename__ = "user_progress"
+class SubsectionProgress(Base, TimestampMixin):
+    __tablename__ = "subsection_progress"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True)
-    completed_subsections = Column(ARRAY(Integer), default=[])
-    scores = Column(JSON, default={})  # subsection_id -> score
+    # The composite primary key doubles as the index for per-user range scans.
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    subsection_id = Column(Integer, ForeignKey("subsections.id"), primary_key=True)
+    completed = Column(Boolean, nullable=False, default=False, server_default=false())
+    score = Column(Float, nullable=True)
+
+    user = relationship("User", back_populates="progress")
+
+
+class SectionMastery(Base):
+    __tablename__ = "section_mastery"
 
-    user = relationship("User", back_populates="progress")
\ No newline at end of file
+    # Elo-style skill rating of a user in a section, on the scale of QUESTION_RATINGS.
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    section_id = Column(Integer, ForeignKey("sections.id", ondelete="CASCADE"), primary_key=True)
+    rating = Column(Float, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,11 +1,8 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
-
-class HATEOASLink(BaseModel):
-    href: str
-    rel: str
-    method: str = "GET"
+from app.schemas.links import HATEOASLink
 
 
 class SubsectionBase(BaseModel):
@@ -44,10 +41,16 @@ class KnowledgeTreeBase(BaseModel):
 
 
 class KnowledgeTreeCreate(KnowledgeTreeBase):
-    pass
+    search_first: bool = False  # Answer 409 with the matches if similar material already exists
 
 
 class KnowledgeTreeResponse(KnowledgeTreeBase):
     id: int
     sections: List[SectionResponse]
-    links: List[HATEOASLink] = []
\ No newline at end of file
+    links: List[HATEOASLink] = []
+
+
+class KnowledgeTreeSummary(KnowledgeTreeBase):
+    id: int
+    created_at: Optional[datetime] = None
+    links: List[HATEOASLink] = []
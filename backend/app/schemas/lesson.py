@@ -1,11 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
-
-class HATEOASLink(BaseModel):
-    href: str
-    rel: str
-    method: str = "GET"
+from app.schemas.links import HATEOASLink
 
 
 class LessonBase(BaseModel):
@@ -16,6 +12,7 @@ class LessonBase(BaseModel):
 class LessonCreate(BaseModel):
     subsection_id: int
     subsection_title: str
+    reuse: bool = True  # Copy the lesson of a near-identical subsection if there is one
 
 
 class LessonResponse(LessonBase):
@@ -23,4 +20,29 @@ class LessonResponse(LessonBase):
     subsection_id: int
     section_id: int
     section_title: str
-    links: List[HATEOASLink] = []
\ No newline at end of file
+    links: List[HATEOASLink] = []
+
+
+class SimilarLessonResponse(BaseModel):
+    lesson_id: int
+    subsection_id: int
+    subsection_title: str
+    similarity: float  # Cosine similarity of the subsections' titles and descriptions
+    links: List[HATEOASLink] = []
+
+
+class LessonTocEntry(BaseModel):
+    position: int
+    heading: Optional[str] = None  # None for text before the first heading
+    level: int
+
+
+class LessonChunk(LessonTocEntry):
+    content: str
+
+
+class LessonChunksResponse(BaseModel):
+    lesson_id: int
+    toc: List[LessonTocEntry]  # Every chunk of the lesson, without content
+    chunks: List[LessonChunk]
+    next_from: Optional[int] = None  # `from` of the next page; None on the last one
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class HATEOASLink(BaseModel):
+    href: str
+    rel: str
+    method: str = "GET"
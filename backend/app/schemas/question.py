@@ -1,11 +1,8 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
-
-class HATEOASLink(BaseModel):
-    href: str
-    rel: str
-    method: str
+from app.schemas.links import HATEOASLink
 
 
 class QuestionBase(BaseModel):
@@ -18,6 +15,7 @@ class QuestionCreate(BaseModel):
     section_id: int
     section_title: str
     difficulty: Optional[str] = "medium"  # Default to medium difficulty
+    user_id: Optional[int] = None  # Skips questions this user answered recently
 
 
 class QuestionResponse(QuestionBase):
@@ -26,9 +24,23 @@ class QuestionResponse(QuestionBase):
     links: Optional[List[HATEOASLink]] = None
 
 
+class NextQuestionResponse(BaseModel):
+    question: QuestionResponse
+    mastery: float  # The user's rating in the section
+    expected_success: float  # Predicted chance of answering the question correctly
+
+
+class DueReviewResponse(BaseModel):
+    question: QuestionResponse
+    due_at: datetime
+    interval_days: float  # Interval that led to this due date
+    repetitions: int  # Correct answers in a row
+
+
 class AnswerSubmit(BaseModel):
     question_id: int
     answer: str
+    user_id: Optional[int] = None  # Records the attempt for this user
 
 
 class AnswerFeedback(BaseModel):
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.links import HATEOASLink
+
+
+class SearchHit(BaseModel):
+    kind: str  # "tree", "section", "subsection", "lesson"
+    id: int
+    tree_id: int
+    title: str
+    snippet: str  # HTML-escaped excerpt with the matched words in <b> tags
+    rank: float
+    links: List[HATEOASLink] = []
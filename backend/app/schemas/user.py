@@ -24,4 +24,12 @@ class UserProgressUpdate(BaseModel):
 class UserProgressResponse(BaseModel):
     user_id: int
     completed_subsections: List[int]
-    scores: Dict[str, float]  # subsection_id -> score
\ No newline at end of file
+    scores: Dict[str, float]  # subsection_id -> score
+
+
+# Answer to a buffered progress update; it is written within seconds.
+class UserProgressAck(BaseModel):
+    user_id: int
+    subsection_id: int
+    completed: bool
+    score: Optional[float] = None
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# A shared lease outlives any generation; it only matters when a worker dies
+# without releasing it.
+LEASE_SECONDS = 600
+KEY_PREFIX = "omnilearn:admission"
+
+
+class AdmissionRejected(Exception):
+    """A generation request was turned away; retry after `retry_after` seconds."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class SharedCounters:
+    """Admission counts shared by all workers, as Redis sorted sets of leases.
+
+    Each admitted request adds a lease scored by its start time to the global
+    set and to its client's set; leases older than LEASE_SECONDS are dropped
+    before counting.
+    """
+
+    def __init__(self, url: str):
+        self._redis = redis.from_url(url)
+
+    async def acquire(self, client: str, max_per_client: int, max_total: int) -> Optional[str]:
+        """Take a lease, or return the status code to reject the request with."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        keys = (f"{KEY_PREFIX}:all", f"{KEY_PREFIX}:client:{client}")
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.zremrangebyscore(key, "-inf", now - LEASE_SECONDS)
+                pipe.zadd(key, {token: now})
+                pipe.expire(key, LEASE_SECONDS)
+                pipe.zcard(key)
+            results = await pipe.execute()
+        total, per_client = results[3], results[7]
+        if per_client > max_per_client or total > max_total:
+            await self.release(client, token)
+            return 429 if per_client > max_per_client else 503
+        return token
+
+    async def release(self, client: str, token: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(f"{KEY_PREFIX}:all", token)
+            pipe.zrem(f"{KEY_PREFIX}:client:{client}", token)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class AdmissionController:
+    """Admission control for the endpoints that call the AI provider.
+
+    At most `max_concurrent` requests run at once per worker. Others wait in a
+    queue of at most `queue_size`, and freed slots go round-robin to the
+    clients with waiting requests, so one busy client cannot starve the rest.
+    A client with `max_per_client` requests running or queued gets a 429, a
+    full queue or a wait longer than `queue_timeout` gives a 503, both with a
+    Retry-After estimated from recent request durations.
+
+    With `shared`, the per-client limit and a `max_total` cap on admitted
+    requests also hold across all workers using the same store.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_client: int,
+        queue_size: int,
+        queue_timeout: float,
+        max_total: int,
+        shared: Optional[SharedCounters] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_client = max_per_client
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_total = max_total
+        self.shared = shared
+        self._running = 0
+        self._queued = 0
+        self._admitted: Dict[str, int] = {}
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._average_seconds = 10.0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new request."""
+        rounds = math.ceil((self._queued + 1) / self.max_concurrent)
+        return max(1, math.ceil(self._average_seconds * rounds))
+
+    async def acquire(self, client: str) -> Optional[str]:
+        """Wait for a slot for `client`; return the shared lease token, if any."""
+        if self._admitted.get(client, 0) >= self.max_per_client:
+            raise AdmissionRejected(429, "Too many generation requests in progress", self.retry_after())
+        if self._running >= self.max_concurrent and self._queued >= self.queue_size:
+            raise AdmissionRejected(503, "Generation queue is full", self.retry_after())
+
+        # Count the request before waiting on the shared store, so the
+        # client's other requests arriving meanwhile see it.
+        self._admitted[client] = self._admitted.get(client, 0) + 1
+        try:
+            token = await self._acquire_shared(client)
+        except BaseException:
+            await self._release_admission(client, None)
+            raise
+        if self._running < self.max_concurrent and not self._queued:
+            self._running += 1
+            return token
+
+        if self._queued >= self.queue_size:
+            # The queue filled up while the shared store answered.
+            await self._release_admission(client, token)
+            raise AdmissionRejected(503, "Generation queue is full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(waiter)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the wait ended; pass it on.
+                self._release_slot()
+            else:
+                self._remove_waiter(client, waiter)
+            await self._release_admission(client, token)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise AdmissionRejected(503, "Timed out waiting for a generation slot", self.retry_after())
+        return token
+
+    async def release(self, client: str, token: Optional[str], seconds: float) -> None:
+        """Give back the slot of a finished request that ran for `seconds`."""
+        self._average_seconds = 0.8 * self._average_seconds + 0.2 * seconds
+        self._release_slot()
+        await self._release_admission(client, token)
+
+    @asynccontextmanager
+    async def slot(self, client: str) -> AsyncIterator[None]:
+        """Hold a slot for `client` around a block that calls the AI provider."""
+        token = await self.acquire(client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            await self.release(client, token, time.monotonic() - started)
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+    async def _acquire_shared(self, client: str) -> Optional[str]:
+        if self.shared is None:
+            return None
+        try:
+            result = await self.shared.acquire(client, self.max_per_client, self.max_total)
+        except Exception:
+            # Without the shared store, the per-worker limits still apply.
+            logger.warning("Shared admission counters unavailable", exc_info=True)
+            return None
+        if result == 429:
+            raise AdmissionRejected(429, "Too many generation requests in progress", self.retry_after())
+        if result == 503:
+            raise AdmissionRejected(503, "Generation capacity is exhausted", self.retry_after())
+        return result
+
+    async def _release_admission(self, client: str, token: Optional[str]) -> None:
+        count = self._admitted.get(client, 0) - 1
+        if count > 0:
+            self._admitted[client] = count
+        else:
+            self._admitted.pop(client, None)
+        if token is not None:
+            try:
+                await self.shared.release(client, token)
+            except Exception:
+                logger.warning("Failed to release shared admission lease", exc_info=True)
+
+    def _release_slot(self) -> None:
+        """Hand a freed slot to the next client in turn, or mark it free."""
+        while self._waiters:
+            client, waiters = self._waiters.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters[client] = waiters
+            self._queued -= 1
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    def _remove_waiter(self, client: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(client)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self._queued -= 1
+        if not waiters:
+            del self._waiters[client]
+
+
+def _shared_counters() -> Optional[SharedCounters]:
+    if not settings.ADMISSION_REDIS_URL:
+        return None
+    if redis is None:
+        logger.warning("ADMISSION_REDIS_URL is set but redis is not installed; limits are per worker")
+        return None
+    return SharedCounters(settings.ADMISSION_REDIS_URL)
+
+
+admission_controller = AdmissionController(
+    max_concurrent=settings.GENERATION_MAX_CONCURRENT,
+    max_per_client=settings.GENERATION_MAX_PER_CLIENT,
+    queue_size=settings.GENERATION_QUEUE_SIZE,
+    queue_timeout=settings.GENERATION_QUEUE_TIMEOUT_SECONDS,
+    max_total=settings.GENERATION_MAX_TOTAL,
+    shared=_shared_counters(),
+)
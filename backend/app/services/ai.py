@@ -1,11 +1,16 @@
 import json
-from typing import List, Dict, Any
+import logging
+from typing import AsyncIterator, List, Dict, Any
 from abc import ABC, abstractmethod
 
 from openai import OpenAI
 import google.generativeai as genai
 
 from app.core.config import settings
+from app.core.metrics import ai_call, record_tokens
+from app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 
 class AIProvider(ABC):
@@ -16,6 +21,12 @@ class AIProvider(ABC):
         """Generate a completion from the AI provider."""
         pass
 
+    async def stream_completion(
+        self, messages: List[Dict[str, str]], use_json: bool = False
+    ) -> AsyncIterator[str]:
+        """Yield the completion in pieces; providers without streaming yield it whole."""
+        yield await self.generate_completion(messages, use_json)
+
 
 class OpenAIProvider(AIProvider):
     """OpenAI API provider."""
@@ -34,6 +45,8 @@ class OpenAIProvider(AIProvider):
             kwargs["response_format"] = {"type": "json_object"}
         
         response = self.client.chat.completions.create(**kwargs)
+        if response.usage is not None:
+            record_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
         return response.choices[0].message.content
 
 
@@ -57,6 +70,8 @@ class OpenRouterProvider(AIProvider):
             kwargs["response_format"] = {"type": "json_object"}
         
         response = self.client.chat.completions.create(**kwargs)
+        if response.usage is not None:
+            record_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
         return response.choices[0].message.content
 
 
@@ -80,6 +95,9 @@ class GeminiProvider(AIProvider):
             prompt += "\nPlease respond with valid JSON only."
         
         response = self.model.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_tokens(usage.prompt_token_count, usage.candidates_token_count)
         return response.text
 
 
@@ -120,9 +138,22 @@ class AIService:
                 model=model
             )
         
+        elif provider_name == "fake":
+            # Imported here since the fake provider subclasses AIProvider.
+            from app.services.fake_ai import FakeProvider
+
+            return FakeProvider(
+                seed=settings.FAKE_AI_SEED,
+                latency_ms=settings.FAKE_AI_LATENCY_MS,
+                tokens_per_second=settings.FAKE_AI_TOKENS_PER_SECOND,
+                chunk_tokens=settings.FAKE_AI_CHUNK_TOKENS,
+                error_rate=settings.FAKE_AI_ERROR_RATE,
+            )
+        
         else:
             raise ValueError(f"Unsupported AI provider: {provider_name}")
     
+    @traced()
     async def generate_knowledge_tree(self, topic: str) -> Dict[str, Any]:
         """Generate a knowledge tree structure for a given topic."""
         prompt = f"""
@@ -158,16 +189,18 @@ class AIService:
                 {"role": "user", "content": prompt}
             ]
             
-            content = await self.provider.generate_completion(messages, use_json=True)
+            with ai_call("generate_knowledge_tree"):
+                content = await self.provider.generate_completion(messages, use_json=True)
             if not content:
                 raise ValueError("AI provider returned empty content")
                 
             return json.loads(content)
             
         except Exception as e:
-            print(f"Error generating knowledge tree: {str(e)}")
+            logger.exception("Knowledge tree generation failed", extra={"topic": topic})
             raise ValueError(f"Failed to generate knowledge tree: {str(e)}")
 
+    @traced()
     async def generate_lesson_content(self, subsection_title: str, subsection_description: str) -> str:
         """Generate lesson content for a subsection."""
         prompt = f"""
@@ -192,16 +225,20 @@ class AIService:
                 {"role": "user", "content": prompt}
             ]
             
-            content = await self.provider.generate_completion(messages)
+            with ai_call("generate_lesson_content"):
+                content = await self.provider.generate_completion(messages)
             if not content:
                 raise ValueError("AI provider returned empty content")
                 
             return content
             
         except Exception as e:
-            print(f"Error generating lesson content: {str(e)}")
+            logger.exception(
+                "Lesson generation failed", extra={"subsection_title": subsection_title}
+            )
             raise ValueError(f"Failed to generate lesson content: {str(e)}")
 
+    @traced()
     async def generate_multimedia(self, title: str, content: str) -> List[str]:
         """Generate multimedia content suggestions."""
         # Note: This is a placeholder implementation
@@ -223,7 +260,8 @@ class AIService:
                 {"role": "user", "content": prompt}
             ]
             
-            response = await self.provider.generate_completion(messages)
+            with ai_call("generate_multimedia"):
+                response = await self.provider.generate_completion(messages)
             concepts = response.split("\n\n")
             
             # Return placeholder URLs for now
@@ -231,9 +269,10 @@ class AIService:
             return [f"https://placeholder.example.com/image_{i}.jpg" for i in range(min(2, len(concepts)))]
             
         except Exception as e:
-            print(f"Error generating multimedia: {str(e)}")
+            logger.warning("Multimedia generation failed", extra={"title": title}, exc_info=True)
             return []
 
+    @traced()
     async def generate_questions(
         self, section_title: str, section_description: str, difficulty: str = "medium"
     ) -> List[Dict[str, Any]]:
@@ -266,7 +305,8 @@ class AIService:
                 {"role": "user", "content": prompt}
             ]
             
-            content = await self.provider.generate_completion(messages, use_json=True)
+            with ai_call("generate_questions"):
+                content = await self.provider.generate_completion(messages, use_json=True)
             if not content:
                 raise ValueError("AI provider returned empty content")
                 
@@ -274,9 +314,13 @@ class AIService:
             return result.get("questions", [])
             
         except Exception as e:
-            print(f"Error generating questions: {str(e)}")
+            logger.exception(
+                "Question generation failed",
+                extra={"section_title": section_title, "difficulty": difficulty},
+            )
             raise ValueError(f"Failed to generate questions: {str(e)}")
 
+    @traced()
     async def evaluate_answer(
         self, question: str, correct_answer: str, student_answer: str
     ) -> Dict[str, Any]:
@@ -306,12 +350,13 @@ class AIService:
                 {"role": "user", "content": prompt}
             ]
             
-            content = await self.provider.generate_completion(messages, use_json=True)
+            with ai_call("evaluate_answer"):
+                content = await self.provider.generate_completion(messages, use_json=True)
             if not content:
                 raise ValueError("AI provider returned empty content")
                 
             return json.loads(content)
             
         except Exception as e:
-            print(f"Error evaluating answer: {str(e)}")
+            logger.exception("Answer evaluation failed")
             raise ValueError(f"Failed to evaluate answer: {str(e)}")
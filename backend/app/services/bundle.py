@@ -0,0 +1,81 @@
+from typing import Any, Dict, Iterator, Optional
+
+from fastapi import Depends
+from pydantic_core import to_json
+from sqlalchemy.orm import Session
+
+from app.api.fieldsets import exclude_links
+from app.db.session import get_db
+from app.schemas.knowledge_tree import KnowledgeTreeResponse
+from app.schemas.lesson import LessonResponse
+from app.schemas.question import QuestionResponse
+from app.services.ai import AIService
+from app.services.knowledge_tree import KnowledgeTreeService
+from app.services.lesson import LessonService
+from app.services.question import QuestionService
+
+
+def _line(kind: str, data: Any, exclude: Optional[Dict[str, Any]] = None, **extra: Any) -> bytes:
+    """Encode one NDJSON line; pydantic-core serializes the models it contains.
+
+    `exclude` is a pydantic field filter for `data`.
+    """
+    line = {"type": kind, **extra, "data": data}
+    return to_json(line, exclude={"data": exclude} if exclude else None) + b"\n"
+
+
+class CourseBundleService:
+    """Assembles a whole course (tree, lessons, questions) for a single request."""
+
+    def __init__(
+        self,
+        db: Session = Depends(get_db),
+        ai_service: AIService = Depends(),
+    ):
+        self.db = db
+        self.trees = KnowledgeTreeService(db=db, ai_service=ai_service)
+        self.lessons = LessonService(db=db, ai_service=ai_service)
+        self.questions = QuestionService(db=db, ai_service=ai_service)
+
+    async def get_bundle(self, tree_id: int, include_links: bool = True) -> Optional[Iterator[bytes]]:
+        """Load a course and return it as NDJSON lines, or None if the tree doesn't exist.
+
+        All rows are fetched up front in a fixed number of queries (tree,
+        sections, subsections, lessons, questions); the returned iterator
+        only serializes. Lines come in reading order: the tree outline first,
+        then for each section its questions followed by its lessons, and a
+        final summary line.
+        """
+        tree = await self.trees.get_knowledge_tree(tree_id, include_links=include_links)
+        if not tree:
+            return None
+
+        subsection_ids = [
+            subsection.id for section in tree.sections for subsection in section.subsections
+        ]
+        lessons = await self.lessons.get_lessons_by_subsections(subsection_ids)
+        questions = await self.questions.get_questions_by_sections(
+            [section.id for section in tree.sections], include_links=include_links
+        )
+        return self._lines(tree, lessons, questions, include_links)
+
+    def _lines(
+        self, tree, lessons: Dict[int, Any], questions: Dict[int, list], include_links: bool
+    ) -> Iterator[bytes]:
+        # Without links the field is left out, as in the tree and question GETs.
+        tree_exclude = question_exclude = lesson_exclude = None
+        if not include_links:
+            tree_exclude = exclude_links(KnowledgeTreeResponse)
+            question_exclude = {"__all__": exclude_links(QuestionResponse)}
+            lesson_exclude = exclude_links(LessonResponse)
+        yield _line("tree", tree, tree_exclude)
+        question_count = 0
+        for section in tree.sections:
+            section_questions = questions.get(section.id, [])
+            question_count += len(section_questions)
+            yield _line("questions", section_questions, question_exclude, section_id=section.id)
+            for subsection in section.subsections:
+                lesson = lessons.get(subsection.id)
+                if lesson:
+                    yield _line("lesson", lesson, lesson_exclude, subsection_id=subsection.id)
+        yield _line("end", {"lessons": len(lessons), "questions": question_count})
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from typing import AsyncIterator, Dict, List
+
+from app.core.metrics import record_tokens
+from app.services.ai import AIProvider
+
+CHARS_PER_TOKEN = 4
+
+CONCEPTS = [
+    "fundamentals", "core concepts", "terminology", "history", "tools", "patterns",
+    "best practices", "common mistakes", "performance", "testing", "design",
+    "applications", "case studies", "advanced techniques", "trade-offs", "ecosystem",
+]
+SENTENCES = [
+    "This builds directly on the ideas introduced earlier.",
+    "Working through a small example makes the idea concrete.",
+    "Practitioners rely on this every day, often without noticing.",
+    "The trade-offs become clearer once you compare the alternatives.",
+    "A common mistake is to apply it without checking the assumptions first.",
+    "It helps to state the goal before choosing a technique.",
+    "Small, frequent practice beats long and rare study sessions.",
+    "Each step is simple on its own; the skill lies in combining them.",
+]
+
+
+QUESTION_TEMPLATES = [
+    "Explain how {concept} shape the way you approach {title}.",
+    "What would go wrong in {title} if you ignored {concept}?",
+    "Give an example where {concept} changes the outcome of a {title} task.",
+    "Compare two ways of handling {concept} and say when each fits best.",
+    "Why do beginners in {title} often struggle with {concept}?",
+    "Describe a step-by-step plan to practise {concept}.",
+]
+
+
+class FakeAIError(RuntimeError):
+    pass
+
+
+class FakeProvider(AIProvider):
+    """Offline provider with deterministic, schema-valid answers, for load tests.
+
+    The kind of answer (knowledge tree, lesson, questions, evaluation or
+    multimedia ideas) is recognized from the prompts `AIService` sends. The
+    answer depends only on `seed` and the prompt, so it is the same in every
+    process and however calls interleave. Answers start after `latency_ms`
+    and then stream at `tokens_per_second` (0 for all at once), in chunks of
+    `chunk_tokens`. A seeded `error_rate` share of prompts fails.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 0.0,
+        tokens_per_second: float = 0.0,
+        chunk_tokens: int = 16,
+        error_rate: float = 0.0,
+    ):
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.error_rate = error_rate
+
+    async def generate_completion(self, messages: List[Dict[str, str]], use_json: bool = False) -> str:
+        return "".join([chunk async for chunk in self.stream_completion(messages, use_json)])
+
+    async def stream_completion(
+        self, messages: List[Dict[str, str]], use_json: bool = False
+    ) -> AsyncIterator[str]:
+        prompt = "\n".join(message["content"] for message in messages)
+        rng = random.Random(hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest())
+
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if rng.random() < self.error_rate:
+            raise FakeAIError("Simulated provider error")
+
+        text = self._answer(prompt, use_json, rng)
+        record_tokens(len(prompt) // CHARS_PER_TOKEN, len(text) // CHARS_PER_TOKEN)
+        chunk_chars = self.chunk_tokens * CHARS_PER_TOKEN
+        for start in range(0, len(text), chunk_chars):
+            if self.tokens_per_second:
+                await asyncio.sleep(self.chunk_tokens / self.tokens_per_second)
+            yield text[start : start + chunk_chars]
+
+    def _answer(self, prompt: str, use_json: bool, rng: random.Random) -> str:
+        if "knowledge tree" in prompt:
+            return json.dumps(self._knowledge_tree(_field(prompt, r'topic: "(.*)"'), rng))
+        if "lesson content" in prompt:
+            return self._lesson(_field(prompt, r"Title: (.*)"), rng)
+        if "multimedia elements" in prompt:
+            return "\n\n".join(f"Diagram of {concept}." for concept in rng.sample(CONCEPTS, 3))
+        if "practice questions" in prompt:
+            return json.dumps(
+                self._questions(
+                    _field(prompt, r"Title: (.*)"), _field(prompt, r"Difficulty: (.*)"), rng
+                )
+            )
+        if "Evaluate the student's answer" in prompt:
+            return json.dumps(
+                self._evaluation(
+                    _field(prompt, r"Correct Answer: (.*)"),
+                    _field(prompt, r"Student's Answer: (.*)"),
+                )
+            )
+        return "{}" if use_json else " ".join(rng.sample(SENTENCES, 3))
+
+    @staticmethod
+    def _paragraph(rng: random.Random, sentences: int = 4) -> str:
+        return " ".join(rng.choice(SENTENCES) for _ in range(sentences))
+
+    def _knowledge_tree(self, topic: str, rng: random.Random) -> dict:
+        concepts = rng.sample(CONCEPTS, rng.randint(3, 5))
+        sections = []
+        for i, concept in enumerate(concepts, 1):
+            title = f"{topic}: {concept}"
+            sections.append(
+                {
+                    "title": title,
+                    "description": f"Covers the {concept} of {topic}. {rng.choice(SENTENCES)}",
+                    "subsections": [
+                        {
+                            "title": f"{title}, part {j}",
+                            "description": f"Part {j} of section {i}. {rng.choice(SENTENCES)}",
+                        }
+                        for j in range(1, rng.randint(2, 4) + 1)
+                    ],
+                }
+            )
+        return {"topic": topic, "sections": sections}
+
+    def _lesson(self, title: str, rng: random.Random) -> str:
+        parts = [f"# {title}\n\n{self._paragraph(rng)}\n"]
+        for concept in rng.sample(CONCEPTS, rng.randint(3, 5)):
+            body = f"{self._paragraph(rng)}\n\n{self._paragraph(rng)}"
+            parts.append(f"\n## {concept.capitalize()}\n\n{body}\n")
+            if rng.random() < 0.5:
+                parts.append(f"\n```python\nexample = {rng.randint(1, 99)}\n```\n")
+        return "".join(parts)
+
+    def _questions(self, title: str, difficulty: str, rng: random.Random) -> dict:
+        return {
+            "questions": [
+                {
+                    "text": (
+                        rng.choice(QUESTION_TEMPLATES).format(concept=concept, title=title)
+                        + " "
+                        + rng.choice(SENTENCES)
+                    ),
+                    "difficulty": difficulty,
+                    "correct_answer": f"{concept.capitalize()} in {title}: {rng.choice(SENTENCES)}",
+                }
+                for concept in rng.sample(CONCEPTS, 3)
+            ]
+        }
+
+    @staticmethod
+    def _evaluation(correct_answer: str, student_answer: str) -> dict:
+        expected, given = correct_answer.strip().lower(), student_answer.strip().lower()
+        is_correct = bool(given) and expected in given
+        feedback = (
+            "Correct. You captured the key idea."
+            if is_correct
+            else "Not quite. Revisit the section and compare your answer with its main idea."
+        )
+        return {"is_correct": is_correct, "feedback": feedback}
+
+
+def _field(prompt: str, pattern: str) -> str:
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else ""
@@ -1,11 +1,24 @@
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Dict, Any, Optional
 
+from app.core.tracing import traced
 from app.db.session import get_db
 from app.models.knowledge_tree import KnowledgeTree, Section, Subsection
-from app.schemas.knowledge_tree import KnowledgeTreeResponse, SectionResponse, SubsectionResponse, HATEOASLink
+from app.schemas.knowledge_tree import (
+    KnowledgeTreeResponse,
+    KnowledgeTreeSummary,
+    SectionResponse,
+    SubsectionResponse,
+)
+from app.schemas.pagination import Page
 from app.services.ai import AIService
+from app.services.links import SECTION_LINKS, SUBSECTION_LINKS, TREE_LINKS, render_links
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search import SearchService
+from app.services.similarity import subsection_index
 
 
 class KnowledgeTreeService:
@@ -17,6 +30,7 @@ class KnowledgeTreeService:
         self.db = db
         self.ai_service = ai_service
 
+    @traced()
     async def generate_knowledge_tree(self, topic: str) -> KnowledgeTreeResponse:
         """Generate a knowledge tree for a given topic."""
         # Use AI to generate the knowledge tree structure
@@ -47,44 +61,16 @@ class KnowledgeTreeService:
                 self.db.add(db_subsection)
                 self.db.flush()
                 
-                # Add HATEOAS links for lesson access
-                lesson_links = [
-                    HATEOASLink(
-                        href=f"/api/v1/lessons/subsection/{db_subsection.id}",
-                        rel="lesson",
-                        method="GET"
-                    ),
-                    HATEOASLink(
-                        href="/api/v1/lessons/",
-                        rel="create-lesson",
-                        method="POST"
-                    )
-                ]
-                
                 subsections.append(
                     SubsectionResponse(
                         id=db_subsection.id,
                         section_id=db_section.id,
                         title=db_subsection.title,
                         description=db_subsection.description,
-                        links=lesson_links
+                        links=render_links(SUBSECTION_LINKS, subsection_id=db_subsection.id),
                     )
                 )
             
-            # Add HATEOAS links for section
-            section_links = [
-                HATEOASLink(
-                    href=f"/api/v1/questions/section/{db_section.id}",
-                    rel="practice-questions",
-                    method="GET"
-                ),
-                HATEOASLink(
-                    href="/api/v1/questions/",
-                    rel="create-questions",
-                    method="POST"
-                )
-            ]
-            
             sections.append(
                 SectionResponse(
                     id=db_section.id,
@@ -92,31 +78,142 @@ class KnowledgeTreeService:
                     title=db_section.title,
                     description=db_section.description,
                     subsections=subsections,
-                    links=section_links
+                    links=render_links(SECTION_LINKS, section_id=db_section.id),
                 )
             )
         
+        SearchService(db=self.db).index_documents(self._search_documents(db_tree, sections))
         self.db.commit()
-        
-        # Add HATEOAS links to knowledge tree
-        tree_links = [
-            HATEOASLink(
-                href=f"/api/v1/knowledge-tree/{db_tree.id}",
-                rel="self",
-                method="GET"
-            )
-        ]
+        if subsection_index.loaded:
+            subsection_index.refresh(self.db)
         
         return KnowledgeTreeResponse(
             id=db_tree.id,
             topic=db_tree.topic,
             sections=sections,
-            links=tree_links
+            links=render_links(TREE_LINKS, tree_id=db_tree.id),
+        )
+
+    @traced()
+    def _search_documents(
+        self, db_tree: KnowledgeTree, sections: List[SectionResponse]
+    ) -> List[Dict[str, Any]]:
+        documents = [
+            {"kind": "tree", "ref_id": db_tree.id, "tree_id": db_tree.id, "title": db_tree.topic, "body": ""}
+        ]
+        for section in sections:
+            documents.append(
+                {
+                    "kind": "section",
+                    "ref_id": section.id,
+                    "tree_id": db_tree.id,
+                    "title": section.title,
+                    "body": section.description,
+                }
+            )
+            documents.extend(
+                {
+                    "kind": "subsection",
+                    "ref_id": subsection.id,
+                    "tree_id": db_tree.id,
+                    "title": subsection.title,
+                    "body": subsection.description,
+                }
+                for subsection in section.subsections
+            )
+        return documents
+
+    async def list_knowledge_trees(
+        self,
+        sort: str = "created_at",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        include_links: bool = True,
+    ) -> Page[KnowledgeTreeSummary]:
+        """List knowledge trees one page at a time.
+
+        `sort` is "created_at" (newest first) or "topic" (alphabetical). Pages
+        are keyset-paginated on (sort key, id), so each one is a single index
+        range scan however many trees there are.
+        """
+        if sort == "topic":
+            key, key_type = KnowledgeTree.topic, str
+        elif sort == "created_at":
+            key, key_type = KnowledgeTree.created_at, datetime
+        else:
+            raise ValueError(f"Unknown sort order: {sort}")
+        
+        query = self.db.query(KnowledgeTree.id, KnowledgeTree.topic, KnowledgeTree.created_at)
+        if cursor:
+            # The cursor records the ordering it came from so it can't be reused with another.
+            cursor_sort, value, last_id = decode_cursor(cursor, str, key_type, int)
+            if cursor_sort != sort:
+                raise ValueError("Invalid cursor")
+            if sort == "topic":
+                query = query.filter(tuple_(key, KnowledgeTree.id) > tuple_(value, last_id))
+            else:
+                query = query.filter(tuple_(key, KnowledgeTree.id) < tuple_(value, last_id))
+        if sort == "topic":
+            query = query.order_by(key, KnowledgeTree.id)
+        else:
+            query = query.order_by(key.desc(), KnowledgeTree.id.desc())
+        
+        # One extra row tells whether there is a next page.
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, getattr(last, sort), last.id)
+        
+        return Page[KnowledgeTreeSummary](
+            items=[
+                KnowledgeTreeSummary(
+                    id=row.id,
+                    topic=row.topic,
+                    created_at=row.created_at,
+                    links=render_links(TREE_LINKS, tree_id=row.id) if include_links else [],
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
         )
 
-    async def get_knowledge_tree(self, tree_id: int) -> Optional[KnowledgeTreeResponse]:
-        """Get a knowledge tree by ID."""
-        db_tree = self.db.query(KnowledgeTree).filter(KnowledgeTree.id == tree_id).first()
+    async def get_knowledge_tree_version(self, tree_id: int) -> Optional[tuple]:
+        """Get a cheap fingerprint of a knowledge tree's stored state.
+
+        Covers the latest `updated_at` and the number of sections and
+        subsections, so edits, additions and removals all change it.
+        """
+        version = (
+            self.db.query(
+                KnowledgeTree.updated_at,
+                func.max(Section.updated_at),
+                func.max(Subsection.updated_at),
+                func.count(func.distinct(Section.id)),
+                func.count(Subsection.id),
+            )
+            .outerjoin(Section, Section.tree_id == KnowledgeTree.id)
+            .outerjoin(Subsection, Subsection.section_id == Section.id)
+            .filter(KnowledgeTree.id == tree_id)
+            .group_by(KnowledgeTree.id)
+            .first()
+        )
+        if not version:
+            return None
+        return (tree_id, *version)
+
+    async def get_knowledge_tree(
+        self, tree_id: int, include_links: bool = True
+    ) -> Optional[KnowledgeTreeResponse]:
+        """Get a knowledge tree by ID, optionally without HATEOAS links."""
+        # Three queries regardless of size: tree, sections, subsections.
+        db_tree = (
+            self.db.query(KnowledgeTree)
+            .options(selectinload(KnowledgeTree.sections).selectinload(Section.subsections))
+            .filter(KnowledgeTree.id == tree_id)
+            .first()
+        )
         if not db_tree:
             return None
         
@@ -130,6 +227,10 @@ class KnowledgeTreeService:
                         section_id=db_section.id,
                         title=db_subsection.title,
                         description=db_subsection.description,
+                        links=(
+                            render_links(SUBSECTION_LINKS, subsection_id=db_subsection.id)
+                            if include_links else []
+                        ),
                     )
                 )
             
@@ -140,6 +241,7 @@ class KnowledgeTreeService:
                     title=db_section.title,
                     description=db_section.description,
                     subsections=subsections,
+                    links=render_links(SECTION_LINKS, section_id=db_section.id) if include_links else [],
                 )
             )
         
@@ -147,4 +249,5 @@ class KnowledgeTreeService:
             id=db_tree.id,
             topic=db_tree.topic,
             sections=sections,
+            links=render_links(TREE_LINKS, tree_id=db_tree.id) if include_links else [],
         )
\ No newline at end of file
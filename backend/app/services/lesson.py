@@ -1,12 +1,26 @@
 from fastapi import Depends
+from sqlalchemy import case, insert
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.tracing import traced
 from app.db.session import get_db
-from app.models.lesson import Lesson
-from app.models.knowledge_tree import Subsection
-from app.schemas.lesson import LessonResponse, HATEOASLink
+from app.models.lesson import Lesson, LessonChunk
+from app.models.knowledge_tree import Section, Subsection
+from app.schemas.lesson import (
+    LessonChunksResponse,
+    LessonResponse,
+    LessonTocEntry,
+    SimilarLessonResponse,
+)
+from app.schemas.lesson import LessonChunk as LessonChunkResponse
 from app.services.ai import AIService
+from app.services.lesson_chunks import split_lesson
+from app.services.links import LESSON_LINKS, render_links
+from app.services.search import SearchService
+from app.services.similarity import embed, subsection_index, subsection_text
 
 
 class LessonService:
@@ -18,45 +32,52 @@ class LessonService:
         self.db = db
         self.ai_service = ai_service
 
-    def _add_hateoas_links(self, lesson: LessonResponse, subsection: Subsection) -> LessonResponse:
+    def _add_hateoas_links(self, lesson: LessonResponse) -> LessonResponse:
         """Add HATEOAS links to lesson response."""
-        lesson.links = [
-            HATEOASLink(
-                href=f"/api/v1/lessons/{lesson.id}",
-                rel="self",
-                method="GET"
-            ),
-            HATEOASLink(
-                href=f"/api/v1/questions/section/{subsection.section_id}",
-                rel="practice-questions",
-                method="GET"
-            ),
-            HATEOASLink(
-                href="/api/v1/questions/",
-                rel="create-questions",
-                method="POST"
-            )
-        ]
+        lesson.links = render_links(LESSON_LINKS, lesson_id=lesson.id, section_id=lesson.section_id)
         return lesson
 
-    async def generate_lesson(self, subsection_id: int, subsection_title: str) -> LessonResponse:
-        """Generate lesson content for a subsection."""
+    @traced()
+    async def generate_lesson(
+        self, subsection_id: int, subsection_title: str, reuse: bool = True
+    ) -> LessonResponse:
+        """Generate lesson content for a subsection.
+
+        With `reuse`, the lesson of a near-identical subsection (in any tree)
+        is copied instead when one is at least LESSON_REUSE_THRESHOLD similar.
+        """
         # Check if the subsection exists
         db_subsection = self.db.query(Subsection).filter(Subsection.id == subsection_id).first()
         if not db_subsection:
             raise ValueError(f"Subsection with ID {subsection_id} not found")
         
-        # Use AI to generate the lesson content
-        content = await self.ai_service.generate_lesson_content(
-            subsection_title, db_subsection.description
-        )
+        source = None
+        if reuse and settings.LESSON_REUSE:
+            matches = self._similar_lessons(db_subsection, limit=1)
+            if matches and matches[0][2] >= settings.LESSON_REUSE_THRESHOLD:
+                source = matches[0][1]
+            record_cache("lesson_reuse", source is not None)
         
-        # Generate multimedia content if enabled
-        multimedia_urls = []
-        if self.ai_service.enable_multimedia:
-            multimedia_urls = await self.ai_service.generate_multimedia(
-                subsection_title, content
+        if source is not None:
+            content = source.content
+            multimedia_urls = list(source.multimedia_urls or [])
+        else:
+            # End the transaction so no pooled connection is held while the
+            # AI provider works; db_subsection reloads on next access.
+            description = db_subsection.description
+            self.db.commit()
+
+            # Use AI to generate the lesson content
+            content = await self.ai_service.generate_lesson_content(
+                subsection_title, description
             )
+            
+            # Generate multimedia content if enabled
+            multimedia_urls = []
+            if self.ai_service.enable_multimedia:
+                multimedia_urls = await self.ai_service.generate_multimedia(
+                    subsection_title, content
+                )
         
         # Create or update the lesson in the database
         db_lesson = self.db.query(Lesson).filter(Lesson.subsection_id == subsection_id).first()
@@ -70,7 +91,20 @@ class LessonService:
                 multimedia_urls=multimedia_urls,
             )
             self.db.add(db_lesson)
+        self.db.flush()
+        self._store_chunks(db_lesson.id, content)
         
+        SearchService(db=self.db).index_documents(
+            [
+                {
+                    "kind": "lesson",
+                    "ref_id": db_lesson.id,
+                    "tree_id": db_subsection.section.tree_id,
+                    "title": db_subsection.title,
+                    "body": content,
+                }
+            ]
+        )
         self.db.commit()
         self.db.refresh(db_lesson)
         
@@ -83,44 +117,181 @@ class LessonService:
             multimedia_urls=db_lesson.multimedia_urls,
         )
         
-        return self._add_hateoas_links(response, db_subsection)
+        return self._add_hateoas_links(response)
 
-    async def get_lesson(self, lesson_id: int) -> Optional[LessonResponse]:
-        """Get a lesson by ID."""
-        db_lesson = self.db.query(Lesson).filter(Lesson.id == lesson_id).first()
-        if not db_lesson:
-            return None
+    @traced()
+    def _store_chunks(self, lesson_id: int, content: str) -> None:
+        """Replace a lesson's chunks with a fresh split of `content`; the caller commits."""
+        self.db.query(LessonChunk).filter(LessonChunk.lesson_id == lesson_id).delete(
+            synchronize_session=False
+        )
+        chunks = split_lesson(content)
+        if chunks:
+            self.db.execute(
+                insert(LessonChunk),
+                [
+                    {
+                        "lesson_id": lesson_id,
+                        "position": chunk.position,
+                        "heading": chunk.heading,
+                        "level": chunk.level,
+                        "content": chunk.content,
+                    }
+                    for chunk in chunks
+                ],
+            )
+
+    @traced()
+    async def get_lesson_chunks(self, lesson_id: int, start: int, limit: int) -> LessonChunksResponse:
+        """Get `limit` chunks of a lesson from position `start`, with the table of contents.
+
+        One range scan of the lesson's chunks; content is only read for the
+        requested ones.
+        """
+        in_page = LessonChunk.position.between(start, start + limit - 1)
+        rows = (
+            self.db.query(
+                LessonChunk.position,
+                LessonChunk.heading,
+                LessonChunk.level,
+                case((in_page, LessonChunk.content), else_=None).label("content"),
+            )
+            .filter(LessonChunk.lesson_id == lesson_id)
+            .order_by(LessonChunk.position)
+            .all()
+        )
+        return LessonChunksResponse(
+            lesson_id=lesson_id,
+            toc=[
+                LessonTocEntry(position=row.position, heading=row.heading, level=row.level)
+                for row in rows
+            ],
+            chunks=[
+                LessonChunkResponse(
+                    position=row.position, heading=row.heading, level=row.level, content=row.content
+                )
+                for row in rows
+                if row.content is not None
+            ],
+            next_from=start + limit if start + limit < len(rows) else None,
+        )
+
+    @traced()
+    def _similar_lessons(self, db_subsection: Subsection, limit: int) -> List[tuple]:
+        """Stored lessons of the subsections most similar to `db_subsection`.
+
+        Returns (subsection, lesson, similarity) tuples, best first. Only the
+        nearest candidates from the index are looked up, in one query.
+        """
+        subsection_index.refresh(self.db)
+        vector = embed(
+            subsection_text(db_subsection.title, db_subsection.description), subsection_index.dim
+        )
+        # Most near-identical subsections have no lesson yet, so look past the first few.
+        matches = subsection_index.search(vector, k=max(limit * 5, 20), exclude_id=db_subsection.id)
+        if not matches:
+            return []
         
-        # Get subsection for HATEOAS links
-        db_subsection = self.db.query(Subsection).filter(Subsection.id == db_lesson.subsection_id).first()
+        rows = (
+            self.db.query(Subsection, Lesson)
+            .join(Lesson, Lesson.subsection_id == Subsection.id)
+            .filter(Subsection.id.in_([subsection_id for subsection_id, _ in matches]))
+            .all()
+        )
+        by_subsection = {subsection.id: (subsection, lesson) for subsection, lesson in rows}
+        return [
+            (*by_subsection[subsection_id], score)
+            for subsection_id, score in matches
+            if subsection_id in by_subsection
+        ][:limit]
+
+    async def get_similar_lessons(
+        self, subsection_id: int, limit: int = 5
+    ) -> Optional[List[SimilarLessonResponse]]:
+        """Get existing lessons that could be reused for a subsection, most similar first."""
+        db_subsection = self.db.get(Subsection, subsection_id)
+        if not db_subsection:
+            return None
         
+        return [
+            SimilarLessonResponse(
+                lesson_id=lesson.id,
+                subsection_id=subsection.id,
+                subsection_title=subsection.title,
+                similarity=score,
+                links=render_links(LESSON_LINKS, lesson_id=lesson.id, section_id=subsection.section_id),
+            )
+            for subsection, lesson, score in self._similar_lessons(db_subsection, limit)
+        ]
+
+    def _lesson_query(self):
+        """Select a lesson together with its subsection's section id and title."""
+        return (
+            self.db.query(
+                Lesson.id,
+                Lesson.subsection_id,
+                Lesson.content,
+                Lesson.multimedia_urls,
+                Subsection.section_id,
+                Section.title.label("section_title"),
+            )
+            .join(Subsection, Subsection.id == Lesson.subsection_id)
+            .join(Section, Section.id == Subsection.section_id)
+        )
+
+    def _to_response(self, row) -> LessonResponse:
+        """Build a lesson response from a row of `_lesson_query`."""
         response = LessonResponse(
-            id=db_lesson.id,
-            subsection_id=db_lesson.subsection_id,
-            section_id=db_subsection.section_id,
-            section_title=db_subsection.section.title,
-            content=db_lesson.content,
-            multimedia_urls=db_lesson.multimedia_urls,
+            id=row.id,
+            subsection_id=row.subsection_id,
+            section_id=row.section_id,
+            section_title=row.section_title,
+            content=row.content,
+            multimedia_urls=row.multimedia_urls,
+        )
+        return self._add_hateoas_links(response)
+
+    async def get_lesson_version(
+        self, lesson_id: Optional[int] = None, subsection_id: Optional[int] = None
+    ) -> Optional[tuple]:
+        """Get a cheap fingerprint of a lesson's stored state, by lesson or subsection ID."""
+        query = (
+            self.db.query(Lesson.id, Lesson.updated_at, Section.updated_at)
+            .join(Subsection, Subsection.id == Lesson.subsection_id)
+            .join(Section, Section.id == Subsection.section_id)
         )
+        if lesson_id is not None:
+            query = query.filter(Lesson.id == lesson_id)
+        else:
+            query = query.filter(Lesson.subsection_id == subsection_id)
+        
+        version = query.first()
+        if not version:
+            return None
+        return tuple(version)
+
+    async def get_lesson(self, lesson_id: int) -> Optional[LessonResponse]:
+        """Get a lesson by ID."""
+        row = self._lesson_query().filter(Lesson.id == lesson_id).first()
+        if not row:
+            return None
         
-        return self._add_hateoas_links(response, db_subsection)
+        return self._to_response(row)
 
     async def get_lesson_by_subsection(self, subsection_id: int) -> Optional[LessonResponse]:
         """Get a lesson by subsection ID."""
-        db_lesson = self.db.query(Lesson).filter(Lesson.subsection_id == subsection_id).first()
-        if not db_lesson:
+        row = self._lesson_query().filter(Lesson.subsection_id == subsection_id).first()
+        if not row:
             return None
         
-        # Get subsection for HATEOAS links
-        db_subsection = self.db.query(Subsection).filter(Subsection.id == db_lesson.subsection_id).first()
-        
-        response = LessonResponse(
-            id=db_lesson.id,
-            subsection_id=db_lesson.subsection_id,
-            section_id=db_subsection.section_id,
-            section_title=db_subsection.section.title,
-            content=db_lesson.content,
-            multimedia_urls=db_lesson.multimedia_urls,
-        )
+        return self._to_response(row)
+
+    async def get_lessons_by_subsections(
+        self, subsection_ids: List[int]
+    ) -> Dict[int, LessonResponse]:
+        """Get the existing lessons for many subsections, keyed by subsection ID."""
+        if not subsection_ids:
+            return {}
         
-        return self._add_hateoas_links(response, db_subsection)
+        rows = self._lesson_query().filter(Lesson.subsection_id.in_(subsection_ids)).all()
+        return {row.subsection_id: self._to_response(row) for row in rows}
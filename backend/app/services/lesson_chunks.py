@@ -0,0 +1,44 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Headings up to this level start a new chunk; deeper ones stay inside it.
+MAX_SPLIT_LEVEL = 3
+
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$")
+_FENCE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+
+
+@dataclass
+class Chunk:
+    position: int
+    heading: Optional[str]
+    level: int  # 0 for text before the first heading
+    content: str
+
+
+def split_lesson(content: str) -> List[Chunk]:
+    """Split markdown at ATX headings into ordered chunks.
+
+    Each chunk starts with its heading line, so joining the chunks gives
+    back the original text. Headings inside fenced code blocks don't count.
+    """
+    sections: List[tuple] = []
+    heading, level, lines = None, 0, []
+    in_fence = False
+    for line in (content or "").splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line.rstrip("\r\n"))
+        if match and len(match.group(1)) <= MAX_SPLIT_LEVEL:
+            if lines:
+                sections.append((heading, level, lines))
+            heading, level, lines = match.group(2), len(match.group(1)), []
+        lines.append(line)
+    if lines:
+        sections.append((heading, level, lines))
+
+    return [
+        Chunk(position=position, heading=heading, level=level, content="".join(lines))
+        for position, (heading, level, lines) in enumerate(sections)
+    ]
@@ -0,0 +1,59 @@
+from typing import List, Sequence
+
+from app.core.config import settings
+from app.schemas.links import HATEOASLink
+
+
+class LinkTemplate:
+    """A HATEOAS link whose href may contain `str.format` placeholders.
+
+    Links without placeholders are built once and the same instance is shared
+    by every response; the others are rendered with `model_construct`, which
+    skips validation of values that are already known to be valid.
+    """
+
+    def __init__(self, path: str, rel: str, method: str = "GET"):
+        self.href = f"{settings.API_V1_STR}{path}"
+        self.rel = rel
+        self.method = method
+        self.static = None
+        if "{" not in path:
+            self.static = HATEOASLink(href=self.href, rel=rel, method=method)
+
+    def render(self, **params: int) -> HATEOASLink:
+        if self.static is not None:
+            return self.static
+        return HATEOASLink.model_construct(
+            href=self.href.format(**params), rel=self.rel, method=self.method
+        )
+
+
+def render_links(templates: Sequence[LinkTemplate], **params: int) -> List[HATEOASLink]:
+    return [template.render(**params) for template in templates]
+
+
+TREE_LINKS = (
+    LinkTemplate("/knowledge-tree/{tree_id}", "self"),
+)
+
+SECTION_LINKS = (
+    LinkTemplate("/questions/section/{section_id}", "practice-questions"),
+    LinkTemplate("/questions/", "create-questions", "POST"),
+)
+
+SUBSECTION_LINKS = (
+    LinkTemplate("/lessons/subsection/{subsection_id}", "lesson"),
+    LinkTemplate("/lessons/", "create-lesson", "POST"),
+)
+
+LESSON_LINKS = (
+    LinkTemplate("/lessons/{lesson_id}", "self"),
+    LinkTemplate("/questions/section/{section_id}", "practice-questions"),
+    LinkTemplate("/questions/", "create-questions", "POST"),
+)
+
+QUESTION_LINKS = (
+    LinkTemplate("/questions/{question_id}", "self"),
+    LinkTemplate("/questions/{question_id}/answer", "submit-answer", "POST"),
+    LinkTemplate("/questions/section/{section_id}", "section-questions"),
+)
@@ -0,0 +1,108 @@
+from functools import lru_cache
+from itertools import combinations
+from typing import List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.db.upsert import insert
+from app.models.user import SectionMastery
+
+# Fixed ratings of the question difficulty levels; users are rated on the same scale.
+QUESTION_RATINGS = {"easy": 1300.0, "medium": 1500.0, "hard": 1700.0}
+INITIAL_RATING = QUESTION_RATINGS["medium"]
+# Ratings move fast while a user has few attempts in a section, then settle.
+K_START = 64.0
+K_MIN = 16.0
+
+
+def expected_score(rating: float, difficulty: str) -> float:
+    """Probability that a user with `rating` answers a question of `difficulty` correctly."""
+    question_rating = QUESTION_RATINGS.get(difficulty, INITIAL_RATING)
+    return 1.0 / (1.0 + 10 ** ((question_rating - rating) / 400.0))
+
+
+def updated_rating(rating: float, attempts: int, difficulty: str, is_correct: bool) -> float:
+    k = max(K_MIN, K_START / (1.0 + attempts / 10.0))
+    return rating + k * (float(is_correct) - expected_score(rating, difficulty))
+
+
+def difficulties_for(rating: float) -> list:
+    """Difficulty levels ordered by how close their expected success is to the target."""
+    return sorted(
+        QUESTION_RATINGS,
+        key=lambda difficulty: abs(
+            expected_score(rating, difficulty) - settings.MASTERY_TARGET_SUCCESS
+        ),
+    )
+
+
+def _crossing(easier: str, harder: str, target: float) -> float:
+    """Rating at which two difficulty levels are equally far from the target."""
+    # The summed expected scores grow with the rating, so bisect for where they hit 2 * target.
+    low, high = -10000.0, 10000.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if expected_score(middle, easier) + expected_score(middle, harder) < 2 * target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+@lru_cache(maxsize=None)
+def _difficulty_bands(target: float) -> Tuple[List[float], List[list]]:
+    """Split the rating scale where difficulties_for() changes its order.
+
+    Returns the boundaries and, for each of the bands they make, the order.
+    """
+    bounds = sorted(_crossing(a, b, target) for a, b in combinations(QUESTION_RATINGS, 2))
+    probes = [bounds[0] - 1.0] + [(a + b) / 2 for a, b in zip(bounds, bounds[1:])] + [bounds[-1] + 1.0]
+    return bounds, [difficulties_for(rating) for rating in probes]
+
+
+def difficulty_rank(rating, difficulty: str):
+    """SQL expression for the position of `difficulty` in difficulties_for(rating).
+
+    `rating` is a column expression, so a query can rank questions for a
+    rating it reads itself.
+    """
+    bounds, orders = _difficulty_bands(settings.MASTERY_TARGET_SUCCESS)
+    return case(
+        *[(rating < bound, order.index(difficulty)) for bound, order in zip(bounds, orders)],
+        else_=orders[-1].index(difficulty),
+    )
+
+
+class MasteryService:
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    def get_mastery(self, user_id: int, section_id: int) -> Tuple[float, int]:
+        """Return the (rating, attempts) of a user in a section."""
+        row = self.db.get(SectionMastery, (user_id, section_id))
+        if row is None:
+            return INITIAL_RATING, 0
+        return row.rating, row.attempts
+
+    def record_outcome(
+        self, user_id: int, section_id: int, difficulty: str, is_correct: bool
+    ) -> float:
+        """Update the user's rating with one answer and return the new rating.
+
+        Locks the user's row for the update, so concurrent answers are applied
+        one after the other. The caller commits.
+        """
+        stmt = insert(self.db, SectionMastery).values(
+            user_id=user_id, section_id=section_id, rating=INITIAL_RATING, attempts=0
+        )
+        self.db.execute(stmt.on_conflict_do_nothing())
+        mastery: Optional[SectionMastery] = self.db.get(
+            SectionMastery, (user_id, section_id), with_for_update=True, populate_existing=True
+        )
+        mastery.rating = updated_rating(mastery.rating, mastery.attempts, difficulty, is_correct)
+        mastery.attempts += 1
+        return mastery.rating
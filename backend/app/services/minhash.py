@@ -0,0 +1,83 @@
+import hashlib
+import random
+import re
+import struct
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are stored, so every process must use the same permutations.
+_rng = random.Random(20261019)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+_WORD = re.compile(r"\w+")
+_PACK = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashed character shingles of the text with case and punctuation removed."""
+    normalized = " ".join(_WORD.findall(text.lower()))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {zlib.crc32(normalized.encode())}
+    return {
+        zlib.crc32(normalized[i : i + SHINGLE_SIZE].encode())
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text: str) -> Signature:
+    """MinHash signature; the share of equal slots estimates Jaccard similarity."""
+    hashes = shingles(text)
+    return tuple(
+        min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERMUTATIONS
+
+
+def band_hashes(sig: Signature) -> List[int]:
+    """One signed 64-bit key per band; similar texts share at least one with high probability."""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<I{ROWS_PER_BAND}I", band, *rows), digest_size=8)
+        keys.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return keys
+
+
+def pack(sig: Signature) -> bytes:
+    return _PACK.pack(*sig)
+
+
+def unpack(data: bytes) -> Signature:
+    return _PACK.unpack(data)
+
+
+class LSHIndex:
+    """In-memory banded LSH index, for checking signatures against each other."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._buckets: Dict[int, List[Tuple[int, Signature]]] = {}
+
+    def add(self, key: int, sig: Signature) -> None:
+        for band in band_hashes(sig):
+            self._buckets.setdefault(band, []).append((key, sig))
+
+    def find_duplicate(self, sig: Signature) -> Optional[int]:
+        """Return the key of an indexed signature similar to `sig`, if any."""
+        for band in band_hashes(sig):
+            for key, other in self._buckets.get(band, ()):
+                if similarity(sig, other) >= self.threshold:
+                    return key
+        return None
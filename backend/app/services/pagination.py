@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    data = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """Decode a cursor built by `encode_cursor`, checking it against `types`.
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different ordering.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, list) or len(data) != len(types):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value, expected in zip(data, types):
+        try:
+            if expected is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, expected) or isinstance(value, bool):
+                raise TypeError
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        values.append(value)
+    return tuple(values)
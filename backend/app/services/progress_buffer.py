@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.upsert import insert
+from app.models.user import SubsectionProgress
+
+logger = logging.getLogger(__name__)
+
+
+def progress_upsert(db: Session):
+    """Build the upsert used for every progress write.
+
+    Completion is sticky and a missing score keeps the stored one, so the
+    statement can be executed with one or many parameter sets.
+    """
+    stmt = insert(db, SubsectionProgress)
+    return stmt.on_conflict_do_update(
+        index_elements=[SubsectionProgress.user_id, SubsectionProgress.subsection_id],
+        set_={
+            "completed": or_(SubsectionProgress.completed, stmt.excluded.completed),
+            "score": func.coalesce(stmt.excluded.score, SubsectionProgress.score),
+            "updated_at": func.now(),
+        },
+    )
+
+
+@dataclass
+class PendingProgress:
+    completed: bool
+    score: Optional[float]
+
+    def merge(self, completed: bool, score: Optional[float]) -> None:
+        """Fold a newer update into this one, with the upsert's semantics."""
+        self.completed = self.completed or completed
+        if score is not None:
+            self.score = score
+
+
+class ProgressBuffer:
+    """Coalesces progress updates per (user, subsection) and writes them in batches.
+
+    Updates are flushed every `flush_interval` seconds, as soon as
+    `max_pending` keys are waiting, and once more on shutdown. Reads go
+    through `overlay` to see updates that are not committed yet; this holds
+    within one worker process only.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval: float,
+        max_pending: int,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, int], PendingProgress] = {}
+        self._in_flight: Dict[Tuple[int, int], PendingProgress] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, user_id: int, subsection_id: int, completed: bool, score: Optional[float]) -> None:
+        """Buffer an update, merging it with any pending one for the same key."""
+        with self._lock:
+            pending = self._pending.get((user_id, subsection_id))
+            if pending:
+                pending.merge(completed, score)
+            else:
+                self._pending[(user_id, subsection_id)] = PendingProgress(completed, score)
+            full = len(self._pending) >= self.max_pending
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def overlay(self, user_id: int) -> Dict[int, PendingProgress]:
+        """Return the uncommitted updates of a user, keyed by subsection ID."""
+        updates: Dict[int, PendingProgress] = {}
+        with self._lock:
+            for source in (self._in_flight, self._pending):
+                for (pending_user_id, subsection_id), pending in source.items():
+                    if pending_user_id != user_id:
+                        continue
+                    if subsection_id in updates:
+                        updates[subsection_id].merge(pending.completed, pending.score)
+                    else:
+                        updates[subsection_id] = PendingProgress(pending.completed, pending.score)
+        return updates
+
+    def flush(self) -> int:
+        """Write all pending updates in one batched statement; return the row count."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._in_flight, self._pending = self._pending, {}
+            rows = [
+                {
+                    "user_id": user_id,
+                    "subsection_id": subsection_id,
+                    "completed": pending.completed,
+                    "score": pending.score,
+                }
+                for (user_id, subsection_id), pending in self._in_flight.items()
+            ]
+            try:
+                self._write(rows)
+            except Exception:
+                # Put the batch back underneath anything that arrived meanwhile.
+                with self._lock:
+                    for key, pending in self._pending.items():
+                        self._in_flight.setdefault(key, PendingProgress(False, None)).merge(
+                            pending.completed, pending.score
+                        )
+                    self._pending, self._in_flight = self._in_flight, {}
+                raise
+            with self._lock:
+                self._in_flight = {}
+            return len(rows)
+
+    def _write(self, rows: List[Dict]) -> None:
+        db = self.session_factory()
+        try:
+            try:
+                db.execute(progress_upsert(db), rows)
+                db.commit()
+                return
+            except IntegrityError:
+                db.rollback()
+            # One bad user or subsection ID must not sink the whole batch.
+            for row in rows:
+                try:
+                    db.execute(progress_upsert(db), [row])
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    logger.warning(
+                        "Dropping progress update for unknown user %s or subsection %s",
+                        row["user_id"],
+                        row["subsection_id"],
+                    )
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("Failed to flush buffered progress updates")
+
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+progress_buffer = ProgressBuffer(
+    SessionLocal,
+    flush_interval=settings.PROGRESS_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.PROGRESS_FLUSH_MAX_PENDING,
+)
+
+
+def get_progress_buffer() -> Optional[ProgressBuffer]:
+    """Return the shared progress buffer, or None when writes go straight to the database."""
+    return progress_buffer if settings.PROGRESS_WRITE_BEHIND else None
@@ -1,12 +1,40 @@
+from datetime import datetime, timedelta, timezone
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, true, tuple_, union_all
+from sqlalchemy.orm import Session, aliased
 from typing import List, Dict, Any, Optional
 
-from app.db.session import get_db
-from app.models.question import Question
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.tracing import traced
+from app.db.session import SessionLocal, get_db
+from app.models.question import Question, QuestionAttempt, QuestionLSHBand, ReviewSchedule
 from app.models.knowledge_tree import Section
-from app.schemas.question import QuestionResponse, AnswerFeedback, HATEOASLink
+from app.models.user import SectionMastery, User
+from app.schemas.pagination import Page
+from app.schemas.question import (
+    AnswerFeedback,
+    DueReviewResponse,
+    NextQuestionResponse,
+    QuestionResponse,
+)
+from app.services import minhash
+from app.services.admission import admission_controller
 from app.services.ai import AIService
+from app.services.links import QUESTION_LINKS, render_links
+from app.services.mastery import (
+    INITIAL_RATING,
+    QUESTION_RATINGS,
+    MasteryService,
+    difficulty_rank,
+    expected_score,
+)
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.question_bank import ADMISSION_CLIENT, question_bank_refills
+from app.services.review import ReviewService
+
+# Questions served per request; also what one generation call produces.
+QUESTIONS_PER_REQUEST = 3
 
 
 class QuestionService:
@@ -20,101 +48,369 @@ class QuestionService:
 
     def _add_hateoas_links(self, question: QuestionResponse) -> QuestionResponse:
         """Add HATEOAS links to question response."""
-        question.links = [
-            HATEOASLink(
-                href=f"/api/v1/questions/{question.id}",
-                rel="self",
-                method="GET"
-            ),
-            HATEOASLink(
-                href=f"/api/v1/questions/{question.id}/answer",
-                rel="submit-answer",
-                method="POST"
-            ),
-            HATEOASLink(
-                href=f"/api/v1/questions/section/{question.section_id}",
-                rel="section-questions",
-                method="GET"
-            )
-        ]
+        question.links = render_links(
+            QUESTION_LINKS, question_id=question.id, section_id=question.section_id
+        )
         return question
 
+    @traced()
     async def generate_questions(
-        self, section_id: int, section_title: str, difficulty: str = "medium"
+        self,
+        section_id: int,
+        section_title: str,
+        difficulty: str = "medium",
+        user_id: Optional[int] = None,
     ) -> List[QuestionResponse]:
-        """Generate practice questions for a section."""
+        """Get practice questions for a section.
+
+        In bank-first mode, questions are drawn at random from the stored ones
+        at this difficulty, skipping any the user answered recently. The AI is
+        only called inline when the bank can't fill the request, and banks
+        below their target depth are topped up in the background.
+        """
         # Check if the section exists
         db_section = self.db.query(Section).filter(Section.id == section_id).first()
         if not db_section:
             raise ValueError(f"Section with ID {section_id} not found")
         
-        # Use AI to generate the questions
-        questions_data = await self.ai_service.generate_questions(
-            section_title, db_section.description, difficulty
-        )
-        
-        # Create the questions in the database
-        question_responses = []
-        for question_data in questions_data:
-            db_question = Question(
-                section_id=section_id,
-                text=question_data["text"],
-                difficulty=question_data["difficulty"],
-                correct_answer=question_data["correct_answer"],
+        db_questions: List[Question] = []
+        if settings.QUESTION_BANK_FIRST:
+            db_questions = self._pick_from_bank(section_id, difficulty, user_id, QUESTIONS_PER_REQUEST)
+            record_cache("question_bank", len(db_questions) >= QUESTIONS_PER_REQUEST)
+        question_responses = [self._to_response(db_question) for db_question in db_questions]
+        if len(question_responses) < QUESTIONS_PER_REQUEST:
+            description = db_section.description
+            # End the read transaction so no pooled connection is held while the AI answers.
+            self.db.commit()
+            questions_data = await self.ai_service.generate_questions(
+                section_title, description, difficulty
             )
-            self.db.add(db_question)
-            self.db.flush()
-            
-            response = QuestionResponse(
-                id=db_question.id,
-                section_id=db_question.section_id,
-                text=db_question.text,
-                difficulty=db_question.difficulty,
-                correct_answer=db_question.correct_answer,
-            )
-            question_responses.append(self._add_hateoas_links(response))
-        
+            created = self._store_questions(section_id, questions_data, difficulty)
+            question_responses += [
+                self._to_response(db_question)
+                for db_question in created[: QUESTIONS_PER_REQUEST - len(question_responses)]
+            ]
         self.db.commit()
         
+        if (
+            settings.QUESTION_BANK_FIRST
+            and self._bank_depth(section_id, difficulty) < settings.QUESTION_BANK_TARGET_DEPTH
+        ):
+            question_bank_refills.schedule(
+                section_id,
+                difficulty,
+                lambda: self._refill_bank(section_id, section_title, difficulty),
+            )
+        
         return question_responses
 
+    @traced()
+    def _store_questions(
+        self, section_id: int, questions_data: List[Dict[str, Any]], difficulty: str
+    ) -> List[Question]:
+        """Add generated questions to the bank, uncommitted.
+
+        Near-duplicates of questions already in the section, or of each
+        other, are dropped, so fewer questions than generated may come back.
+        """
+        signatures = [minhash.signature(question_data["text"]) for question_data in questions_data]
+        
+        # Stored questions sharing an LSH band with a new one are the only candidates.
+        index = minhash.LSHIndex(settings.QUESTION_DUPLICATE_THRESHOLD)
+        for question_id, signature in self._lsh_candidates(section_id, signatures):
+            index.add(question_id, signature)
+        
+        db_questions = []
+        kept_signatures = []
+        for question_data, signature in zip(questions_data, signatures):
+            if index.find_duplicate(signature) is not None:
+                continue
+            index.add(0, signature)
+            kept_signatures.append(signature)
+            db_questions.append(
+                Question(
+                    section_id=section_id,
+                    text=question_data["text"],
+                    difficulty=question_data.get("difficulty") or difficulty,
+                    correct_answer=question_data["correct_answer"],
+                    minhash=minhash.pack(signature),
+                )
+            )
+        if not db_questions:
+            return []
+        
+        self.db.add_all(db_questions)
+        self.db.flush()
+        self.db.execute(
+            insert(QuestionLSHBand),
+            [
+                {"section_id": section_id, "band_hash": band_hash, "question_id": db_question.id}
+                for db_question, signature in zip(db_questions, kept_signatures)
+                for band_hash in set(minhash.band_hashes(signature))
+            ],
+        )
+        return db_questions
+
+    def _lsh_candidates(
+        self, section_id: int, signatures: List[minhash.Signature]
+    ) -> List[tuple]:
+        """Stored (ID, signature) pairs in the section that share a band with any of `signatures`."""
+        band_hashes = {band_hash for signature in signatures for band_hash in minhash.band_hashes(signature)}
+        if not band_hashes:
+            return []
+        matching = select(QuestionLSHBand.question_id).where(
+            QuestionLSHBand.section_id == section_id,
+            QuestionLSHBand.band_hash.in_(band_hashes),
+        )
+        rows = self.db.query(Question.id, Question.minhash).filter(Question.id.in_(matching)).all()
+        return [(row.id, minhash.unpack(row.minhash)) for row in rows if row.minhash]
+
+    @traced()
+    def _pick_from_bank(
+        self, section_id: int, difficulty: str, user_id: Optional[int], limit: int
+    ) -> List[Question]:
+        """Pick random stored questions the user hasn't answered recently."""
+        query = self.db.query(Question).filter(
+            Question.section_id == section_id, Question.difficulty == difficulty
+        )
+        if user_id is not None:
+            query = query.filter(Question.id.not_in(self._recently_answered(user_id)))
+        return query.order_by(func.random()).limit(limit).all()
+
+    def _recently_answered(self, user_id: int):
+        """Ids of the questions a user answered within QUESTION_REPEAT_AFTER_DAYS."""
+        since = datetime.now(timezone.utc) - timedelta(days=settings.QUESTION_REPEAT_AFTER_DAYS)
+        return select(QuestionAttempt.question_id).where(
+            QuestionAttempt.user_id == user_id, QuestionAttempt.created_at >= since
+        )
+
+    def _bank_depth(self, section_id: int, difficulty: str) -> int:
+        return (
+            self.db.query(func.count(Question.id))
+            .filter(Question.section_id == section_id, Question.difficulty == difficulty)
+            .scalar()
+        )
+
+    @traced()
+    async def _refill_bank(self, section_id: int, section_title: str, difficulty: str) -> None:
+        """Generate questions until the bank reaches its target depth.
+
+        Runs after the request has finished, so it uses its own sessions: a
+        short one to read the bank before each AI call and another to store
+        the results, so that no pooled connection waits on the AI.
+        """
+        # Bounded, in case the AI keeps returning fewer questions than asked for.
+        for _ in range(settings.QUESTION_BANK_TARGET_DEPTH // QUESTIONS_PER_REQUEST + 1):
+            with SessionLocal() as db:
+                description = db.query(Section.description).filter(Section.id == section_id).scalar()
+                depth = QuestionService(db=db, ai_service=self.ai_service)._bank_depth(
+                    section_id, difficulty
+                )
+            if description is None or depth >= settings.QUESTION_BANK_TARGET_DEPTH:
+                return
+            async with admission_controller.slot(ADMISSION_CLIENT):
+                questions_data = await self.ai_service.generate_questions(
+                    section_title, description, difficulty
+                )
+            with SessionLocal() as db:
+                service = QuestionService(db=db, ai_service=self.ai_service)
+                created = service._store_questions(section_id, questions_data, difficulty)
+                db.commit()
+            if not created:
+                return
+
+    def _to_response(self, db_question: Question, include_links: bool = True) -> QuestionResponse:
+        response = QuestionResponse(
+            id=db_question.id,
+            section_id=db_question.section_id,
+            text=db_question.text,
+            difficulty=db_question.difficulty,
+            correct_answer=db_question.correct_answer,
+        )
+        if include_links:
+            response = self._add_hateoas_links(response)
+        return response
+
     async def get_questions_by_section(
-        self, section_id: int, difficulty: Optional[str] = None
-    ) -> List[QuestionResponse]:
-        """Get questions for a section, optionally filtered by difficulty."""
+        self,
+        section_id: int,
+        difficulty: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = 20,
+        include_links: bool = True,
+    ) -> Page[QuestionResponse]:
+        """Get a page of a section's questions, optionally filtered by difficulty.
+
+        Questions are ordered by (difficulty, id) and keyset-paginated on that
+        pair, so every page is one range scan of the section's index. With no
+        `limit`, all of them are returned as one page.
+        """
         query = self.db.query(Question).filter(Question.section_id == section_id)
         if difficulty:
             query = query.filter(Question.difficulty == difficulty)
+        if cursor:
+            last_difficulty, last_id = decode_cursor(cursor, str, int)
+            query = query.filter(
+                tuple_(Question.difficulty, Question.id) > tuple_(last_difficulty, last_id)
+            )
+        
+        query = query.order_by(Question.difficulty, Question.id)
+        if limit is None:
+            db_questions = query.all()
+        else:
+            # One extra row tells whether there is a next page.
+            db_questions = query.limit(limit + 1).all()
+        next_cursor = None
+        if limit is not None and len(db_questions) > limit:
+            db_questions = db_questions[:limit]
+            next_cursor = encode_cursor(db_questions[-1].difficulty, db_questions[-1].id)
         
-        db_questions = query.all()
+        return Page[QuestionResponse](
+            items=[self._to_response(db_question, include_links) for db_question in db_questions],
+            next_cursor=next_cursor,
+        )
+
+    async def get_questions_by_sections(
+        self, section_ids: List[int], include_links: bool = True
+    ) -> Dict[int, List[QuestionResponse]]:
+        """Get the questions of many sections in one query, keyed by section ID."""
+        questions: Dict[int, List[QuestionResponse]] = {section_id: [] for section_id in section_ids}
+        if not section_ids:
+            return questions
         
-        question_responses = []
+        db_questions = (
+            self.db.query(Question)
+            .filter(Question.section_id.in_(section_ids))
+            .order_by(Question.section_id, Question.id)
+            .all()
+        )
         for db_question in db_questions:
-            response = QuestionResponse(
-                id=db_question.id,
-                section_id=db_question.section_id,
-                text=db_question.text,
-                difficulty=db_question.difficulty,
-                correct_answer=db_question.correct_answer,
+            questions[db_question.section_id].append(self._to_response(db_question, include_links))
+        return questions
+
+    @traced()
+    async def get_next_question(
+        self, user_id: int, section_id: int, include_links: bool = True
+    ) -> Optional[NextQuestionResponse]:
+        """Pick a stored question at the difficulty that suits the user's mastery.
+
+        The target is the difficulty whose predicted success rate is closest
+        to MASTERY_TARGET_SUCCESS; the next-closest ones are tried only if the
+        user has already answered every question at it. Within a difficulty,
+        questions are served in id order. Returns None when nothing in the
+        section is left to serve.
+        """
+        # The rating is read once, then each difficulty takes the lowest-id
+        # question the user hasn't answered recently (a range scan of
+        # (section_id, difficulty, id) that stops at the first row) and the
+        # one best ranked for the rating wins, all in one statement.
+        mastery = select(
+            func.coalesce(
+                select(SectionMastery.rating)
+                .where(SectionMastery.user_id == user_id, SectionMastery.section_id == section_id)
+                .scalar_subquery(),
+                INITIAL_RATING,
+            ).label("rating")
+        ).cte("mastery")
+        branches = []
+        for difficulty in QUESTION_RATINGS:
+            branch = (
+                select(
+                    Question,
+                    difficulty_rank(mastery.c.rating, difficulty).label("rank"),
+                    mastery.c.rating,
+                )
+                .join_from(Question, mastery, true())
+                .where(
+                    Question.section_id == section_id,
+                    Question.difficulty == difficulty,
+                    Question.id.not_in(self._recently_answered(user_id)),
+                )
+                .order_by(Question.id)
+                .limit(1)
+                .subquery()
             )
-            question_responses.append(self._add_hateoas_links(response))
-        
-        return question_responses
+            branches.append(select(branch))
+        candidates = union_all(*branches).subquery()
+        row = self.db.execute(
+            select(aliased(Question, candidates), candidates.c.rating)
+            .order_by(candidates.c.rank, candidates.c.id)
+            .limit(1)
+        ).first()
+        if row is None:
+            return None
+        db_question, mastery = row
+        return NextQuestionResponse(
+            question=self._to_response(db_question, include_links),
+            mastery=mastery,
+            expected_success=expected_score(mastery, db_question.difficulty),
+        )
+
+    async def get_due_reviews(
+        self, user_id: int, limit: int, include_links: bool = True
+    ) -> List[DueReviewResponse]:
+        """Get a user's questions that are due for review, most overdue first."""
+        # One range scan of (user_id, due_at), stopped after `limit` rows.
+        rows = (
+            self.db.query(ReviewSchedule, Question)
+            .join(Question, Question.id == ReviewSchedule.question_id)
+            .filter(
+                ReviewSchedule.user_id == user_id,
+                ReviewSchedule.due_at <= datetime.now(timezone.utc),
+            )
+            .order_by(ReviewSchedule.due_at)
+            .limit(limit)
+            .all()
+        )
+        return [
+            DueReviewResponse(
+                question=self._to_response(db_question, include_links),
+                due_at=schedule.due_at,
+                interval_days=schedule.interval_days,
+                repetitions=schedule.repetitions,
+            )
+            for schedule, db_question in rows
+        ]
+
+    @traced()
+    async def evaluate_answer(
+        self, question_id: int, answer: str, user_id: Optional[int] = None
+    ) -> AnswerFeedback:
+        """Evaluate a student's answer to a question.
 
-    async def evaluate_answer(self, question_id: int, answer: str) -> AnswerFeedback:
-        """Evaluate a student's answer to a question."""
+        With a `user_id`, the attempt is recorded, the user's mastery of the
+        section is updated and the question's next review is scheduled.
+        """
         # Get the question
         db_question = self.db.query(Question).filter(Question.id == question_id).first()
         if not db_question:
             raise ValueError(f"Question with ID {question_id} not found")
+        if user_id is not None and self.db.get(User, user_id) is None:
+            raise ValueError(f"User with ID {user_id} not found")
+        section_id, difficulty = db_question.section_id, db_question.difficulty
+        text, correct_answer = db_question.text, db_question.correct_answer
+        # End the read transaction so no pooled connection is held while the AI answers.
+        self.db.commit()
         
         # Use AI to evaluate the answer
-        evaluation = await self.ai_service.evaluate_answer(
-            db_question.text, db_question.correct_answer, answer
-        )
+        evaluation = await self.ai_service.evaluate_answer(text, correct_answer, answer)
+        
+        if user_id is not None:
+            self.db.add(
+                QuestionAttempt(
+                    user_id=user_id,
+                    question_id=question_id,
+                    is_correct=evaluation["is_correct"],
+                )
+            )
+            MasteryService(db=self.db).record_outcome(
+                user_id, section_id, difficulty, evaluation["is_correct"]
+            )
+            ReviewService(db=self.db).record_review(user_id, question_id, evaluation["is_correct"])
+            self.db.commit()
         
         return AnswerFeedback(
             is_correct=evaluation["is_correct"],
             feedback=evaluation["feedback"],
-            correct_answer=db_question.correct_answer if not evaluation["is_correct"] else None,
-        )
\ No newline at end of file
+            correct_answer=correct_answer if not evaluation["is_correct"] else None,
+        )
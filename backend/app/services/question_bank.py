@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Set, Tuple
+
+from app.services.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+# Refills take their AI calls through the admission controller as this one
+# client, so together they hold at most GENERATION_MAX_PER_CLIENT slots.
+ADMISSION_CLIENT = "question-bank-refill"
+
+
+class QuestionBankRefills:
+    """Runs question bank top-ups in the background, one at a time per bank.
+
+    A bank is a (section ID, difficulty) pair. Scheduling a bank that is
+    already being refilled is a no-op, so a burst of requests against a low
+    bank triggers a single round of generation.
+    """
+
+    def __init__(self):
+        self._in_flight: Set[Tuple[int, str]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(
+        self, section_id: int, difficulty: str, refill: Callable[[], Awaitable[None]]
+    ) -> bool:
+        """Start `refill` on the running loop unless the bank is already refilling."""
+        key = (section_id, difficulty)
+        if key in self._in_flight:
+            return False
+        self._in_flight.add(key)
+        task = asyncio.create_task(self._run(key, refill))
+        # The loop keeps only weak references to tasks.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, key: Tuple[int, str], refill: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await refill()
+        except AdmissionRejected as e:
+            # The bank stays low, so a later request schedules it again.
+            logger.debug("Skipped refilling question bank for section %s (%s): %s", *key, e.detail)
+        except Exception:
+            logger.exception("Failed to refill question bank for section %s (%s)", *key)
+        finally:
+            self._in_flight.discard(key)
+
+    async def stop(self) -> None:
+        """Cancel refills still running; their questions are simply not stored."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+question_bank_refills = QuestionBankRefills()
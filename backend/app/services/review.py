@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.db.upsert import insert
+from app.models.question import ReviewSchedule
+
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+# SM-2 grades answers 0-5; evaluations are only right or wrong.
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+
+
+def sm2(
+    easiness: float, interval_days: float, repetitions: int, quality: int
+) -> Tuple[float, float, int]:
+    """Apply one SM-2 review; return the new (easiness, interval_days, repetitions)."""
+    if quality >= 3:
+        if repetitions == 0:
+            interval_days = 1.0
+        elif repetitions == 1:
+            interval_days = 6.0
+        else:
+            interval_days = float(round(interval_days * easiness))
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval_days = 1.0
+    easiness += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return max(easiness, MIN_EASINESS), interval_days, repetitions
+
+
+class ReviewService:
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    def record_review(
+        self, user_id: int, question_id: int, is_correct: bool, now: Optional[datetime] = None
+    ) -> datetime:
+        """Reschedule a question after the user answered it; return its next due time.
+
+        Locks the schedule row for the update. The caller commits.
+        """
+        now = now or datetime.now(timezone.utc)
+        stmt = insert(self.db, ReviewSchedule).values(
+            user_id=user_id,
+            question_id=question_id,
+            easiness=INITIAL_EASINESS,
+            interval_days=0.0,
+            repetitions=0,
+            reviewed_at=now,
+            due_at=now,
+        )
+        self.db.execute(stmt.on_conflict_do_nothing())
+        schedule = self.db.get(
+            ReviewSchedule, (user_id, question_id), with_for_update=True, populate_existing=True
+        )
+        schedule.easiness, schedule.interval_days, schedule.repetitions = sm2(
+            schedule.easiness,
+            schedule.interval_days,
+            schedule.repetitions,
+            CORRECT_QUALITY if is_correct else INCORRECT_QUALITY,
+        )
+        schedule.reviewed_at = now
+        schedule.due_at = now + timedelta(days=schedule.interval_days)
+        return schedule.due_at
+
+    def postpone_reviews(
+        self, days: float, user_id: Optional[int] = None, batch_size: int = 1000
+    ) -> int:
+        """Push due dates back by `days`, for one user or everyone; return the row count.
+
+        Rows are walked in primary key order and updated one batch per
+        transaction, so a large reschedule never holds many locks at once.
+        """
+        shift = timedelta(days=days)
+        last_key = None
+        updated = 0
+        while True:
+            query = select(
+                ReviewSchedule.user_id, ReviewSchedule.question_id, ReviewSchedule.due_at
+            )
+            if user_id is not None:
+                query = query.where(ReviewSchedule.user_id == user_id)
+            if last_key is not None:
+                query = query.where(
+                    tuple_(ReviewSchedule.user_id, ReviewSchedule.question_id) > tuple_(*last_key)
+                )
+            rows = self.db.execute(
+                query.order_by(ReviewSchedule.user_id, ReviewSchedule.question_id).limit(batch_size)
+            ).all()
+            if not rows:
+                return updated
+            
+            self.db.execute(
+                update(ReviewSchedule),
+                [
+                    {"user_id": row.user_id, "question_id": row.question_id, "due_at": row.due_at + shift}
+                    for row in rows
+                ],
+            )
+            self.db.commit()
+            updated += len(rows)
+            last_key = (rows[-1].user_id, rows[-1].question_id)
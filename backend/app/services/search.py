@@ -0,0 +1,256 @@
+import html
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import bindparam, func, literal_column, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.db.upsert import insert
+from app.models.search import SearchDocument
+from app.schemas.search import SearchHit
+from app.services.links import LinkTemplate
+
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+SNIPPET_CHARS = 200
+
+SEARCH_LINKS = {
+    "tree": LinkTemplate("/knowledge-tree/{ref_id}", "self"),
+    "section": LinkTemplate("/knowledge-tree/{tree_id}", "tree"),
+    "subsection": LinkTemplate("/lessons/subsection/{ref_id}", "lesson"),
+    "lesson": LinkTemplate("/lessons/{ref_id}", "self"),
+}
+
+_WORD = re.compile(r"\w+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the to what with".split()
+)
+
+
+def _terms(text: str) -> List[str]:
+    """Lowercased words without stop words and with a crude plural stemming."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _snippet(body: str, terms: Sequence[str]) -> str:
+    """A window of `body` around the first query term, HTML-escaped, with matches in <b> tags."""
+    if not body:
+        return ""
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, terms)) + r")\w*", re.IGNORECASE)
+    match = pattern.search(body) if terms else None
+    start = max(0, match.start() - SNIPPET_CHARS // 3) if match else 0
+    window = " ".join(body[start : start + SNIPPET_CHARS].split())
+    if not terms:
+        return html.escape(window)
+    parts = []
+    end = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[end : match.start()]))
+        parts.append(f"<b>{html.escape(match.group(0))}</b>")
+        end = match.end()
+    parts.append(html.escape(window[end:]))
+    return "".join(parts)
+
+
+def _document_vector(title, body):
+    return func.setweight(func.to_tsvector(TEXT_SEARCH_CONFIG, title), "A").op("||")(
+        func.setweight(func.to_tsvector(TEXT_SEARCH_CONFIG, body), "B")
+    )
+
+
+class InvertedIndex:
+    """In-process BM25 index over the search documents, for databases without full-text search.
+
+    Built from the table on first use and kept current by `SearchService`
+    in the same process.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_WEIGHT = 3
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._documents: Dict[int, dict] = {}
+        self._lengths: Dict[int, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, db: Session) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            rows = db.execute(
+                select(
+                    SearchDocument.id,
+                    SearchDocument.kind,
+                    SearchDocument.ref_id,
+                    SearchDocument.tree_id,
+                    SearchDocument.title,
+                    SearchDocument.body,
+                )
+            ).all()
+            for row in rows:
+                self._add(row.id, row._asdict())
+            self._loaded = True
+
+    def update(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            for document in documents:
+                self._add(document["id"], document)
+
+    def _add(self, document_id: int, document: dict) -> None:
+        if document_id in self._documents:
+            self._remove(document_id)
+        counts = Counter(_terms(document["title"]) * self.TITLE_WEIGHT + _terms(document["body"]))
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[document_id] = count
+        self._documents[document_id] = document
+        self._lengths[document_id] = sum(counts.values())
+
+    def _remove(self, document_id: int) -> None:
+        document = self._documents.pop(document_id)
+        del self._lengths[document_id]
+        for term in set(_terms(document["title"]) + _terms(document["body"])):
+            postings = self._postings.get(term, {})
+            postings.pop(document_id, None)
+            if not postings:
+                self._postings.pop(term, None)
+
+    def search(self, terms: Sequence[str], kinds: Optional[Sequence[str]], limit: int) -> List[tuple]:
+        """Return (document, score) pairs, best first."""
+        with self._lock:
+            total = len(self._documents)
+            if not total:
+                return []
+            average_length = sum(self._lengths.values()) / total
+            scores: Dict[int, float] = {}
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for document_id, count in postings.items():
+                    norm = 1 - self.B + self.B * self._lengths[document_id] / average_length
+                    scores[document_id] = scores.get(document_id, 0.0) + idf * (
+                        count * (self.K1 + 1) / (count + self.K1 * norm)
+                    )
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            hits = []
+            for document_id, score in ranked:
+                document = self._documents[document_id]
+                if kinds and document["kind"] not in kinds:
+                    continue
+                hits.append((document, score))
+                if len(hits) == limit:
+                    break
+            return hits
+
+
+inverted_index = InvertedIndex()
+
+
+class SearchService:
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db = db
+
+    @property
+    def _postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def index_documents(self, documents: List[dict]) -> None:
+        """Insert or replace search documents; the caller commits.
+
+        Each document has `kind`, `ref_id`, `tree_id`, `title` and `body`.
+        """
+        if not documents:
+            return
+        rows = [
+            {**document, "title": document["title"] or "", "body": document["body"] or ""}
+            for document in documents
+        ]
+        table = SearchDocument.__table__
+        values = {column: bindparam(column) for column in ("kind", "ref_id", "tree_id", "title", "body")}
+        if self._postgres:
+            # `body` is bound compressed, so the vector takes the text under its own name.
+            values["document"] = _document_vector(bindparam("title"), bindparam("text"))
+            rows = [{**row, "text": row["body"]} for row in rows]
+        stmt = insert(self.db, table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.kind, table.c.ref_id],
+            set_={column: stmt.excluded[column] for column in values if column not in ("kind", "ref_id")},
+        )
+        self.db.execute(stmt, rows)
+
+        if inverted_index.loaded:
+            ids = {
+                (row.kind, row.ref_id): row.id
+                for row in self.db.execute(
+                    select(SearchDocument.kind, SearchDocument.ref_id, SearchDocument.id).where(
+                        tuple_(SearchDocument.kind, SearchDocument.ref_id).in_(
+                            [(row["kind"], row["ref_id"]) for row in rows]
+                        )
+                    )
+                )
+            }
+            inverted_index.update({**row, "id": ids[(row["kind"], row["ref_id"])]} for row in rows)
+
+    async def search(
+        self, query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20
+    ) -> List[SearchHit]:
+        """Search trees, sections, subsections and lessons, best match first."""
+        terms = _terms(query)
+        if not terms:
+            return []
+        if self._postgres:
+            hits = self._search_postgres(query, kinds, limit)
+        else:
+            inverted_index.load(self.db)
+            hits = [
+                {**document, "rank": score}
+                for document, score in inverted_index.search(terms, kinds, limit)
+            ]
+
+        return [
+            SearchHit(
+                kind=hit["kind"],
+                id=hit["ref_id"],
+                tree_id=hit["tree_id"],
+                title=hit["title"],
+                snippet=_snippet(hit["body"], terms),
+                rank=hit["rank"],
+                links=[SEARCH_LINKS[hit["kind"]].render(ref_id=hit["ref_id"], tree_id=hit["tree_id"])],
+            )
+            for hit in hits
+        ]
+
+    def _search_postgres(self, query: str, kinds: Optional[Sequence[str]], limit: int) -> List[dict]:
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(SearchDocument.document, tsquery)
+        matches = select(
+            SearchDocument.kind,
+            SearchDocument.ref_id,
+            SearchDocument.tree_id,
+            SearchDocument.title,
+            SearchDocument.body,
+            rank.label("rank"),
+        ).where(SearchDocument.document.op("@@")(tsquery))
+        if kinds:
+            matches = matches.where(SearchDocument.kind.in_(kinds))
+        rows = self.db.execute(matches.order_by(rank.desc()).limit(limit)).all()
+        return [row._asdict() for row in rows]
@@ -0,0 +1,112 @@
+import re
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.knowledge_tree import Subsection
+
+_WORD = re.compile(r"\w+")
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Unit vector of the hashed character trigrams and words of `text`.
+
+    Each feature is hashed to a column with a hash-dependent sign, so
+    colliding features tend to cancel out rather than add up.
+    """
+    words = _WORD.findall(text.lower())
+    padded = f" {' '.join(words)} "
+    features = [padded[i : i + 3] for i in range(len(padded) - 2)] + words
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode()) for feature in features), dtype=np.uint32, count=len(features)
+    )
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector += np.bincount(hashes % dim, weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def subsection_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''}\n{description or ''}"
+
+
+class SubsectionIndex:
+    """In-memory cosine similarity index over subsection titles and descriptions.
+
+    Rows live in a preallocated NumPy matrix that grows by doubling, so a
+    search is one matrix-vector product. The index loads lazily and catches
+    up with subsections created since the last refresh (by any process) by
+    fetching the IDs above the highest one it holds.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        self._last_id = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def refresh(self, db: Session) -> int:
+        """Index the subsections created since the last refresh; return how many."""
+        with self._lock:
+            rows = (
+                db.query(Subsection.id, Subsection.title, Subsection.description)
+                .filter(Subsection.id > self._last_id)
+                .order_by(Subsection.id)
+                .all()
+            )
+            if rows:
+                self._append(
+                    [row.id for row in rows],
+                    [embed(subsection_text(row.title, row.description), self.dim) for row in rows],
+                )
+                self._last_id = rows[-1].id
+            self._loaded = True
+            return len(rows)
+
+    def _append(self, ids: List[int], vectors: List[np.ndarray]) -> None:
+        needed = self._size + len(ids)
+        if needed > len(self._ids):
+            capacity = max(needed, 2 * len(self._ids), 1024)
+            ids_buffer = np.empty(capacity, dtype=np.int64)
+            matrix = np.empty((capacity, self.dim), dtype=np.float32)
+            ids_buffer[: self._size] = self._ids[: self._size]
+            matrix[: self._size] = self._matrix[: self._size]
+            self._ids, self._matrix = ids_buffer, matrix
+        self._ids[self._size : needed] = ids
+        self._matrix[self._size : needed] = np.stack(vectors)
+        self._size = needed
+
+    def search(
+        self, vector: np.ndarray, k: int, exclude_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """The `k` most similar subsections as (ID, cosine similarity), best first."""
+        with self._lock:
+            if not self._size:
+                return []
+            ids = self._ids[: self._size]
+            scores = self._matrix[: self._size] @ vector
+            if exclude_id is not None:
+                scores = np.where(ids == exclude_id, -np.inf, scores)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])
+            ]
+
+
+subsection_index = SubsectionIndex(settings.SIMILARITY_INDEX_DIM)
@@ -1,17 +1,31 @@
 from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
-import json
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 from app.db.session import get_db
-from app.models.user import User, UserProgress
-from app.schemas.user import UserCreate, UserResponse, UserProgressUpdate, UserProgressResponse
+from app.models.knowledge_tree import Subsection
+from app.models.user import User, SubsectionProgress
+from app.schemas.user import (
+    UserCreate,
+    UserProgressAck,
+    UserProgressResponse,
+    UserProgressUpdate,
+    UserResponse,
+)
 from app.core.security import get_password_hash
+from app.services.progress_buffer import ProgressBuffer, get_progress_buffer, progress_upsert
 
 
 class UserService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(
+        self,
+        db: Session = Depends(get_db),
+        progress_buffer: Optional[ProgressBuffer] = Depends(get_progress_buffer),
+    ):
         self.db = db
+        self.progress_buffer = progress_buffer
 
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """Create a new user."""
@@ -28,16 +42,6 @@ class UserService:
             hashed_password=hashed_password,
         )
         self.db.add(db_user)
-        self.db.flush()
-        
-        # Create empty progress for the user
-        db_progress = UserProgress(
-            user_id=db_user.id,
-            completed_subsections=[],
-            scores={},
-        )
-        self.db.add(db_progress)
-        
         self.db.commit()
         self.db.refresh(db_user)
         
@@ -61,53 +65,124 @@ class UserService:
 
     async def update_progress(
         self, user_id: int, progress_data: UserProgressUpdate
-    ) -> UserProgressResponse:
-        """Update a user's progress."""
-        # Check if the user exists
-        db_user = self.db.query(User).filter(User.id == user_id).first()
-        if not db_user:
-            raise ValueError(f"User with ID {user_id} not found")
-        
-        # Get or create the user's progress
-        db_progress = self.db.query(UserProgress).filter(UserProgress.user_id == user_id).first()
-        if not db_progress:
-            db_progress = UserProgress(
+    ) -> Union[UserProgressResponse, UserProgressAck]:
+        """Update a user's progress.
+
+        With the write-behind buffer the update is only acknowledged, so the
+        request costs one primary-key lookup however much progress the user
+        has; otherwise it is written and the user's progress returned.
+        """
+        if self.progress_buffer is not None:
+            # Buffered writes are flushed in batches, after this request has
+            # answered, so the user and subsection are checked up front.
+            user_exists, subsection_exists = self._user_and_subsection_exist(
+                user_id, progress_data.subsection_id
+            )
+            if not user_exists:
+                raise ValueError(f"User with ID {user_id} not found")
+            if not subsection_exists:
+                raise ValueError(f"Subsection with ID {progress_data.subsection_id} not found")
+            self.progress_buffer.add(
+                user_id,
+                progress_data.subsection_id,
+                progress_data.completed,
+                progress_data.score,
+            )
+            return UserProgressAck(
                 user_id=user_id,
-                completed_subsections=[],
-                scores={},
+                subsection_id=progress_data.subsection_id,
+                completed=progress_data.completed,
+                score=progress_data.score,
             )
-            self.db.add(db_progress)
-            self.db.flush()
         
-        # Update the progress
-        subsection_id_str = str(progress_data.subsection_id)
+        try:
+            self.db.execute(
+                progress_upsert(self.db),
+                [
+                    {
+                        "user_id": user_id,
+                        "subsection_id": progress_data.subsection_id,
+                        "completed": progress_data.completed,
+                        "score": progress_data.score,
+                    }
+                ],
+            )
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError(
+                f"User with ID {user_id} or subsection with ID "
+                f"{progress_data.subsection_id} not found"
+            )
         
-        if progress_data.completed:
-            if progress_data.subsection_id not in db_progress.completed_subsections:
-                db_progress.completed_subsections.append(progress_data.subsection_id)
+        return await self.get_progress(user_id)
+
+    def _load_progress(self, user_id: int) -> Optional[Dict[int, Any]]:
+        """Load a user's stored progress as subsection ID -> (completed, score).
+
+        Returns None for an unknown user. The outer join from users tells an
+        unknown user and a user without progress apart in the same round trip.
+        """
+        rows = (
+            self.db.query(
+                SubsectionProgress.subsection_id,
+                SubsectionProgress.completed,
+                SubsectionProgress.score,
+            )
+            .select_from(User)
+            .outerjoin(SubsectionProgress, SubsectionProgress.user_id == User.id)
+            .filter(User.id == user_id)
+            .all()
+        )
+        if not rows:
+            return None
         
-        if progress_data.score is not None:
-            scores = db_progress.scores if db_progress.scores else {}
-            scores[subsection_id_str] = progress_data.score
-            db_progress.scores = scores
+        return {
+            row.subsection_id: (row.completed, row.score)
+            for row in rows
+            if row.subsection_id is not None
+        }
+
+    def _user_and_subsection_exist(self, user_id: int, subsection_id: int) -> Tuple[bool, bool]:
+        """Look both IDs up by primary key in one round trip."""
+        return tuple(
+            self.db.execute(
+                select(
+                    select(User.id).where(User.id == user_id).exists(),
+                    select(Subsection.id).where(Subsection.id == subsection_id).exists(),
+                )
+            ).one()
+        )
+
+    def _progress_response(self, user_id: int, progress: Dict[int, Any]) -> UserProgressResponse:
+        """Build a progress response, including updates that are not flushed yet."""
+        if self.progress_buffer is not None:
+            for subsection_id, pending in self.progress_buffer.overlay(user_id).items():
+                completed, score = progress.get(subsection_id, (False, None))
+                progress[subsection_id] = (
+                    completed or pending.completed,
+                    pending.score if pending.score is not None else score,
+                )
         
-        self.db.commit()
-        self.db.refresh(db_progress)
+        completed_subsections = []
+        scores = {}
+        for subsection_id in sorted(progress):
+            completed, score = progress[subsection_id]
+            if completed:
+                completed_subsections.append(subsection_id)
+            if score is not None:
+                scores[str(subsection_id)] = score
         
         return UserProgressResponse(
-            user_id=db_progress.user_id,
-            completed_subsections=db_progress.completed_subsections,
-            scores=db_progress.scores,
+            user_id=user_id,
+            completed_subsections=completed_subsections,
+            scores=scores,
         )
 
     async def get_progress(self, user_id: int) -> Optional[UserProgressResponse]:
         """Get a user's progress."""
-        db_progress = self.db.query(UserProgress).filter(UserProgress.user_id == user_id).first()
-        if not db_progress:
+        progress = self._load_progress(user_id)
+        if progress is None:
             return None
         
-        return UserProgressResponse(
-            user_id=db_progress.user_id,
-            completed_subsections=db_progress.completed_subsections,
-            scores=db_progress.scores,
-        )
\ No newline at end of file
+        return self._progress_response(user_id, progress)
@@ -0,0 +1,104 @@
+"""Microbenchmark: serialization and compression of lesson responses.
+
+Compares FastAPI's default path for a handler that returns a model with a
+`response_model` (re-validate, `jsonable_encoder`, stdlib `json`) with
+`FastJSONResponse`, which serializes the already-validated model once, and
+reports the cost of each compression option on top.
+
+Usage: python -m benchmarks.bench_lesson_response [--iterations N]
+"""
+import argparse
+import json
+import time
+import zlib
+from typing import Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.responses import FastJSONResponse
+from app.schemas.lesson import HATEOASLink, LessonResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SIZES_KB = [10, 20, 30]
+
+
+def make_lesson(size_kb: int) -> LessonResponse:
+    paragraph = (
+        "Variables name values so that a program can refer to them later. "
+        "Each value has a type, which decides the operations it supports.\n\n"
+    )
+    sections = []
+    while sum(map(len, sections)) < size_kb * 1024:
+        sections.append(f"## Topic {len(sections) + 1}\n\n{paragraph * 4}```python\nx = 42\n```\n\n")
+    return LessonResponse(
+        id=1,
+        subsection_id=1,
+        section_id=1,
+        section_title="Variables and Data Types",
+        content="".join(sections),
+        multimedia_urls=[],
+        links=[
+            HATEOASLink(href="/api/v1/lessons/1", rel="self", method="GET"),
+            HATEOASLink(href="/api/v1/questions/section/1", rel="practice-questions", method="GET"),
+            HATEOASLink(href="/api/v1/questions/", rel="create-questions", method="POST"),
+        ],
+    )
+
+
+def default_path(lesson: LessonResponse) -> bytes:
+    validated = LessonResponse.model_validate(lesson.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(lesson: LessonResponse) -> bytes:
+    return FastJSONResponse(lesson).body
+
+
+def measure(func: Callable[[], bytes], iterations: int) -> Tuple[float, float, int]:
+    """Return (wall seconds, CPU seconds, output size) for `iterations` calls."""
+    func()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        size = len(func())
+    return time.perf_counter() - wall, time.process_time() - cpu, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'case':<34} {'size':>8} {'req/s':>10} {'MB/s':>9} {'CPU us/req':>11}")
+    for size_kb in SIZES_KB:
+        lesson = make_lesson(size_kb)
+        body = fast_path(lesson)
+        assert json.loads(body) == json.loads(default_path(lesson))
+
+        cases: List[Tuple[str, Callable[[], bytes]]] = [
+            ("default (validate + json)", lambda: default_path(lesson)),
+            ("FastJSONResponse", lambda: fast_path(lesson)),
+            ("FastJSONResponse + gzip-6", lambda: zlib.compress(fast_path(lesson), 6)),
+        ]
+        if brotli is not None:
+            cases.append(
+                ("FastJSONResponse + br-4", lambda: brotli.compress(fast_path(lesson), quality=4))
+            )
+
+        for name, func in cases:
+            wall, cpu, size = measure(func, args.iterations)
+            print(
+                f"{name + f' [{size_kb} KB]':<34} {size:>8} "
+                f"{args.iterations / wall:>10.0f} "
+                f"{len(body) * args.iterations / wall / 1e6:>9.1f} "
+                f"{cpu / args.iterations * 1e6:>11.1f}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Microbenchmark: construction, validation and serialization of response models.
+
+Covers knowledge trees of 10 to 5,000 nodes (`KnowledgeTreeResponse` with
+nested sections, subsections and their HATEOAS links) and question lists of
+10 to 10,000 items. For each size it times:
+
+- construct: building the models from rows the way the services do,
+- validate: `model_validate` of the equivalent dicts, as a `response_model`
+  pass does, and `model_validate_json` of the serialized body,
+- serialize: `FastJSONResponse` rendering, and the default `response_model`
+  path (validate, `jsonable_encoder`, stdlib `json`) for reference.
+
+With --record the results are appended to a JSON-lines history, and every
+run shows the change against the last recorded one, so a schema change that
+makes responses slower shows up in the diff of the history file.
+
+Usage: python -m benchmarks.bench_response_models [--record] [--min-time S]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pydantic
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.api.responses import FastJSONResponse
+from app.schemas.knowledge_tree import KnowledgeTreeResponse, SectionResponse, SubsectionResponse
+from app.schemas.question import QuestionResponse
+from app.services.links import (
+    QUESTION_LINKS,
+    SECTION_LINKS,
+    SUBSECTION_LINKS,
+    TREE_LINKS,
+    render_links,
+)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(BENCHMARKS_DIR, "baselines", "response_models.jsonl")
+
+TREE_SIZES = [10, 100, 1000, 5000]
+QUESTION_SIZES = [10, 100, 1000, 10000]
+SUBSECTIONS_PER_SECTION = 9
+
+QuestionList = TypeAdapter(List[QuestionResponse])
+
+DESCRIPTION = (
+    "Covers the core ideas of the topic with worked examples and the mistakes "
+    "learners most often make along the way."
+)
+
+
+def make_tree_rows(nodes: int) -> SimpleNamespace:
+    """Rows shaped like the ORM objects: one tree, sections of nine subsections."""
+    sections = []
+    for i in range(max(1, round((nodes - 1) / (SUBSECTIONS_PER_SECTION + 1)))):
+        subsections = [
+            SimpleNamespace(id=i * 100 + j, title=f"Subsection {i}.{j}", description=DESCRIPTION)
+            for j in range(SUBSECTIONS_PER_SECTION)
+        ]
+        sections.append(
+            SimpleNamespace(id=i, title=f"Section {i}", description=DESCRIPTION, subsections=subsections)
+        )
+    return SimpleNamespace(id=1, topic="Python programming", sections=sections)
+
+
+def tree_nodes(rows: SimpleNamespace) -> int:
+    return 1 + sum(1 + len(section.subsections) for section in rows.sections)
+
+
+def build_tree(rows: SimpleNamespace) -> KnowledgeTreeResponse:
+    # Mirrors KnowledgeTreeService.get_knowledge_tree.
+    return KnowledgeTreeResponse(
+        id=rows.id,
+        topic=rows.topic,
+        sections=[
+            SectionResponse(
+                id=section.id,
+                tree_id=rows.id,
+                title=section.title,
+                description=section.description,
+                subsections=[
+                    SubsectionResponse(
+                        id=subsection.id,
+                        section_id=section.id,
+                        title=subsection.title,
+                        description=subsection.description,
+                        links=render_links(SUBSECTION_LINKS, subsection_id=subsection.id),
+                    )
+                    for subsection in section.subsections
+                ],
+                links=render_links(SECTION_LINKS, section_id=section.id),
+            )
+            for section in rows.sections
+        ],
+        links=render_links(TREE_LINKS, tree_id=rows.id),
+    )
+
+
+def make_question_rows(count: int) -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=i,
+            section_id=i // 30,
+            text=f"Question {i}: explain how the idea applies to a small example.",
+            difficulty=("easy", "medium", "hard")[i % 3],
+            correct_answer="It names a value so that later code can refer to it.",
+        )
+        for i in range(count)
+    ]
+
+
+def build_questions(rows: List[SimpleNamespace]) -> List[QuestionResponse]:
+    # Mirrors QuestionService._to_response.
+    questions = []
+    for row in rows:
+        question = QuestionResponse(
+            id=row.id,
+            section_id=row.section_id,
+            text=row.text,
+            difficulty=row.difficulty,
+            correct_answer=row.correct_answer,
+        )
+        question.links = render_links(QUESTION_LINKS, question_id=row.id, section_id=row.section_id)
+        questions.append(question)
+    return questions
+
+
+def default_path(content, validate: Callable) -> bytes:
+    return JSONResponse(jsonable_encoder(validate(content))).body
+
+
+def tree_cases(nodes: int) -> Tuple[int, Dict[str, Callable[[], object]]]:
+    rows = make_tree_rows(nodes)
+    tree = build_tree(rows)
+    data = tree.model_dump()
+    body = FastJSONResponse(tree).body
+    validate = lambda content: KnowledgeTreeResponse.model_validate(content.model_dump())
+    assert json.loads(body) == json.loads(default_path(tree, validate))
+    return tree_nodes(rows), {
+        "construct": lambda: build_tree(rows),
+        "validate": lambda: KnowledgeTreeResponse.model_validate(data),
+        "validate_json": lambda: KnowledgeTreeResponse.model_validate_json(body),
+        "serialize": lambda: FastJSONResponse(tree).body,
+        "response_model": lambda: default_path(tree, validate),
+    }
+
+
+def question_cases(count: int) -> Tuple[int, Dict[str, Callable[[], object]]]:
+    rows = make_question_rows(count)
+    questions = build_questions(rows)
+    data = QuestionList.dump_python(questions)
+    body = FastJSONResponse(questions).body
+    validate = lambda content: QuestionList.validate_python(QuestionList.dump_python(content))
+    assert json.loads(body) == json.loads(default_path(questions, validate))
+    return count, {
+        "construct": lambda: build_questions(rows),
+        "validate": lambda: QuestionList.validate_python(data),
+        "validate_json": lambda: QuestionList.validate_json(body),
+        "serialize": lambda: FastJSONResponse(questions).body,
+        "response_model": lambda: default_path(questions, validate),
+    }
+
+
+def measure(func: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Best seconds per call over `repeat` rounds of at least `min_time` each."""
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def last_run(history: str) -> Dict[str, float]:
+    if not os.path.exists(history):
+        return {}
+    with open(history) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1])["results"] if lines else {}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per case; the best is kept")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--record", action="store_true", help="append this run to the history")
+    args = parser.parse_args()
+
+    previous = last_run(args.history)
+    results: Dict[str, float] = {}
+    print(f"{'case':<34} {'us/op':>12} {'ns/item':>9} {'previous':>12} {'change':>8}")
+    suites = (("tree", TREE_SIZES, tree_cases), ("questions", QUESTION_SIZES, question_cases))
+    for suite, sizes, make_cases in suites:
+        for size in sizes:
+            items, cases = make_cases(size)
+            for name, func in cases.items():
+                key = f"{suite}[{size}].{name}"
+                us = measure(func, args.min_time, args.repeat) * 1e6
+                results[key] = round(us, 2)
+                before = previous.get(key)
+                change = f"{(us - before) / before:+.1%}" if before else ""
+                print(
+                    f"{key:<34} {us:>12.1f} {us * 1000 / items:>9.0f} "
+                    f"{before if before is not None else '':>12} {change:>8}"
+                )
+            print()
+
+    if args.record:
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pydantic": pydantic.VERSION,
+            "machine": platform.machine(),
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"Recorded in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark: storage size and read latency of compressed lesson text.
+
+Stores the same generated lessons in a plain `Text` column and in a
+`CompressedText` column, then reports the stored bytes and the latency of
+reading one lesson by primary key and of reading them all.
+
+Usage: python -m benchmarks.bench_text_compression [--lessons N] [--database-url URL]
+
+The default database is a temporary SQLite file. With a PostgreSQL URL the
+tables are created and dropped in that database; sizes then include TOAST.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, func, select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db import types
+from app.db.types import CompressedText
+
+SIZES_KB = [1, 4, 10, 30]
+PARAGRAPHS = [
+    "Variables name values so that a program can refer to them later. ",
+    "Each value has a type, which decides the operations it supports. ",
+    "A function groups statements under a name and can be called many times. ",
+    "Lists keep their items in order, while sets only keep unique ones. ",
+    "Exceptions stop the normal flow and unwind until a handler catches them. ",
+]
+
+
+def make_lesson(size_kb: int, rng: random.Random) -> str:
+    parts = []
+    while sum(map(len, parts)) < size_kb * 1024:
+        body = "".join(rng.choice(PARAGRAPHS) for _ in range(8))
+        code = f"```python\nx = {rng.randint(0, 99)}\n```"
+        parts.append(f"## Topic {len(parts) + 1}\n\n{body}\n\n{code}\n\n")
+    return "".join(parts)
+
+
+def stored_bytes(engine: Engine, table: Table) -> int:
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            return connection.execute(select(func.pg_total_relation_size(table.name))).scalar()
+        return connection.execute(select(func.sum(func.length(table.c.content)))).scalar()
+
+
+def latencies(func: Callable[[], None], iterations: int) -> List[float]:
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    directory = None
+    url = args.database_url
+    if url is None:
+        directory = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(directory.name, "bench.db")
+    engine = create_engine(url)
+    codec = "zstd" if types.zstandard is not None else "zlib"
+    print(f"{engine.dialect.name}, {codec}, threshold {settings.TEXT_COMPRESSION_MIN_SIZE} B")
+    print(
+        f"{'case':<24} {'raw KB':>9} {'stored KB':>10} {'ratio':>6} "
+        f"{'get p50 us':>11} {'get p99 us':>11} {'scan ms':>8}"
+    )
+
+    rng = random.Random(42)
+    for size_kb in SIZES_KB:
+        lessons = [make_lesson(size_kb, rng) for _ in range(args.lessons)]
+        raw = sum(len(lesson.encode("utf-8")) for lesson in lessons)
+        for name, column_type in (("text", Text), ("compressed", CompressedText)):
+            metadata = MetaData()
+            table = Table(
+                f"bench_{name}",
+                metadata,
+                Column("id", Integer, primary_key=True),
+                Column("content", column_type),
+            )
+            metadata.drop_all(engine)
+            metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(
+                    table.insert(), [{"id": i, "content": lesson} for i, lesson in enumerate(lessons)]
+                )
+            size = stored_bytes(engine, table)
+
+            with engine.connect() as connection:
+                ids = [rng.randrange(args.lessons) for _ in range(args.iterations + 1)]
+                pick = iter(ids)
+                one = latencies(
+                    lambda: connection.execute(
+                        select(table.c.content).where(table.c.id == next(pick))
+                    ).scalar_one(),
+                    args.iterations,
+                )
+                scan = latencies(
+                    lambda: connection.execute(select(table.c.content)).scalars().all(),
+                    max(1, args.iterations // 50),
+                )
+                first = select(table.c.content).where(table.c.id == 0)
+                assert connection.execute(first).scalar_one() == lessons[0]
+            metadata.drop_all(engine)
+
+            quantiles = statistics.quantiles(one, n=100)
+            print(
+                f"{name + f' [{size_kb} KB]':<24} {raw / 1024:>9.0f} {size / 1024:>10.0f} "
+                f"{raw / size:>6.1f} {quantiles[49] * 1e6:>11.0f} {quantiles[98] * 1e6:>11.0f} "
+                f"{statistics.median(scan) * 1e3:>8.1f}"
+            )
+        print()
+
+    if directory is not None:
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""Load benchmark: a realistic request mix against a locally started server.
+
+Starts uvicorn with the fake AI provider on a fresh SQLite database migrated
+to head, then runs `--users` virtual users for `--duration` seconds. Each
+user signs up, sends a bearer token for its account and picks scenarios from a weighted
+mix: create a tree, read a tree, open a subsection's lesson (generated on
+first read), generate questions, answer one and record progress. The mix
+runs unmeasured for `--warmup` seconds first. Reports throughput (requests
+not shed by admission control) and p50/p95/p99 latency per scenario.
+
+With --baseline the run is compared with a stored one, and the process exits
+with status 1 if a scenario's p50 or p95 got slower, failed or was shed more
+often, or the throughput dropped by more than --tolerance. --save-baseline
+stores the run instead.
+
+Usage: python -m benchmarks.load_test [--users N] [--duration S] [--baseline PATH]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.security import create_access_token
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baselines", "load_test.json")
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "create_tree": 1,
+    "read_tree": 10,
+    "lesson": 6,
+    "questions": 3,
+    "evaluate": 4,
+    "progress": 6,
+}
+TOPICS = [
+    "Python programming", "Linear algebra", "Organic chemistry", "World history",
+    "Music theory", "Machine learning", "Microeconomics", "Cell biology",
+]
+# Shed by admission control; counted apart from errors.
+REJECTED = {429, 503}
+# Latency changes below this are noise on any machine.
+MIN_REGRESSION_MS = 5.0
+# Error and rejection rates may rise this much before it counts.
+MIN_RATE_REGRESSION = 0.01
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted `samples`."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    async def request(
+        self, client: httpx.AsyncClient, scenario: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - start
+        if not self.recording:
+            return response if response is not None and response.is_success else None
+        if response is None or (response.status_code >= 400 and response.status_code not in REJECTED):
+            self.errors[scenario] += 1
+        elif response.status_code in REJECTED:
+            self.rejected[scenario] += 1
+        else:
+            self.latencies[scenario].append(elapsed * 1000)
+        return response if response is not None and response.is_success else None
+
+    def summary(self, seconds: float) -> Dict:
+        scenarios = {}
+        for name in sorted(set(self.latencies) | set(self.errors) | set(self.rejected)):
+            samples = sorted(self.latencies[name])
+            total = len(samples) + self.errors[name] + self.rejected[name]
+            scenarios[name] = {
+                "requests": total,
+                # Only requests the server handled; shedding load is not throughput.
+                "throughput": round((total - self.rejected[name]) / seconds, 2),
+                "error_rate": round(self.errors[name] / total, 4),
+                "rejected_rate": round(self.rejected[name] / total, 4),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+            }
+        served = sum(len(self.latencies[name]) + self.errors[name] for name in scenarios)
+        return {"seconds": round(seconds, 2), "throughput": round(served / seconds, 2), "scenarios": scenarios}
+
+
+class State:
+    """What the users have created so far, for the scenarios that read it."""
+
+    def __init__(self):
+        self.trees: List[int] = []
+        self.sections: List[Tuple[int, str]] = []
+        self.subsections: List[Tuple[int, str]] = []
+        self.questions: List[Tuple[int, str]] = []
+
+    def add_tree(self, tree: Dict) -> None:
+        self.trees.append(tree["id"])
+        for section in tree["sections"]:
+            self.sections.append((section["id"], section["title"]))
+            for subsection in section["subsections"]:
+                self.subsections.append((subsection["id"], subsection["title"]))
+
+
+class VirtualUser:
+    def __init__(self, index: int, client: httpx.AsyncClient, state: State, recorder: Recorder, seed: int):
+        self.client = client
+        self.state = state
+        self.recorder = recorder
+        self.rng = random.Random(f"{seed}:{index}")
+        self.headers: Dict[str, str] = {}
+        self.index = index
+        self.user_id: Optional[int] = None
+
+    async def call(self, scenario: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        return await self.recorder.request(
+            self.client, scenario, method, API + url, headers=self.headers, **kwargs
+        )
+
+    async def sign_up(self, run_id: str) -> None:
+        response = await self.call(
+            "sign_up",
+            "POST",
+            "/users/",
+            json={
+                "email": f"load-{run_id}-{self.index}@example.com",
+                "name": f"Load user {self.index}",
+                "password": "load-test-password",
+            },
+        )
+        if response is not None:
+            self.user_id = response.json()["id"]
+            # Admission control counts each virtual user as its own client.
+            self.headers = {"Authorization": f"Bearer {create_access_token(self.user_id)}"}
+
+    async def create_tree(self) -> None:
+        response = await self.call(
+            "create_tree", "POST", "/knowledge-tree/", json={"topic": self.rng.choice(TOPICS)}
+        )
+        if response is not None:
+            self.state.add_tree(response.json())
+
+    async def read_tree(self) -> None:
+        await self.call("read_tree", "GET", f"/knowledge-tree/{self.rng.choice(self.state.trees)}")
+
+    async def lesson(self) -> None:
+        subsection_id, _ = self.rng.choice(self.state.subsections)
+        await self.call("lesson", "GET", f"/lessons/subsection/{subsection_id}")
+
+    async def questions(self) -> None:
+        section_id, title = self.rng.choice(self.state.sections)
+        response = await self.call(
+            "questions",
+            "POST",
+            "/questions/",
+            json={
+                "section_id": section_id,
+                "section_title": title,
+                "difficulty": self.rng.choice(["easy", "medium", "hard"]),
+                "user_id": self.user_id,
+            },
+        )
+        if response is not None:
+            self.state.questions.extend((q["id"], q["correct_answer"]) for q in response.json())
+
+    async def evaluate(self) -> None:
+        question_id, correct_answer = self.rng.choice(self.state.questions)
+        answer = correct_answer if self.rng.random() < 0.6 else "I am not sure."
+        await self.call(
+            "evaluate",
+            "POST",
+            "/questions/evaluate",
+            json={"question_id": question_id, "answer": answer, "user_id": self.user_id},
+        )
+
+    async def progress(self) -> None:
+        subsection_id, _ = self.rng.choice(self.state.subsections)
+        await self.call(
+            "progress",
+            "POST",
+            f"/users/{self.user_id}/progress",
+            json={
+                "subsection_id": subsection_id,
+                "completed": True,
+                "score": round(self.rng.random(), 2),
+            },
+        )
+
+    def pick(self, mix: Dict[str, int]) -> str:
+        scenario = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+        # Fall back to producing what the scenario needs.
+        if scenario == "evaluate" and not self.state.questions:
+            scenario = "questions"
+        if scenario == "progress" and self.user_id is None:
+            scenario = "read_tree"
+        if scenario != "create_tree" and not self.state.trees:
+            scenario = "create_tree"
+        return scenario
+
+    async def run(self, mix: Dict[str, int], deadline: float) -> None:
+        while time.monotonic() < deadline:
+            await getattr(self, self.pick(mix))()
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env(args: argparse.Namespace, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        SQLALCHEMY_DATABASE_URI=database_url,
+        SQLALCHEMY_READ_REPLICA_URI="",
+        AI_PROVIDER="fake",
+        FAKE_AI_SEED=str(args.seed),
+        FAKE_AI_LATENCY_MS=str(args.ai_latency_ms),
+        FAKE_AI_TOKENS_PER_SECOND=str(args.ai_tokens_per_second),
+    )
+    return env
+
+
+def start_server(args: argparse.Namespace, env: Dict[str, str], port: int) -> subprocess.Popen:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True,
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+async def drive(args: argparse.Namespace, base_url: str) -> Dict:
+    state = State()
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        users = [VirtualUser(i, client, state, recorder, args.seed) for i in range(args.users)]
+        # Warm up unrecorded: accounts and a few trees to read from.
+        run_id = f"{int(time.time())}-{os.getpid()}"
+        await asyncio.gather(*(user.sign_up(run_id) for user in users))
+        for user in users[: args.seed_trees]:
+            await user.create_tree()
+        if not state.trees:
+            raise RuntimeError("Could not create the seed trees; is the server healthy?")
+
+        # Run the mix unrecorded first, until the lessons and banks it hits settle.
+        await asyncio.gather(*(user.run(args.mix, time.monotonic() + args.warmup) for user in users))
+
+        recorder.recording = True
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(user.run(args.mix, deadline) for user in users))
+        return recorder.summary(time.monotonic() - started)
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of `result` against `baseline`, as readable lines."""
+    regressions = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {result['throughput']:.1f} req/s < baseline {baseline['throughput']:.1f}"
+        )
+    for name, expected in baseline["scenarios"].items():
+        actual = result["scenarios"].get(name)
+        if actual is None:
+            regressions.append(f"{name}: not exercised")
+            continue
+        # p99 is reported but too noisy over a short run to gate on.
+        for key in ("p50_ms", "p95_ms"):
+            limit = max(expected[key] * (1 + tolerance), expected[key] + MIN_REGRESSION_MS)
+            if actual[key] > limit:
+                regressions.append(f"{name}: {key} {actual[key]:.1f} > baseline {expected[key]:.1f}")
+        if actual["error_rate"] > expected["error_rate"] + MIN_RATE_REGRESSION:
+            regressions.append(
+                f"{name}: error rate {actual['error_rate']:.2%} > baseline {expected['error_rate']:.2%}"
+            )
+        expected_rejected = expected.get("rejected_rate", 0.0)
+        limit = max(expected_rejected * (1 + tolerance), expected_rejected + MIN_RATE_REGRESSION)
+        if actual["rejected_rate"] > limit:
+            regressions.append(
+                f"{name}: rejected rate {actual['rejected_rate']:.2%} > baseline {expected_rejected:.2%}"
+            )
+    return regressions
+
+
+def print_summary(result: Dict) -> None:
+    print(
+        f"{'scenario':<12} {'requests':>9} {'req/s':>8} {'errors':>7} {'shed':>6} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, s in result["scenarios"].items():
+        print(
+            f"{name:<12} {s['requests']:>9} {s['throughput']:>8.1f} {s['error_rate']:>7.1%} "
+            f"{s['rejected_rate']:>6.1%} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}"
+        )
+    print(f"{'total':<12} {'':>9} {result['throughput']:>8.1f}  over {result['seconds']:.0f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=10.0, help="unmeasured seconds before")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="scenario weights, e.g. read_tree=10,lesson=5 (default: %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-trees", type=int, default=4, help="trees created before measuring")
+    parser.add_argument("--ai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--ai-tokens-per-second", type=float, default=0.0)
+    parser.add_argument(
+        "--database-url", help="migrated and written to; default: a temporary SQLite file"
+    )
+    parser.add_argument("--url", help="drive this running server instead of starting one")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, help="compare with this run")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="store this run")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    server = None
+    directory = None
+    base_url = args.url
+    if base_url is None:
+        database_url = args.database_url
+        if database_url is None:
+            directory = tempfile.TemporaryDirectory()
+            database_url = "sqlite:///" + os.path.join(directory.name, "load.db")
+        port = free_port()
+        server = start_server(args, server_env(args, database_url), port)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        result = asyncio.run(drive(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        if directory is not None:
+            directory.cleanup()
+
+    result["config"] = {
+        "users": args.users,
+        "duration": args.duration,
+        "workers": args.workers,
+        "mix": args.mix,
+        "seed": args.seed,
+        "ai_latency_ms": args.ai_latency_ms,
+        "ai_tokens_per_second": args.ai_tokens_per_second,
+    }
+    print_summary(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline), exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != result["config"]:
+            print("Warning: the baseline was recorded with a different configuration")
+        regressions = compare(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Check that the hot service queries are answered with index scans.
+
+Runs the read paths of the services against the configured PostgreSQL
+database inside a transaction that is rolled back, captures every SELECT
+they issue and asserts that its `EXPLAIN` plan contains no sequential scan.
+Sequential scans are disabled for the check so that the planner prefers an
+index whenever one exists, even on the near-empty tables of a fresh database.
+
+Usage: python -m scripts.check_query_plans (also run by tests/test_query_plans.py)
+"""
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+from app.models.knowledge_tree import KnowledgeTree, Section, Subsection
+from app.models.lesson import Lesson
+from app.models.question import Question
+from app.models.user import User
+from app.services.knowledge_tree import KnowledgeTreeService
+from app.services.lesson import LessonService
+from app.services.question import QuestionService
+from app.services.question_bank import question_bank_refills
+from app.services.search import SearchService
+from app.services.user import UserService
+
+SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan", "Bitmap Heap Scan"}
+
+
+def _seed(db: Session) -> Dict[str, int]:
+    tree = KnowledgeTree(topic="Query plan check")
+    db.add_all([tree, KnowledgeTree(topic="Query plan check, second tree")])
+    db.flush()
+    section = Section(tree_id=tree.id, title="Section", description="Section")
+    db.add(section)
+    db.flush()
+    subsection = Subsection(section_id=section.id, title="Subsection", description="Subsection")
+    db.add(subsection)
+    db.flush()
+    db.add(Lesson(subsection_id=subsection.id, content="# Lesson", multimedia_urls=[]))
+    for difficulty in ("easy", "hard"):
+        db.add(Question(section_id=section.id, text="Q", difficulty=difficulty, correct_answer="A"))
+    user = User(email="query-plan-check@example.com", name="Check", hashed_password="-")
+    db.add(user)
+    db.flush()
+    return {
+        "tree_id": tree.id,
+        "section_id": section.id,
+        "subsection_id": subsection.id,
+        "user_id": user.id,
+    }
+
+
+class _QuestionWriter:
+    """Stands in for AIService, so that generate_questions runs its bank and
+    duplicate-check queries without calling a provider."""
+
+    async def generate_questions(self, section_title: str, description: str, difficulty: str):
+        return [
+            {"text": f"Query plan check question {i}", "correct_answer": "A", "difficulty": difficulty}
+            for i in range(3)
+        ]
+
+
+async def _run_hot_queries(db: Session, ids: Dict[str, int]) -> None:
+    trees = KnowledgeTreeService(db=db, ai_service=None)
+    lessons = LessonService(db=db, ai_service=None)
+    questions = QuestionService(db=db, ai_service=_QuestionWriter())
+    users = UserService(db=db, progress_buffer=None)
+
+    await trees.get_knowledge_tree(ids["tree_id"])
+    for sort in ("created_at", "topic"):
+        page = await trees.list_knowledge_trees(sort, limit=1)
+        await trees.list_knowledge_trees(sort, cursor=page.next_cursor, limit=1)
+    lesson = await lessons.get_lesson_by_subsection(ids["subsection_id"])
+    await lessons.get_lesson(lesson.id)
+    await lessons.get_lesson_chunks(lesson.id, 0, 3)
+    await lessons.get_lessons_by_subsections([ids["subsection_id"]])
+    await lessons.get_similar_lessons(ids["subsection_id"])
+    await questions.get_questions_by_section(ids["section_id"])
+    await questions.get_questions_by_section(ids["section_id"], "easy")
+    page = await questions.get_questions_by_section(ids["section_id"], limit=1)
+    await questions.get_questions_by_section(ids["section_id"], cursor=page.next_cursor, limit=1)
+    await questions.get_questions_by_sections([ids["section_id"]])
+    # Draws from the bank, tops it up from the stand-in and checks the depth.
+    await questions.generate_questions(ids["section_id"], "Section", "easy", ids["user_id"])
+    # The refill it scheduled would write outside the rolled-back transaction.
+    await question_bank_refills.stop()
+    await questions.get_next_question(ids["user_id"], ids["section_id"])
+    await questions.get_due_reviews(ids["user_id"], 20)
+    await users.get_progress(ids["user_id"])
+    await SearchService(db=db).search("query plan")
+
+
+def _scan_nodes(plan: Dict[str, Any]) -> List[Tuple[str, str]]:
+    nodes = []
+    if "Relation Name" in plan:
+        nodes.append((plan["Node Type"], plan["Relation Name"]))
+    for child in plan.get("Plans", []):
+        nodes.extend(_scan_nodes(child))
+    return nodes
+
+
+def explain_hot_queries() -> List[Tuple[str, List[str]]]:
+    """Each SELECT of the hot paths, with the tables it scans sequentially."""
+    captured: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    results = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            db = Session(bind=connection)
+            ids = _seed(db)
+            db.expire_all()
+
+            event.listen(connection, "before_cursor_execute", capture)
+            asyncio.run(_run_hot_queries(db, ids))
+            event.remove(connection, "before_cursor_execute", capture)
+
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for statement, parameters in captured:
+                result = connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                ).scalar()
+                plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+                sequential = [
+                    relation
+                    for node_type, relation in _scan_nodes(plan)
+                    if node_type not in SCAN_NODES
+                ]
+                results.append((statement, sequential))
+        finally:
+            transaction.rollback()
+    return results
+
+
+def main() -> int:
+    failures = []
+    for statement, sequential in explain_hot_queries():
+        status = "FAIL" if sequential else "ok"
+        print(f"[{status}] {' '.join(statement.split())[:160]}")
+        if sequential:
+            failures.append((statement, sequential))
+
+    for statement, relations in failures:
+        print(f"\nSequential scan on {', '.join(relations)}:\n{statement}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Sign the stored questions and remove near-duplicates from each section's bank.
+
+For every section, questions are visited oldest first; each one is kept
+unless its MinHash signature is at least QUESTION_DUPLICATE_THRESHOLD
+similar to a question kept before it. Kept questions get their signature
+stored and the section's LSH bands are rebuilt, so new questions are
+checked against them from then on. Attempts on deleted questions are
+removed with them.
+
+Usage: python -m scripts.dedupe_question_bank [--dry-run] [--section-id ID ...]
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.question import Question, QuestionLSHBand
+# Register the models the question mappers refer to.
+import app.models.knowledge_tree
+import app.models.lesson
+import app.models.user
+from app.services import minhash
+
+
+def dedupe_section(db, section_id: int, dry_run: bool) -> int:
+    """Dedupe one section's bank and return the number of duplicates found."""
+    rows = db.execute(
+        select(Question.id, Question.text, Question.minhash)
+        .where(Question.section_id == section_id)
+        .order_by(Question.id)
+    ).all()
+
+    index = minhash.LSHIndex(settings.QUESTION_DUPLICATE_THRESHOLD)
+    duplicates: List[int] = []
+    bands = []
+    for row in rows:
+        signature = minhash.unpack(row.minhash) if row.minhash else minhash.signature(row.text or "")
+        if index.find_duplicate(signature) is not None:
+            duplicates.append(row.id)
+            continue
+        index.add(row.id, signature)
+        if not row.minhash and not dry_run:
+            db.query(Question).filter(Question.id == row.id).update(
+                {Question.minhash: minhash.pack(signature)}, synchronize_session=False
+            )
+        bands.extend(
+            {"section_id": section_id, "band_hash": band_hash, "question_id": row.id}
+            for band_hash in set(minhash.band_hashes(signature))
+        )
+
+    if dry_run:
+        return len(duplicates)
+    db.execute(delete(QuestionLSHBand).where(QuestionLSHBand.section_id == section_id))
+    if duplicates:
+        db.execute(delete(Question).where(Question.id.in_(duplicates)))
+    if bands:
+        db.execute(insert(QuestionLSHBand), bands)
+    db.commit()
+    return len(duplicates)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report duplicates without deleting")
+    parser.add_argument("--section-id", type=int, action="append", help="only these sections")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        section_ids = args.section_id or db.execute(
+            select(Question.section_id).distinct().order_by(Question.section_id)
+        ).scalars().all()
+        total = 0
+        for section_id in section_ids:
+            found = dedupe_section(db, section_id, args.dry_run)
+            if found:
+                print(f"section {section_id}: {found} near-duplicate questions")
+            total += found
+        action = "found" if args.dry_run else "removed"
+        print(f"{total} near-duplicate questions {action} in {len(section_ids)} sections")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
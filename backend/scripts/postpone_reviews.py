@@ -0,0 +1,39 @@
+"""Push scheduled reviews back, e.g. after a break, without long-running locks.
+
+Updates the review schedule in primary key order, one batch per
+transaction.
+
+Usage: python -m scripts.postpone_reviews --days N [--user-id ID] [--batch-size N]
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from app.db.session import SessionLocal
+from app.services.review import ReviewService
+# Register the models the review schedule refers to.
+import app.models.knowledge_tree
+import app.models.lesson
+import app.models.user
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, required=True, help="days to add to every due date")
+    parser.add_argument("--user-id", type=int, help="only this user's reviews")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        updated = ReviewService(db=db).postpone_reviews(
+            args.days, user_id=args.user_id, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+    print(f"Postponed {updated} reviews by {args.days:g} days")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
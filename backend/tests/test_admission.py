@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.api.deps import client_key
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def controller(**overrides) -> AdmissionController:
+    options = dict(max_concurrent=1, max_per_client=3, queue_size=4, queue_timeout=1.0, max_total=64)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_slots_go_round_robin_between_clients():
+    admission = controller()
+    order = []
+
+    async def job(client, index):
+        async with admission.slot(client):
+            order.append((client, index))
+            await asyncio.sleep(0.01)
+
+    # "a" queues three requests before "b" and "c" send one each.
+    tasks = [asyncio.create_task(job("a", i)) for i in range(3)]
+    await settle()
+    tasks += [asyncio.create_task(job("b", 0)), asyncio.create_task(job("c", 0))]
+    await asyncio.gather(*tasks)
+
+    assert order == [("a", 0), ("a", 1), ("b", 0), ("c", 0), ("a", 2)]
+    assert (admission.running, admission.queued) == (0, 0)
+
+
+async def test_per_client_limit():
+    admission = controller(max_concurrent=3, max_per_client=2)
+    tokens = [await admission.acquire("a"), await admission.acquire("a")]
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire("a")
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+    assert await admission.acquire("b") is None
+    for token in tokens:
+        await admission.release("a", token, 0.1)
+
+
+async def test_full_queue():
+    admission = controller(queue_size=1)
+    token = await admission.acquire("a")
+    waiter = asyncio.create_task(admission.acquire("b"))
+    await settle()
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire("c")
+    assert rejected.value.status_code == 503
+    await admission.release("a", token, 0.1)
+    await waiter
+    assert (admission.running, admission.queued) == (1, 0)
+
+
+async def test_queue_timeout_frees_the_place():
+    admission = controller(queue_timeout=0.05)
+    token = await admission.acquire("a")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire("b")
+    assert rejected.value.status_code == 503
+    assert (admission.running, admission.queued) == (1, 0)
+
+    await admission.release("a", token, 0.1)
+    assert admission.running == 0
+    await admission.acquire("b")
+    assert admission.running == 1
+
+
+async def test_cancelled_waiter_does_not_keep_a_slot():
+    admission = controller(max_per_client=1)
+    token = await admission.acquire("a")
+    waiter = asyncio.create_task(admission.acquire("b"))
+    await settle()
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert admission.queued == 0
+
+    await admission.release("a", token, 0.1)
+    assert admission.running == 0
+    # "b" is no longer counted against its per-client limit.
+    await admission.acquire("b")
+    assert admission.running == 1
+
+
+async def test_slot_is_released_when_the_block_fails():
+    admission = controller()
+    with pytest.raises(RuntimeError):
+        async with admission.slot("a"):
+            raise RuntimeError("provider down")
+    assert admission.running == 0
+    async with admission.slot("a"):
+        assert admission.running == 1
+
+
+async def test_retry_after_follows_request_durations():
+    admission = controller(max_concurrent=2)
+    for _ in range(30):
+        await admission.acquire("a")
+        await admission.release("a", None, 1.5)
+    assert admission.retry_after() == 2
+
+
+class SlowSharedCounters:
+    """Shared store that grants every lease after a round trip."""
+
+    async def acquire(self, client, max_per_client, max_total):
+        await asyncio.sleep(0.01)
+        return f"lease-{client}"
+
+    async def release(self, client, token):
+        pass
+
+
+async def test_per_client_limit_holds_while_the_shared_store_answers():
+    admission = controller(max_concurrent=3, max_per_client=1, shared=SlowSharedCounters())
+    results = await asyncio.gather(
+        admission.acquire("a"), admission.acquire("a"), return_exceptions=True
+    )
+    assert results[0] == "lease-a"
+    assert isinstance(results[1], AdmissionRejected) and results[1].status_code == 429
+    await admission.release("a", results[0], 0.1)
+    assert await admission.acquire("a") == "lease-a"
+
+
+async def test_queue_limit_holds_while_the_shared_store_answers():
+    admission = controller(queue_size=1, shared=SlowSharedCounters())
+    token = await admission.acquire("a")
+    waiter = asyncio.create_task(admission.acquire("b"))
+    await settle()
+    # "b" is still waiting on the store, so "c" passes the first check too.
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.acquire("c")
+    assert rejected.value.status_code == 503
+    assert (admission.running, admission.queued) == (1, 1)
+    await admission.release("a", token, 0.1)
+    await waiter
+
+
+def request(headers=None, peer="10.0.0.1") -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw, "client": (peer, 1234)})
+
+
+def test_client_key_trusts_only_tokens_and_the_proxy_header(monkeypatch):
+    token = create_access_token(7)
+    assert client_key(request({"Authorization": f"Bearer {token}"})) == "user:7"
+    assert client_key(request({"Authorization": "Bearer forged"})) == "ip:10.0.0.1"
+    assert client_key(request({"X-Client-Id": "someone-else"})) == "ip:10.0.0.1"
+    assert client_key(request({"X-Forwarded-For": "1.2.3.4"})) == "ip:10.0.0.1"
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "X-Forwarded-For")
+    # The proxy appends the address it saw; earlier entries come from the client.
+    assert client_key(request({"X-Forwarded-For": "1.2.3.4, 5.6.7.8"})) == "ip:5.6.7.8"
+    assert client_key(request()) == "ip:10.0.0.1"
@@ -0,0 +1,21 @@
+import json
+
+from app.services.fake_ai import FakeProvider
+
+PROMPT = [{"role": "user", "content": 'Create a knowledge tree for the topic: "Rust"'}]
+
+
+async def test_answer_depends_only_on_seed_and_prompt():
+    first = await FakeProvider(seed=1).generate_completion(PROMPT, use_json=True)
+    assert await FakeProvider(seed=1).generate_completion(PROMPT, use_json=True) == first
+    assert json.loads(first)["topic"] == "Rust"
+
+    answers = {await FakeProvider(seed=seed).generate_completion(PROMPT, use_json=True) for seed in range(5)}
+    assert len(answers) > 1
+
+
+async def test_streamed_chunks_join_to_the_answer():
+    provider = FakeProvider(seed=2, chunk_tokens=4)
+    chunks = [chunk async for chunk in provider.stream_completion(PROMPT, use_json=True)]
+    assert len(chunks) > 1
+    assert "".join(chunks) == await provider.generate_completion(PROMPT, use_json=True)
@@ -0,0 +1,49 @@
+from app.services.lesson_chunks import split_lesson
+
+LESSON = """Intro text.
+
+# Variables
+
+A variable names a value.
+
+## Assignment ##
+
+```python
+# not a heading
+x = 1
+```
+
+#### Deep heading stays inside
+
+### Scope
+
+Local and global.
+"""
+
+
+def test_splits_at_headings_up_to_level_three():
+    chunks = split_lesson(LESSON)
+    assert [(c.position, c.heading, c.level) for c in chunks] == [
+        (0, None, 0),
+        (1, "Variables", 1),
+        (2, "Assignment", 2),
+        (3, "Scope", 3),
+    ]
+    assert "#### Deep heading stays inside" in chunks[2].content
+
+
+def test_headings_in_code_fences_are_ignored():
+    chunks = split_lesson(LESSON)
+    assert "# not a heading" in chunks[2].content
+    assert all(chunk.heading != "not a heading" for chunk in chunks)
+
+
+def test_chunks_join_back_to_the_lesson():
+    assert "".join(chunk.content for chunk in split_lesson(LESSON)) == LESSON
+    crlf = LESSON.replace("\n", "\r\n")
+    assert "".join(chunk.content for chunk in split_lesson(crlf)) == crlf
+
+
+def test_empty_lesson():
+    assert split_lesson("") == []
+    assert split_lesson(None) == []
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.lesson  # noqa: F401 - the relationships need every model mapped
+from app.models.knowledge_tree import KnowledgeTree, Section
+from app.models.question import Question, QuestionAttempt
+from app.models.user import SectionMastery, User
+from app.services.mastery import QUESTION_RATINGS, difficulties_for, difficulty_rank
+from app.services.question import QuestionService
+
+TABLES = [
+    model.__table__
+    for model in (KnowledgeTree, Section, User, Question, QuestionAttempt, SectionMastery)
+]
+
+
+def test_difficulty_rank_matches_difficulties_for():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        for rating in range(1000, 2100, 7):
+            ranks = connection.execute(
+                select(*[difficulty_rank(literal(float(rating)), d) for d in QUESTION_RATINGS])
+            ).one()
+            ranked = [d for _, d in sorted(zip(ranks, QUESTION_RATINGS))]
+            assert ranked == difficulties_for(rating), rating
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastery.db'}")
+    for table in TABLES:
+        table.create(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(
+            [
+                KnowledgeTree(id=1, topic="Python"),
+                Section(id=1, tree_id=1, title="Basics", description="Basics"),
+                User(id=1, email="a@example.com", name="A", hashed_password="-"),
+            ]
+        )
+        session.add_all(
+            Question(id=index, section_id=1, text=f"{d} {index}", difficulty=d, correct_answer="A")
+            for index, d in enumerate(["hard", "easy", "medium", "easy", "medium", "hard"], start=1)
+        )
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+async def next_question(db):
+    return await QuestionService(db=db, ai_service=None).get_next_question(1, 1, include_links=False)
+
+
+async def test_next_question_follows_the_rating(db):
+    # A new user starts at the initial rating, where easy is the best fit.
+    served = await next_question(db)
+    assert (served.question.id, served.mastery) == (2, 1500.0)
+
+    db.add(SectionMastery(user_id=1, section_id=1, rating=1650.0, attempts=10))
+    db.commit()
+    served = await next_question(db)
+    assert (served.question.id, served.question.difficulty, served.mastery) == (3, "medium", 1650.0)
+
+
+async def test_next_question_skips_recent_answers(db):
+    now = datetime.now(timezone.utc)
+    db.add_all(
+        QuestionAttempt(user_id=1, question_id=question_id, is_correct=True, created_at=now)
+        for question_id in (2, 4)
+    )
+    db.commit()
+    # Easy is used up, so the next-closest difficulty is served in id order.
+    assert (await next_question(db)).question.id == 3
+
+    db.add_all(
+        QuestionAttempt(user_id=1, question_id=question_id, is_correct=True, created_at=now)
+        for question_id in (1, 3, 5, 6)
+    )
+    db.commit()
+    assert await next_question(db) is None
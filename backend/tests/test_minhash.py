@@ -0,0 +1,36 @@
+from app.services import minhash
+
+QUESTION = "What is the difference between a list and a tuple in Python?"
+
+
+def test_signature_ignores_case_and_punctuation():
+    assert minhash.signature(QUESTION) == minhash.signature(QUESTION.upper().replace("?", "!"))
+
+
+def test_similarity():
+    near = minhash.signature("What's the difference between a list and a tuple in Python?")
+    other = minhash.signature("Explain how garbage collection works in the JVM.")
+    assert minhash.similarity(minhash.signature(QUESTION), minhash.signature(QUESTION)) == 1.0
+    assert minhash.similarity(minhash.signature(QUESTION), near) > 0.7
+    assert minhash.similarity(minhash.signature(QUESTION), other) < 0.2
+
+
+def test_pack_round_trip():
+    sig = minhash.signature(QUESTION)
+    assert len(minhash.pack(sig)) == minhash.NUM_PERMUTATIONS * 4
+    assert minhash.unpack(minhash.pack(sig)) == sig
+
+
+def test_band_hashes_are_signed_64_bit():
+    keys = minhash.band_hashes(minhash.signature(QUESTION))
+    assert len(keys) == minhash.BANDS
+    assert all(-(2**63) <= key < 2**63 for key in keys)
+
+
+def test_lsh_index_finds_near_duplicates_only():
+    index = minhash.LSHIndex(threshold=0.7)
+    index.add(1, minhash.signature(QUESTION))
+    index.add(2, minhash.signature("Explain how garbage collection works in the JVM."))
+    near = minhash.signature("what is the difference between a list and a tuple in python")
+    assert index.find_duplicate(near) == 1
+    assert index.find_duplicate(minhash.signature("Name three uses of a binary heap.")) is None
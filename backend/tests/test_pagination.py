@@ -0,0 +1,45 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    created_at = datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor, datetime, int) == (created_at, 42)
+    assert decode_cursor(encode_cursor("Algebra", 7), str, int) == ("Algebra", 7)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("?" * 20, 1)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64!",
+        base64.urlsafe_b64encode(b"{not json").decode(),
+        base64.urlsafe_b64encode(b'{"id": 1}').decode(),
+    ],
+)
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, int)
+
+
+def test_cursor_for_another_ordering():
+    cursor = encode_cursor("Algebra", 7)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, datetime, int)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, str)
+
+
+def test_bool_is_not_an_int():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(True), int)
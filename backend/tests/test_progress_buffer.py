@@ -0,0 +1,164 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models.lesson  # noqa: F401 - the relationships need every model mapped
+import app.models.question  # noqa: F401
+from app.models.knowledge_tree import KnowledgeTree, Section, Subsection
+from app.models.user import SubsectionProgress, User
+from app.schemas.user import UserProgressAck, UserProgressUpdate
+from app.services.progress_buffer import ProgressBuffer
+from app.services.user import UserService
+
+TABLES = [model.__table__ for model in (KnowledgeTree, Section, Subsection, User, SubsectionProgress)]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}")
+
+    @event.listens_for(engine, "connect")
+    def enforce_foreign_keys(connection, record):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    for table in TABLES:
+        table.create(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        tree = KnowledgeTree(topic="Python")
+        db.add(tree)
+        db.flush()
+        section = Section(tree_id=tree.id, title="Basics", description="Basics")
+        db.add(section)
+        db.flush()
+        db.add_all(
+            [
+                Subsection(id=1, section_id=section.id, title="Variables", description="-"),
+                Subsection(id=2, section_id=section.id, title="Loops", description="-"),
+                User(id=1, email="a@example.com", name="A", hashed_password="-"),
+                User(id=2, email="b@example.com", name="B", hashed_password="-"),
+            ]
+        )
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def stored(factory):
+    with factory() as db:
+        return {
+            (row.user_id, row.subsection_id): (row.completed, row.score)
+            for row in db.query(SubsectionProgress)
+        }
+
+
+def buffer_for(factory, max_pending=100):
+    return ProgressBuffer(factory, flush_interval=60.0, max_pending=max_pending)
+
+
+def test_updates_to_one_key_are_coalesced(session_factory):
+    buffer = buffer_for(session_factory)
+    buffer.add(1, 1, True, 0.4)
+    buffer.add(1, 1, False, 0.7)
+    buffer.add(1, 1, False, None)
+    assert buffer.flush() == 1
+    # Completion is sticky and a missing score keeps the last one.
+    assert stored(session_factory) == {(1, 1): (True, 0.7)}
+    assert buffer.flush() == 0
+
+
+def test_flush_merges_with_stored_progress(session_factory):
+    buffer = buffer_for(session_factory)
+    buffer.add(1, 1, True, 0.4)
+    buffer.flush()
+    buffer.add(1, 1, False, None)
+    buffer.flush()
+    assert stored(session_factory) == {(1, 1): (True, 0.4)}
+
+
+def test_overlay_shows_unflushed_updates_of_one_user(session_factory):
+    buffer = buffer_for(session_factory)
+    buffer.add(1, 1, True, None)
+    buffer.add(1, 2, False, 0.5)
+    buffer.add(2, 1, True, 0.9)
+    overlay = buffer.overlay(1)
+    assert {key: (p.completed, p.score) for key, p in overlay.items()} == {
+        1: (True, None),
+        2: (False, 0.5),
+    }
+    buffer.flush()
+    assert buffer.overlay(1) == {}
+
+
+async def test_reaching_max_pending_flushes_early(session_factory):
+    buffer = buffer_for(session_factory, max_pending=2)
+    buffer.start()
+    try:
+        buffer.add(1, 1, True, None)
+        await asyncio.sleep(0.05)
+        assert stored(session_factory) == {}
+        buffer.add(1, 2, True, None)
+        for _ in range(100):
+            if len(stored(session_factory)) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert stored(session_factory) == {(1, 1): (True, None), (1, 2): (True, None)}
+    finally:
+        await buffer.stop()
+
+
+async def test_stop_writes_what_is_pending(session_factory):
+    buffer = buffer_for(session_factory)
+    buffer.start()
+    buffer.add(2, 2, True, 1.0)
+    await buffer.stop()
+    assert stored(session_factory) == {(2, 2): (True, 1.0)}
+
+
+def test_unknown_ids_do_not_sink_the_batch(session_factory, caplog):
+    buffer = buffer_for(session_factory)
+    buffer.add(1, 1, True, None)
+    buffer.add(1, 99, True, None)
+    buffer.add(99, 2, True, None)
+    buffer.add(2, 2, False, 0.3)
+    with caplog.at_level(logging.WARNING, logger="app.services.progress_buffer"):
+        buffer.flush()
+    assert stored(session_factory) == {(1, 1): (True, None), (2, 2): (False, 0.3)}
+    assert len([r for r in caplog.records if "Dropping progress update" in r.message]) == 2
+
+
+def test_failed_flush_keeps_the_batch(session_factory, monkeypatch):
+    buffer = buffer_for(session_factory)
+    buffer.add(1, 1, True, 0.2)
+
+    def fail(rows):
+        buffer.add(1, 1, False, 0.8)
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(buffer, "_write", fail)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    monkeypatch.undo()
+    assert {key: (p.completed, p.score) for key, p in buffer.overlay(1).items()} == {1: (True, 0.8)}
+    buffer.flush()
+    assert stored(session_factory) == {(1, 1): (True, 0.8)}
+
+
+async def test_buffered_update_is_acknowledged(session_factory):
+    buffer = buffer_for(session_factory)
+    with session_factory() as db:
+        service = UserService(db=db, progress_buffer=buffer)
+        ack = await service.update_progress(1, UserProgressUpdate(subsection_id=2, completed=True, score=0.6))
+        assert ack == UserProgressAck(user_id=1, subsection_id=2, completed=True, score=0.6)
+        with pytest.raises(ValueError, match="Subsection"):
+            await service.update_progress(1, UserProgressUpdate(subsection_id=99, completed=True))
+        with pytest.raises(ValueError, match="User"):
+            await service.update_progress(99, UserProgressUpdate(subsection_id=1, completed=True))
+        # Reads see the update before it is flushed.
+        progress = await service.get_progress(1)
+        assert progress.completed_subsections == [2]
+        assert progress.scores == {"2": 0.6}
+    assert stored(session_factory) == {}
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import engine
+from scripts.check_query_plans import explain_hot_queries
+
+
+def _postgres_available() -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.connect():
+            return True
+    except OperationalError:
+        return False
+
+
+# The plans only mean something on PostgreSQL; point SQLALCHEMY_DATABASE_URI at
+# a database migrated to head to run this.
+@pytest.mark.skipif(
+    not _postgres_available(),
+    reason="query plan check needs SQLALCHEMY_DATABASE_URI to be a reachable PostgreSQL database",
+)
+def test_hot_queries_use_indexes():
+    results = explain_hot_queries()
+    assert results
+    sequential = {" ".join(statement.split()): relations for statement, relations in results if relations}
+    assert sequential == {}
@@ -0,0 +1,47 @@
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.read_your_writes import COOKIE, ReadYourWritesMiddleware, record_write, wrote_recently
+
+
+def make_client() -> TestClient:
+    def write(request):
+        record_write()
+        return PlainTextResponse("written")
+
+    def read(request):
+        return PlainTextResponse(str(wrote_recently(request.cookies, 5.0)))
+
+    app = Starlette(routes=[Route("/write", write, methods=["POST"]), Route("/read", read)])
+    app.add_middleware(ReadYourWritesMiddleware, window=5.0)
+    return TestClient(app)
+
+
+def test_writer_gets_a_cookie_and_reads_from_the_primary():
+    client = make_client()
+    assert client.get("/read").text == "False"
+    response = client.post("/write")
+    assert COOKIE in response.cookies
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    assert client.get("/read").text == "True"
+
+
+def test_other_clients_are_not_affected():
+    writer, other = make_client(), make_client()
+    writer.post("/write")
+    assert other.get("/read").text == "False"
+
+
+def test_reads_set_no_cookie():
+    assert "set-cookie" not in make_client().get("/read").headers
+
+
+def test_cookie_expires_after_the_window():
+    assert wrote_recently({COOKIE: str(time.time() - 1)}, 5.0)
+    assert not wrote_recently({COOKIE: str(time.time() - 6)}, 5.0)
+    assert not wrote_recently({COOKIE: "garbage"}, 5.0)
+    assert not wrote_recently({}, 5.0)
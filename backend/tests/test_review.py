@@ -0,0 +1,38 @@
+import pytest
+
+from app.services.review import (
+    CORRECT_QUALITY,
+    INCORRECT_QUALITY,
+    INITIAL_EASINESS,
+    MIN_EASINESS,
+    sm2,
+)
+
+
+def test_intervals_grow_with_correct_answers():
+    easiness, interval, repetitions = INITIAL_EASINESS, 0.0, 0
+    intervals = []
+    for _ in range(4):
+        easiness, interval, repetitions = sm2(easiness, interval, repetitions, CORRECT_QUALITY)
+        intervals.append(interval)
+    assert intervals == [1.0, 6.0, 15.0, 38.0]
+    assert repetitions == 4
+    assert easiness == pytest.approx(INITIAL_EASINESS)
+
+
+def test_wrong_answer_starts_over():
+    easiness, interval, repetitions = sm2(2.5, 15.0, 3, INCORRECT_QUALITY)
+    assert (interval, repetitions) == (1.0, 0)
+    assert easiness == pytest.approx(1.96)
+
+
+def test_easiness_has_a_floor():
+    easiness = INITIAL_EASINESS
+    for _ in range(10):
+        easiness, _, _ = sm2(easiness, 1.0, 0, 0)
+    assert easiness == MIN_EASINESS
+
+
+def test_perfect_answers_raise_easiness():
+    easiness, _, _ = sm2(INITIAL_EASINESS, 0.0, 0, 5)
+    assert easiness == pytest.approx(2.6)
@@ -0,0 +1,43 @@
+import zlib
+
+import pytest
+
+from app.db import types
+from app.db.types import RAW, ZLIB, ZSTD, compress_text, decompress_text
+
+LESSON = "# Lists\n\nA list holds values in order. " * 100
+
+
+def test_short_text_is_stored_raw():
+    stored = compress_text("héllo", min_size=512)
+    assert stored == RAW + "héllo".encode("utf-8")
+    assert decompress_text(stored) == "héllo"
+
+
+def test_long_text_is_compressed():
+    stored = compress_text(LESSON, min_size=512)
+    assert stored[:1] in (ZLIB, ZSTD)
+    assert len(stored) < len(LESSON) // 4
+    assert decompress_text(stored) == LESSON
+
+
+def test_text_that_does_not_shrink_is_stored_raw():
+    stored = compress_text("abc", min_size=1)
+    assert stored == RAW + b"abc"
+
+
+def test_zlib_values_read_without_zstandard(monkeypatch):
+    monkeypatch.setattr(types, "zstandard", None)
+    stored = compress_text(LESSON, min_size=512)
+    assert stored[:1] == ZLIB
+    assert decompress_text(stored) == LESSON
+    assert decompress_text(ZLIB + zlib.compress(b"old row")) == "old row"
+
+
+def test_memoryview_from_the_driver():
+    assert decompress_text(memoryview(compress_text(LESSON, min_size=512))) == LESSON
+
+
+def test_unknown_tag():
+    with pytest.raises(ValueError):
+        decompress_text(b"\x09data")